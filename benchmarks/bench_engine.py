@@ -0,0 +1,315 @@
+"""Placement engine benchmark suite on a simulated desktop
+
+Each scenario builds a FakeBackend desktop (windows, processes, rules and a
+monitor layout, with optional per-call latency) and measures:
+
+  ticks/s, CPU ms/tick, API calls/tick
+      medians over full rescans (enumerate, match, prune) once every window
+      is placed, driven synchronously through PlacementEngine.handle_event;
+      rescans are delta scans unless --full-scan makes every tick inspect
+      every hwnd again, as before delta scanning
+  allocation peak and retained bytes per tick
+      the same ticks again under tracemalloc
+  time-to-place
+      a running engine fed CREATED events; from the event to the window
+      being moved (move settle sleeps skipped unless --move-sleeps)
+
+    python benchmarks/bench_engine.py                     # built-in suite
+    python benchmarks/bench_engine.py --scenario large --json
+    python benchmarks/bench_engine.py --windows 5000 --rules 100 --layout triple --latency-us 20
+    python benchmarks/bench_engine.py --json --output new.json --baseline old.json
+    python benchmarks/bench_engine.py --full-scan
+
+With --baseline the results are compared with an earlier --json run and the
+script exits with status 1 if any metric got worse by more than --tolerance.
+API call counts are deterministic, so they are compared exactly.
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import threading
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from wmm.backend import FakeBackend, make_monitor
+from wmm.engine import PlacementEngine
+from wmm.events import CREATED, RESCAN, PollingEventSource, ScriptedEventSource, WindowEvent
+
+LAYOUTS = {
+    'single': [make_monitor(0, 0, 1920, 1080, is_primary=True)],
+    'dual': [make_monitor(0, 0, 1920, 1080, is_primary=True),
+             make_monitor(1920, 0, 3840, 1080)],
+    'triple': [make_monitor(0, 0, 2560, 1440, is_primary=True),
+               make_monitor(-1920, 360, 0, 1440),
+               make_monitor(2560, 0, 4000, 2560)],
+    'stacked': [make_monitor(0, 0, 1920, 1080, is_primary=True),
+                make_monitor(0, -1080, 1920, 0)],
+}
+
+SCENARIOS = {
+    'small': {'windows': 200, 'processes': 40, 'rules': 10, 'layout': 'single'},
+    'medium': {'windows': 2000, 'processes': 200, 'rules': 40, 'layout': 'dual'},
+    'large': {'windows': 8000, 'processes': 500, 'rules': 400, 'layout': 'triple'},
+}
+
+# Metric -> +1 if higher is better, -1 if lower is better
+METRICS = {
+    'ticks_per_s': +1,
+    'cpu_ms_per_tick': -1,
+    'calls_per_tick': -1,
+    'alloc_peak_kib_per_tick': -1,
+    'retained_kib': -1,
+    'time_to_place_ms_p50': -1,
+    'time_to_place_ms_p95': -1,
+}
+EXACT_METRICS = ('calls_per_tick',)
+
+
+def build_desktop(scenario, latency_us=0.0, latency_overrides=None):
+    """FakeBackend and rule list for a scenario"""
+    latency = {}
+    if latency_us:
+        latency = {name: latency_us / 1e6 for name in dir(FakeBackend)
+                   if not name.startswith('_') and callable(getattr(FakeBackend, name))}
+    latency.update(latency_overrides or {})
+
+    backend = FakeBackend(call_latency=latency)
+    monitors = LAYOUTS[scenario['layout']]
+    backend.set_monitors(monitors)
+    backend.populate(scenario['windows'], scenario['processes'])
+
+    # Rules beyond the process count name processes that aren't running,
+    # which still costs matcher time
+    rules = [{'process': f"proc{i}", 'monitor': monitors[i % len(monitors)], 'size': 'normal'}
+             for i in range(scenario['rules'])]
+    return backend, rules
+
+
+def make_engine(backend, rules, move_sleeps=False, event_source=None):
+    return PlacementEngine(backend, rules, log=lambda msg: None, event_source=event_source,
+                           sleep=time.sleep if move_sleeps else (lambda seconds: None))
+
+
+def tick(engine, full_scan=False):
+    if full_scan:
+        engine.scanner.reset()
+    engine.handle_event(WindowEvent(RESCAN, None, time.monotonic()))
+    engine.collect_results()
+
+
+def settle(engine, timeout=60.0):
+    """Run ticks until no moves are pending, so later ticks are steady state"""
+    deadline = time.monotonic() + timeout
+    tick(engine)
+    while engine.pipeline.in_flight() and time.monotonic() < deadline:
+        time.sleep(0.005)
+    engine.collect_results()
+
+
+def measure_ticks(scenario, args):
+    backend, rules = build_desktop(scenario, args.latency_us, args.latency)
+    engine = make_engine(backend, rules, args.move_sleeps)
+    # Polling mode, as on systems without WinEvent hooks; the poller is never
+    # started, handle_event only reads and reschedules its interval
+    engine.poller = PollingEventSource(engine.scheduler.interval)
+    engine.pipeline.start()
+    try:
+        settle(engine)
+
+        backend.reset_calls()
+        walls, cpus = [], []
+        for _ in range(args.ticks):
+            wall_start = time.perf_counter()
+            cpu_start = time.process_time()
+            tick(engine, args.full_scan)
+            cpus.append(time.process_time() - cpu_start)
+            walls.append(time.perf_counter() - wall_start)
+        calls = dict(backend.calls)
+
+        tracemalloc.start()
+        tick(engine, args.full_scan)  # first traced tick pays for one-off caches
+        baseline, _ = tracemalloc.get_traced_memory()
+        peaks = []
+        for _ in range(args.alloc_ticks):
+            tracemalloc.reset_peak()
+            before, _ = tracemalloc.get_traced_memory()
+            tick(engine, args.full_scan)
+            _, peak = tracemalloc.get_traced_memory()
+            peaks.append(peak - before)
+        retained, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    finally:
+        engine.pipeline.shutdown()
+
+    return {
+        # Medians, so one descheduled tick on a shared CI runner doesn't count
+        'ticks_per_s': 1 / statistics.median(walls),
+        'cpu_ms_per_tick': statistics.median(cpus) * 1000,
+        'calls_per_tick': sum(calls.values()) / args.ticks,
+        'calls_by_api': {name: count / args.ticks for name, count in sorted(calls.items())},
+        'alloc_peak_kib_per_tick': statistics.median(peaks) / 1024 if peaks else 0.0,
+        'retained_kib': (retained - baseline) / 1024,
+    }
+
+
+def measure_time_to_place(scenario, args):
+    backend, rules = build_desktop(scenario, args.latency_us, args.latency)
+    if not rules:
+        return {}
+    # New windows belong to the last ruled, running process
+    pid = 1000 + (min(len(rules), scenario['processes']) - 1)
+
+    placed = {}
+    placed_event = threading.Event()
+    set_window_pos = backend.set_window_pos
+
+    def timed_set_window_pos(hwnd, *rest):
+        set_window_pos(hwnd, *rest)
+        if hwnd not in placed:
+            placed[hwnd] = time.perf_counter()
+            placed_event.set()
+
+    backend.set_window_pos = timed_set_window_pos
+
+    source = ScriptedEventSource()
+    engine = make_engine(backend, rules, args.move_sleeps, event_source=source)
+    engine.start()
+    try:
+        time.sleep(0.2)  # startup rescan
+        # The target must differ from where new windows open, or there is no move
+        rule = rules[pid - 1000]
+        samples = []
+        for _ in range(args.place_samples):
+            placed_event.clear()
+            hwnd = backend.add_window(pid, "New window",
+                                      rect=(rule['monitor']['left'] - 5000, 0,
+                                            rule['monitor']['left'] - 4200, 600))
+            appeared = time.perf_counter()
+            source.emit(CREATED, hwnd)
+            while hwnd not in placed and placed_event.wait(10):
+                placed_event.clear()
+            if hwnd in placed:
+                samples.append((placed[hwnd] - appeared) * 1000)
+    finally:
+        engine.stop()
+        engine.join(5)
+
+    if not samples:
+        return {}
+    samples.sort()
+    return {
+        'time_to_place_ms_p50': statistics.median(samples),
+        'time_to_place_ms_p95': samples[min(len(samples) - 1, int(len(samples) * 0.95))],
+    }
+
+
+def run_scenario(name, scenario, args):
+    result = {'scenario': name, **scenario, 'latency_us': args.latency_us,
+              'move_sleeps': args.move_sleeps, 'full_scan': args.full_scan}
+    result.update(measure_ticks(scenario, args))
+    result.update(measure_time_to_place(scenario, args))
+    return result
+
+
+def compare(results, baseline, tolerance):
+    """Regression messages for metrics worse than the baseline"""
+    previous = {r['scenario']: r for r in baseline.get('results', [])}
+    regressions = []
+    for result in results:
+        old = previous.get(result['scenario'])
+        if old is None:
+            continue
+        for metric, direction in METRICS.items():
+            new_value, old_value = result.get(metric), old.get(metric)
+            if new_value is None or old_value is None:
+                continue
+            allowed = 0.0 if metric in EXACT_METRICS else tolerance
+            if direction > 0:
+                worse = new_value < old_value * (1 - allowed)
+            else:
+                # Small absolute floor so near-zero values don't flag on noise
+                worse = new_value > old_value * (1 + allowed) + (0 if metric in EXACT_METRICS else 0.05)
+            if worse:
+                regressions.append(f"{result['scenario']}: {metric} {old_value:.3f} -> {new_value:.3f}")
+    return regressions
+
+
+def parse_latency(spec):
+    name, _, value = spec.partition('=')
+    if not value:
+        raise argparse.ArgumentTypeError("expected API=MICROSECONDS, e.g. get_window_text=50")
+    return name, float(value) / 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--scenario', choices=sorted(SCENARIOS), action='append',
+                        help="built-in scenario to run (repeatable; default: all)")
+    parser.add_argument('--windows', type=int, help="run a custom scenario with this many windows")
+    parser.add_argument('--processes', type=int, default=None)
+    parser.add_argument('--rules', type=int, default=None)
+    parser.add_argument('--layout', choices=sorted(LAYOUTS), default=None)
+    parser.add_argument('--latency-us', type=float, default=0.0,
+                        help="latency added to every backend call")
+    parser.add_argument('--latency', type=parse_latency, action='append', default=[],
+                        metavar='API=US', help="latency for one backend call (repeatable)")
+    parser.add_argument('--ticks', type=int, default=50)
+    parser.add_argument('--alloc-ticks', type=int, default=5)
+    parser.add_argument('--place-samples', type=int, default=20)
+    parser.add_argument('--move-sleeps', action='store_true', help="keep the real move_window sleeps")
+    parser.add_argument('--full-scan', action='store_true',
+                        help="inspect every hwnd on every tick instead of only new ones")
+    parser.add_argument('--json', action='store_true', help="print machine-readable results")
+    parser.add_argument('--output', help="also write the JSON results to this file")
+    parser.add_argument('--baseline', help="JSON results of an earlier run to compare against")
+    parser.add_argument('--tolerance', type=float, default=0.25,
+                        help="allowed relative slowdown before a timing counts as a regression")
+    args = parser.parse_args()
+    args.latency = dict(args.latency)
+
+    if args.windows is not None or args.processes or args.rules or args.layout:
+        scenario = dict(SCENARIOS['medium'])
+        for key in ('windows', 'processes', 'rules', 'layout'):
+            if getattr(args, key) is not None:
+                scenario[key] = getattr(args, key)
+        scenarios = {'custom': scenario}
+    else:
+        scenarios = {name: SCENARIOS[name] for name in (args.scenario or SCENARIOS)}
+
+    results = [run_scenario(name, scenario, args) for name, scenario in scenarios.items()]
+    report = {'python': platform.python_version(), 'platform': sys.platform, 'results': results}
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print(f"{'scenario':<8} {'windows':>7} {'rules':>5} {'ticks/s':>8} {'cpu ms':>7} "
+              f"{'calls':>7} {'peak KiB':>9} {'kept KiB':>9} {'place p50':>10} {'p95':>7}")
+        for r in results:
+            print(f"{r['scenario']:<8} {r['windows']:>7} {r['rules']:>5} {r['ticks_per_s']:>8.1f} "
+                  f"{r['cpu_ms_per_tick']:>7.2f} {r['calls_per_tick']:>7.0f} "
+                  f"{r['alloc_peak_kib_per_tick']:>9.1f} {r['retained_kib']:>9.1f} "
+                  f"{r.get('time_to_place_ms_p50', float('nan')):>8.2f}ms "
+                  f"{r.get('time_to_place_ms_p95', float('nan')):>5.2f}ms")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        for message in regressions:
+            print(f"REGRESSION {message}", file=sys.stderr)
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,98 @@
+"""Apply layout now: batched vs one window at a time
+
+N windows of ruled processes sit on the wrong monitor, some maximized.
+Places them all once with PlacementEngine.move_window per window (what the
+engine does as windows appear) and once with the batched layout (plan, one
+DeferWindowPos, settle sleeps per step), on a FakeBackend with a per-call
+latency. Prints wall time and the window calls each approach made; a
+second batched run with the deferred batch failing shows the fallback.
+
+    python benchmarks/bench_layout.py [--windows 30] [--maximized 0.3] [--call-ms 1]
+                                      [--arrange cascade|grid|columns]
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from wmm import backend as wb
+from wmm.arrange import ARRANGE_MODES
+from wmm.backend import FakeBackend, make_monitor
+from wmm.engine import PlacementEngine
+from wmm.snapshot import DesktopSnapshot
+
+MONITORS = [make_monitor(0, 0, 1920, 1080, is_primary=True), make_monitor(1920, 0, 3840, 1080)]
+MOVE_CALLS = ('show_window', 'set_window_pos', 'defer_window_pos')
+
+
+def build(window_count, maximized, call_ms, seed, arrange=None):
+    rng = random.Random(seed)
+    latency = {name: call_ms / 1000.0 for name in
+               ('get_window_placement', 'get_window_rect') + MOVE_CALLS}
+    backend = FakeBackend(call_latency=latency)
+    backend.set_monitors(MONITORS)
+    backend.add_process(9000, "editor.exe")
+    backend.add_process(9001, "browser.exe")
+    for i in range(window_count):
+        show_cmd = wb.SW_SHOWMAXIMIZED if rng.random() < maximized else wb.SW_SHOWNORMAL
+        backend.add_window(9000 + i % 2, f"Window {i}", show_cmd=show_cmd)
+    rules = [{'process': 'editor', 'monitor': MONITORS[1], 'size': 'normal'},
+             {'process': 'browser', 'monitor': MONITORS[1], 'size': 'maximized'}]
+    if arrange:
+        for rule in rules:
+            rule['arrange'] = arrange
+    engine = PlacementEngine(backend, rules, log=lambda msg: None)
+    return backend, engine
+
+
+def matches(backend, engine):
+    return list(engine.matcher.match(DesktopSnapshot.capture(backend), backend))
+
+
+def run_sequential(args):
+    backend, engine = build(args.windows, args.maximized, args.call_ms, args.seed, args.arrange)
+    found = matches(backend, engine)
+    backend.reset_calls()
+    start = time.perf_counter()
+    slots, _ = engine._arrange([(rule, engine.tracker.observe(window)) for rule, window in found])
+    ok = 0
+    for rule, window in found:
+        rect = slots.get(engine.tracker.observe(window).key)
+        ok += engine.move_window(window.hwnd, rule.monitor, rule.size, rect)
+    return time.perf_counter() - start, ok, backend.calls
+
+
+def run_batched(args, fail_deferred=False):
+    backend, engine = build(args.windows, args.maximized, args.call_ms, args.seed, args.arrange)
+    backend.fail_deferred = fail_deferred
+    backend.reset_calls()
+    report = engine.apply_layout()
+    return report.seconds, len(report.moved), backend.calls
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--windows', type=int, default=30)
+    parser.add_argument('--maximized', type=float, default=0.3,
+                        help="fraction of windows that start maximized")
+    parser.add_argument('--call-ms', type=float, default=1.0, help="latency of each window call")
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--arrange', choices=ARRANGE_MODES, help="arrange the windows on their monitor")
+    args = parser.parse_args()
+
+    runs = [
+        ("one by one", run_sequential(args)),
+        ("batched", run_batched(args)),
+        ("batched, batch fails", run_batched(args, fail_deferred=True)),
+    ]
+    for name, (seconds, placed, calls) in runs:
+        move_calls = ", ".join(f"{call}={calls[call]}" for call in MOVE_CALLS if calls[call])
+        print(f"{name:<22} {placed:>3}/{args.windows} placed in {seconds * 1000:>7.0f}ms  ({move_calls})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""Total placement time for a burst of N windows
+
+An app opens N maximized windows at once on a FakeBackend whose calls block
+for a configurable time. The engine places them with the real move_window
+settle sleeps, first with one move worker (the old serialized behavior) and
+then with a pool. Prints total wall time until every window is placed and
+the per-call timing recorded by the backend.
+
+    python benchmarks/bench_moves.py [--windows 10] [--workers 1 4 8] [--call-ms 5]
+"""
+
+import argparse
+import os
+import sys
+import threading
+import time
+from collections import defaultdict
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from wmm import backend as wb
+from wmm.backend import FakeBackend, make_monitor
+from wmm.engine import PlacementEngine
+
+# The rule's monitor must be connected: rules for a missing monitor are
+# re-homed to the primary, where the fake windows already are
+MONITORS = [make_monitor(0, 0, 1920, 1080, is_primary=True), make_monitor(1920, 0, 3840, 1080)]
+TARGET = MONITORS[1]
+
+
+def run(window_count, workers, call_ms):
+    latency = {name: call_ms / 1000.0 for name in
+               ('get_window_placement', 'get_window_rect', 'show_window', 'set_window_pos')}
+    backend = FakeBackend(call_latency=latency, record_calls=True)
+    backend.set_monitors(MONITORS)
+    backend.add_process(9000, "app.exe")
+    for i in range(window_count):
+        backend.add_window(9000, f"Document {i}", show_cmd=wb.SW_SHOWMAXIMIZED)
+
+    done = threading.Event()
+    placed = []
+
+    def log(msg):
+        if "✓" in msg:
+            placed.append(time.perf_counter())
+            if len(placed) == window_count:
+                done.set()
+
+    rules = [{'process': 'app', 'monitor': TARGET, 'size': 'maximized'}]
+    engine = PlacementEngine(backend, rules, log=log, move_workers=workers)
+    start = time.perf_counter()
+    engine.start()
+    done.wait(60)
+    total = time.perf_counter() - start
+    engine.stop()
+    return total, backend.call_log
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--windows', type=int, default=10)
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 4, 8])
+    parser.add_argument('--call-ms', type=float, default=5.0, help="latency of each window call")
+    args = parser.parse_args()
+
+    for workers in args.workers:
+        total, call_log = run(args.windows, workers, args.call_ms)
+        per_call = defaultdict(list)
+        for name, start, end, _thread in call_log:
+            per_call[name].append(end - start)
+        print(f"workers={workers:<2} {args.windows} windows placed in {total:.2f}s")
+        for name in sorted(per_call):
+            durations = per_call[name]
+            print(f"    {name:<24} calls={len(durations):<5} "
+                  f"mean={sum(durations) / len(durations) * 1000:.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""Match throughput of the compiled RuleMatcher
+
+Builds thousands of rules (exact names, globs, title regexes, path globs)
+and pushes a synthetic stream of windows through them, once with the
+compiled matcher and once with a naive loop that evaluates every rule's
+patterns per window, the way an uncompiled matcher would. Both must pick
+the same rule for every window.
+
+    python benchmarks/bench_rules.py [--rules 5000] [--windows 20000]
+"""
+
+import argparse
+import fnmatch
+import os
+import random
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from wmm.backend import FakeBackend, make_monitor, normalize_process_name
+from wmm.rules import REGEX_PREFIX, RuleSet
+from wmm.snapshot import DesktopSnapshot
+
+MONITOR = make_monitor(0, 0, 1920, 1080, is_primary=True)
+
+
+def make_rules(count, rng):
+    rules = []
+    for i in range(count):
+        kind = rng.random()
+        rule = {'process': f"app{i}", 'monitor': MONITOR, 'size': 'normal'}
+        if kind < 0.25:
+            rule['process'] = f"app{i % 500}*"
+        elif kind < 0.35:
+            rule['process'] = f"app{i % 500}"
+            rule['title'] = f"re:.*Report {i % 50}.*"
+        elif kind < 0.40:
+            rule['process'] = "*"
+            rule['path'] = f"C:\\Tools{i}\\*"
+        if rng.random() < 0.05:
+            rule['priority'] = rng.randint(1, 5)
+        rules.append(rule)
+    return rules
+
+
+def naive_value_match(spec, value, normalize=str.lower):
+    if spec.startswith(REGEX_PREFIX):
+        return re.search(spec[len(REGEX_PREFIX):], value, re.IGNORECASE | re.DOTALL) is not None
+    if any(c in spec for c in '*?['):
+        return fnmatch.fnmatchcase(value.lower(), normalize(spec))
+    return value.lower() == normalize(spec)
+
+
+def naive_match(rules, window, backend):
+    ordered = sorted(enumerate(rules), key=lambda item: (-int(item[1].get('priority', 0)), item[0]))
+    for _, rule in ordered:
+        if not naive_value_match(rule['process'], window.process, normalize_process_name):
+            continue
+        if rule.get('title') and not naive_value_match(rule['title'], backend.get_window_text(window.hwnd)):
+            continue
+        if rule.get('path') and not naive_value_match(rule['path'], backend.get_process_path(window.pid)):
+            continue
+        return rule
+    return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rules', type=int, default=5000)
+    parser.add_argument('--windows', type=int, default=20000)
+    parser.add_argument('--naive-windows', type=int, default=500,
+                        help="windows to run through the (slow) naive matcher")
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    rules = make_rules(args.rules, rng)
+
+    backend = FakeBackend()
+    for pid in range(1000, 1600):
+        backend.add_process(pid, f"app{pid - 1000}.exe")
+    for i in range(args.windows):
+        backend.add_window(rng.randrange(1000, 1600), f"Report {rng.randrange(100)} - Viewer")
+    snapshot = DesktopSnapshot.capture(backend)
+
+    start = time.perf_counter()
+    ruleset = RuleSet(rules)
+    matcher = ruleset.matcher
+    compile_ms = (time.perf_counter() - start) * 1000
+    resolved = dict(zip(map(id, rules), ruleset.rules))
+
+    start = time.perf_counter()
+    compiled = {window.hwnd: rule for rule, window in matcher.match(snapshot, backend)}
+    compiled_s = time.perf_counter() - start
+
+    # Second pass: candidate lists are memoized, titles already fetched
+    start = time.perf_counter()
+    for _ in matcher.match(snapshot, backend):
+        pass
+    warm_s = time.perf_counter() - start
+
+    sample = snapshot.windows[:args.naive_windows]
+    start = time.perf_counter()
+    naive = {window.hwnd: resolved.get(id(naive_match(rules, window, backend))) for window in sample}
+    naive_s = time.perf_counter() - start
+
+    mismatches = sum(1 for window in sample if compiled.get(window.hwnd) is not naive[window.hwnd])
+
+    print(f"rules={len(rules)} windows={len(snapshot.windows)} compile={compile_ms:.1f}ms")
+    print(f"  compiled (cold): {len(snapshot.windows) / compiled_s:>12,.0f} windows/s")
+    print(f"  compiled (warm): {len(snapshot.windows) / warm_s:>12,.0f} windows/s")
+    print(f"  naive:           {len(sample) / naive_s:>12,.0f} windows/s")
+    print(f"  matched={len(compiled)} naive mismatches={mismatches}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+"""Scaling check for the per-tick snapshot stage
+
+Runs one monitor tick (capture, match, cleanup) against fake desktops of
+increasing size and prints the backend calls and wall time it cost. The call
+count should grow with windows + rules, not windows * rules.
+
+    python benchmarks/bench_snapshot.py
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from wmm.backend import FakeBackend, make_monitor
+from wmm.rules import RuleSet
+from wmm.snapshot import DesktopSnapshot
+
+MONITOR = make_monitor(0, 0, 1920, 1080, is_primary=True)
+
+
+def run_tick(backend, rules):
+    snapshot = DesktopSnapshot.capture(backend)
+    matches = list(RuleSet(rules).matcher.match(snapshot, backend))
+    # Cleanup of the moved set works off the same matches
+    matched_hwnds = {window.hwnd for _, window in matches}
+    return len(matched_hwnds)
+
+
+def main():
+    print(f"{'windows':>8} {'rules':>6} {'calls':>8} {'calls/(w+r)':>12} {'ms':>8}")
+    for window_count in (500, 2000, 8000):
+        for rule_count in (10, 40, 400):
+            backend = FakeBackend()
+            backend.populate(window_count, process_count=200)
+            rules = [{'process': f"proc{i}", 'monitor': MONITOR, 'size': 'normal'}
+                     for i in range(rule_count)]
+
+            backend.reset_calls()
+            start = time.perf_counter()
+            run_tick(backend, rules)
+            elapsed = (time.perf_counter() - start) * 1000
+
+            calls = sum(backend.calls.values())
+            ratio = calls / (window_count + rule_count)
+            print(f"{window_count:>8} {rule_count:>6} {calls:>8} {ratio:>12.2f} {elapsed:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""Startup time and resident memory: headless vs GUI
+
+Each mode is started in a fresh interpreter that imports what that mode
+imports and builds its engine (and, for the GUI, a Tk root when a display
+is available), then reports its wall time and resident memory. Reports the
+median over several runs.
+
+    python benchmarks/bench_startup.py [--runs 5]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CHILD_PRELUDE = """
+import sys, time
+start = time.perf_counter()
+sys.path.insert(0, {root!r})
+"""
+
+CHILD_EPILOGUE = """
+elapsed = time.perf_counter() - start
+try:
+    import psutil
+    rss = psutil.Process().memory_info().rss
+except ImportError:
+    import resource
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+import json
+print(json.dumps({{'seconds': elapsed, 'rss': rss, 'modules': len(sys.modules), 'note': note}}))
+"""
+
+MODES = {
+    'headless': """
+from wmm import headless
+from wmm.backend import FakeBackend
+from wmm.engine import PlacementEngine
+PlacementEngine(FakeBackend(), [])
+note = ''
+""",
+    'gui': """
+from wmm import gui
+note = 'tray deferred' if gui.TRAY_AVAILABLE else 'no tray libs'
+try:
+    root = gui.tk.Tk()
+    root.update()
+    root.destroy()
+except Exception:
+    note += ', no display'
+""",
+}
+
+
+def measure(mode):
+    code = CHILD_PRELUDE.format(root=ROOT) + MODES[mode] + CHILD_EPILOGUE.format()
+    out = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--json', action='store_true', help="print machine-readable results")
+    args = parser.parse_args()
+
+    results = {}
+    for mode in MODES:
+        samples = [measure(mode) for _ in range(args.runs)]
+        results[mode] = {
+            'seconds': statistics.median(s['seconds'] for s in samples),
+            'rss_mb': statistics.median(s['rss'] for s in samples) / (1024 * 1024),
+            'modules': samples[-1]['modules'],
+            'note': samples[-1]['note'],
+        }
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"{'mode':<10} {'startup':>9} {'RSS':>9} {'modules':>8}")
+    for mode, r in results.items():
+        note = f"  ({r['note']})" if r['note'] else ""
+        print(f"{mode:<10} {r['seconds'] * 1000:>7.1f}ms {r['rss_mb']:>7.1f}MB {r['modules']:>8}{note}")
+
+
+if __name__ == "__main__":
+    main()
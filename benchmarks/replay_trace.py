@@ -0,0 +1,173 @@
+"""Replay a desktop trace through the engine and report decisions and cost
+
+Traces come from `window_mover.py --record-trace PATH` on the affected
+machine (see wmm/trace.py). The replay runs on a fake desktop, on a virtual
+clock, so it works on any OS and much faster than real time. Decisions are
+deterministic: two versions of the engine can be compared by replaying the
+same trace with each and diffing the --json outputs, or with --baseline.
+
+    python benchmarks/replay_trace.py desk.jsonl.gz
+    python benchmarks/replay_trace.py desk.jsonl.gz --json --output new.json
+    python benchmarks/replay_trace.py desk.jsonl.gz --baseline old.json
+    python benchmarks/replay_trace.py --synthesize demo.jsonl.gz [--windows 200]
+
+--synthesize records a trace of a scripted session on a FakeBackend: windows
+opening and closing, a screen unplugged and plugged back in (as across a
+lock/unlock) and one window that can never be moved. --baseline exits with
+status 1 if any window was placed differently, or if engine wall time grew
+by more than --tolerance.
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import time
+from collections import deque
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from wmm.backend import SW_SHOWMAXIMIZED, SW_SHOWNORMAL, make_monitor
+from wmm.engine import PlacementEngine
+from wmm.events import CREATED, DESTROYED, RESCAN, PollingEventSource, WindowEvent
+from wmm.trace import IDLE_POLL, ReplayBackend, TraceRecorder, VirtualClock, replay
+
+DESK = make_monitor(0, 0, 1920, 1080, is_primary=True, device=r"\\.\DISPLAY1",
+                    work={'left': 0, 'top': 0, 'right': 1920, 'bottom': 1040})
+SIDE = make_monitor(1920, 0, 4480, 1440, device=r"\\.\DISPLAY2",
+                    work={'left': 1920, 'top': 0, 'right': 4480, 'bottom': 1400})
+
+
+def synthesize(path, window_count, seed, seconds=600.0, scan_interval=2.0):
+    """Record a scripted session to `path`; returns the number of records"""
+    rng = random.Random(seed)
+    stuck = 0x7ff0
+    backend = ReplayBackend({stuck: deque([False] * 100)})
+    backend.set_monitors([DESK, SIDE])
+    names = ["teams", "outlook", "chrome", "code", "slack", "spotify", "explorer", "notepad"]
+    for i, name in enumerate(names):
+        backend.add_process(4000 + i, f"{name}.exe")
+    rules = [{'process': 'teams', 'monitor': dict(SIDE, number=2), 'size': 'normal'},
+             {'process': 'outlook', 'monitor': dict(SIDE, number=2), 'size': 'maximized'},
+             {'process': 'code', 'monitor': dict(DESK, number=1), 'arrange': 'columns'},
+             {'process': 'slack', 'monitor': dict(SIDE, number=2), 'arrange': 'cascade'}]
+
+    clock = VirtualClock()
+    engine = PlacementEngine(backend, rules, log=lambda msg: None, clock=clock,
+                             sleep=lambda seconds: None, move_workers=1)
+    engine.poller = PollingEventSource(engine.scheduler.interval, clock)
+    recorder = TraceRecorder(path, backend, clock=clock)
+    recorder.attach(engine)
+    engine.running = True
+    engine.pipeline.start()
+
+    def step(events):
+        engine.housekeeping()
+        engine.dispatch(events)
+        while engine.pipeline.in_flight():
+            time.sleep(IDLE_POLL)
+        engine.collect_results()
+
+    def open_window():
+        pid = 4000 + rng.randrange(len(names))
+        show_cmd = SW_SHOWMAXIMIZED if rng.random() < 0.2 else SW_SHOWNORMAL
+        x, y = rng.randrange(0, 1200), rng.randrange(0, 600)
+        return backend.add_window(pid, f"Window {len(backend.windows)}",
+                                  rect=(x, y, x + 800, y + 500), show_cmd=show_cmd)
+
+    try:
+        for _ in range(window_count):
+            open_window()
+        # A teams window that refuses every move, like an elevated one
+        backend.put_window(stuck, 4000, "Meeting", "Window", (100, 100, 900, 600), SW_SHOWNORMAL)
+
+        t = 0.0
+        while t < seconds:
+            clock.now = t
+            if abs(t - seconds * 0.4) < scan_interval / 2:
+                backend.set_monitors([DESK])          # locked: the side screen sleeps
+                engine.topology.check()
+            elif abs(t - seconds * 0.45) < scan_interval / 2:
+                backend.set_monitors([DESK, SIDE])    # unlocked
+                engine.topology.check()
+            events = []
+            if rng.random() < 0.3:
+                events.append(WindowEvent(CREATED, open_window(), t))
+            if rng.random() < 0.2:
+                hwnd = rng.choice([h for h in backend.windows if h != stuck])
+                backend.close_window(hwnd)
+                events.append(WindowEvent(DESTROYED, hwnd, t))
+            step(events)
+            step([WindowEvent(RESCAN, None, t)])
+            t += scan_interval
+    finally:
+        engine.running = False
+        engine.pipeline.shutdown()
+        recorder.close()
+    return recorder.records
+
+
+def compare(report, baseline, tolerance):
+    """Lines describing regressions against a baseline --json report"""
+    problems = []
+    old = {}
+    for _, _, decision in baseline['decisions']:
+        old.setdefault(decision[0], []).append(decision[1:])
+    new = {}
+    for _, _, decision in report.decisions:
+        new.setdefault(decision[0], []).append(decision[1:])
+    for hwnd in sorted(old.keys() | new.keys()):
+        if old.get(hwnd) != new.get(hwnd):
+            problems.append(f"{hwnd:#x}: baseline {old.get(hwnd, [])}, now {new.get(hwnd, [])}")
+
+    old_wall = sum(cost[1] for cost in baseline['cost'].values())
+    new_wall = sum(cost[1] for cost in report.cost.values())
+    if old_wall and new_wall > old_wall * (1 + tolerance):
+        problems.append(f"engine time {old_wall * 1000:.1f}ms -> {new_wall * 1000:.1f}ms "
+                        f"(+{(new_wall / old_wall - 1) * 100:.0f}%)")
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('trace', nargs='?', help="trace file (.jsonl or .jsonl.gz)")
+    parser.add_argument('--json', action='store_true', help="print the report as JSON")
+    parser.add_argument('--output', help="also write the JSON report to this file")
+    parser.add_argument('--baseline', help="compare with an earlier --json report")
+    parser.add_argument('--tolerance', type=float, default=0.25,
+                        help="allowed engine time growth over the baseline (default 0.25)")
+    parser.add_argument('--log', action='store_true', help="print the engine log of the replay")
+    parser.add_argument('--synthesize', metavar='PATH', help="record a scripted session to PATH")
+    parser.add_argument('--windows', type=int, default=60, help="--synthesize: windows at start")
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    if args.synthesize:
+        records = synthesize(args.synthesize, args.windows, args.seed)
+        print(f"Wrote {records} records to {args.synthesize}")
+        if not args.trace:
+            return 0
+    if not args.trace:
+        parser.error("a trace file is required")
+
+    report = replay(args.trace)
+    if args.log:
+        print("\n".join(report.log))
+    data = report.as_dict()
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=1)
+    print(json.dumps(data, indent=1) if args.json else report.format())
+
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            problems = compare(report, json.load(f), args.tolerance)
+        for problem in problems:
+            print(f"REGRESSION {problem}")
+        return 1 if problems else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,83 @@
+"""slot_rects geometry, and arranging windows through the engine"""
+
+import pytest
+
+from wmm.arrange import CASCADE_STEP, OFFSET, slot_rects
+from wmm.backend import FakeBackend, make_monitor
+
+LANDSCAPE = (0, 0, 1920, 1040)    # 1080p less a bottom taskbar
+PORTRAIT = (1920, 0, 3000, 1920)
+ULTRAWIDE = (-3440, 200, 0, 1640)
+
+
+def overlaps(a, b):
+    ax, ay, aw, ah = a
+    bx, by, bw, bh = b
+    return ax < bx + bw and bx < ax + aw and ay < by + bh and by < ay + ah
+
+
+@pytest.mark.parametrize('work', [LANDSCAPE, PORTRAIT, ULTRAWIDE])
+@pytest.mark.parametrize('mode', ['grid', 'columns'])
+@pytest.mark.parametrize('count', [1, 2, 3, 4, 5, 7, 9, 10])
+def test_tiles_fill_the_work_area_without_overlapping(work, mode, count):
+    left, top, right, bottom = work
+    rects = slot_rects(work, mode, count)
+
+    assert len(rects) == count
+    assert len({(w, h) for _, _, w, h in rects}) == 1
+    for i, rect in enumerate(rects):
+        x, y, w, h = rect
+        assert left <= x and x + w <= right and top <= y and y + h <= bottom
+        assert not any(overlaps(rect, other) for other in rects[i + 1:])
+    # Cells are as large as the layout allows, give or take rounding
+    columns = len({x for x, _, _, _ in rects})
+    rows = len({y for _, y, _, _ in rects})
+    w, h = rects[0][2:]
+    assert right - left - columns < columns * w <= right - left
+    assert bottom - top - rows < rows * h <= bottom - top
+
+
+@pytest.mark.parametrize('count, columns, rows', [(1, 1, 1), (2, 2, 1), (3, 2, 2), (4, 2, 2),
+                                                  (5, 3, 2), (9, 3, 3), (10, 4, 3)])
+def test_grid_is_near_square(count, columns, rows):
+    rects = slot_rects(LANDSCAPE, 'grid', count)
+    assert len({x for x, _, _, _ in rects}) == columns
+    assert len({y for _, y, _, _ in rects}) == rows
+    # Filled row by row
+    assert [y for _, y, _, _ in rects] == sorted(y for _, y, _, _ in rects)
+
+
+def test_columns_are_full_height():
+    rects = slot_rects(PORTRAIT, 'columns', 3)
+    assert rects == [(1920, 0, 360, 1920), (2280, 0, 360, 1920), (2640, 0, 360, 1920)]
+
+
+def test_cascade_steps_and_wraps():
+    left, top = LANDSCAPE[:2]
+    steps = 1040 // 2 // CASCADE_STEP
+    rects = slot_rects(LANDSCAPE, 'cascade', steps + 2)
+    assert rects[0] == (left + OFFSET, top + OFFSET, None, None)
+    assert rects[1] == (left + OFFSET + CASCADE_STEP, top + OFFSET + CASCADE_STEP, None, None)
+    assert rects[steps] == rects[0]
+    assert rects[steps + 1] == rects[1]
+
+
+def test_no_slots():
+    assert slot_rects(LANDSCAPE, 'grid', 0) == []
+    with pytest.raises(ValueError):
+        slot_rects(LANDSCAPE, 'spiral', 2)
+
+
+def test_arranging_with_no_monitors_uses_the_saved_ones(engine_runner):
+    # A display reconfiguration can briefly report no monitors at all
+    saved = make_monitor(1920, 0, 3840, 1080)
+    backend = FakeBackend()
+    backend.set_monitors([])
+    backend.add_process(100, "app.exe")
+    hwnds = [backend.add_window(100, f"Doc {n}") for n in range(3)]
+    runner = engine_runner(backend, [{'process': 'app', 'monitor': saved, 'arrange': 'columns'}])
+    runner.rescan()
+
+    assert not any("Error" in line for line in runner.log)
+    assert [backend.windows[hwnd].rect for hwnd in hwnds] == [
+        (1920, 0, 2560, 1080), (2560, 0, 3200, 1080), (3200, 0, 3840, 1080)]
@@ -0,0 +1,100 @@
+"""save_config's atomic replace and ConfigWatcher, on real files"""
+
+import json
+import os
+
+import pytest
+
+from wmm.backend import make_monitor
+from wmm.config import ConfigWatcher, load_profiles, save_config
+
+MONITOR = make_monitor(1920, 0, 3840, 1080)
+
+
+def rules(*names):
+    return [{'process': name, 'monitor': MONITOR} for name in names]
+
+
+def test_failed_save_leaves_the_old_file(tmp_path):
+    path = tmp_path / "config.json"
+    save_config(str(path), rules("app"))
+    before = path.read_bytes()
+
+    # Not JSON-serializable: json.dump fails partway through the temp file
+    with pytest.raises(TypeError):
+        save_config(str(path), rules("app", "other"), settings={'log_file': object()})
+
+    assert path.read_bytes() == before
+    assert os.listdir(tmp_path) == ["config.json"]
+
+
+def test_save_round_trips_profiles(tmp_path):
+    path = str(tmp_path / "config.json")
+    profiles = {'Desk': rules("app"), 'Laptop': rules("other")}
+    save_config(path, profiles['Laptop'], profiles=profiles, active='Laptop')
+
+    loaded, active, _settings = load_profiles(path)
+    assert active == 'Laptop'
+    assert {name: [rule['process'] for rule in r] for name, r in loaded.items()} == {
+        'Desk': ["app"], 'Laptop': ["other"]}
+
+
+def write(path, data):
+    with open(path, 'w') as f:
+        json.dump(data, f)
+
+
+def test_change_is_reported_once_it_settles(tmp_path, clock):
+    path = str(tmp_path / "config.json")
+    write(path, rules("app"))
+    watcher = ConfigWatcher(path, debounce=0.5, clock=clock)
+
+    write(path, rules("app", "other"))
+    clock.now = 1.0
+    assert watcher.check() is None    # change seen, settling
+    clock.now = 1.3
+    write(path, rules("app", "other", "third"))
+    assert watcher.check() is None    # written again: settling starts over
+    clock.now = 1.6
+    assert watcher.check() is None
+    clock.now = 1.9
+    change = watcher.check()
+    assert [rule['process'] for rule in change[0]] == ["app", "other", "third"]
+    clock.now = 3.0
+    assert watcher.check() is None    # reported once
+
+
+def test_own_saves_and_touches_are_ignored(tmp_path, clock):
+    path = str(tmp_path / "config.json")
+    save_config(path, rules("app"))
+    watcher = ConfigWatcher(path, debounce=0.5, clock=clock)
+
+    save_config(path, rules("app", "other"))
+    watcher.mark_saved()
+    clock.now = 1.0
+    assert watcher.check() is None
+    clock.now = 2.0
+    assert watcher.check() is None
+
+    # Same content rewritten with a new mtime
+    os.utime(path, ns=(0, 10 ** 9))
+    clock.now = 3.0
+    assert watcher.check() is None
+    clock.now = 4.0
+    assert watcher.check() is None
+
+
+def test_unparsable_change_raises_once(tmp_path, clock):
+    path = str(tmp_path / "config.json")
+    write(path, rules("app"))
+    watcher = ConfigWatcher(path, debounce=0.5, clock=clock)
+
+    with open(path, 'w') as f:
+        f.write("{not json")
+    clock.now = 1.0
+    watcher.check()
+    clock.now = 2.0
+    with pytest.raises(ValueError):
+        watcher.check()
+    clock.now = 3.0
+    assert watcher.check() is None
@@ -0,0 +1,137 @@
+"""Control API over a real socket, against an engine on a fake desktop"""
+
+import json
+import os
+import sys
+import threading
+from multiprocessing.connection import Client
+
+import pytest
+
+from wmm.backend import FakeBackend, make_monitor
+from wmm.control import (BATCH_ABORTED, INVALID_PARAMS, INVALID_REQUEST, METHOD_NOT_FOUND,
+                         PARSE_ERROR, ConfigStore, ControlClient, ControlError, ControlServer)
+
+pytestmark = pytest.mark.skipif(sys.platform == 'win32', reason="tests use a Unix socket")
+
+LEFT = make_monitor(0, 0, 1920, 1080, is_primary=True)
+RIGHT = make_monitor(1920, 0, 3840, 1080)
+PROFILES = {
+    'docked': [{'process': 'app', 'monitor': RIGHT}],
+    'laptop': [{'process': 'app', 'monitor': LEFT}],
+}
+TIMEOUT = 5.0
+
+
+@pytest.fixture
+def control(tmp_path, engine_runner):
+    """(runner, server, config path): an engine that has placed an app window"""
+    backend = FakeBackend()
+    backend.set_monitors([LEFT, RIGHT])
+    backend.add_process(100, "app.exe")
+    backend.add_window(100, "App", rect=(100, 100, 900, 700))
+    runner = engine_runner(backend, [])
+    runner.engine.set_profiles(PROFILES, 'docked')
+    runner.step()
+    config = tmp_path / "config.json"
+    server = ControlServer(runner.engine, ConfigStore(runner.engine, str(config), {}),
+                           str(tmp_path / "control.sock"))
+    server.start()
+    yield runner, server, config
+    server.stop()
+
+
+def served(runner, fn):
+    """fn()'s result, stepping the engine while it waits on it as a running engine would"""
+    result = []
+    thread = threading.Thread(target=lambda: result.append(fn()))
+    thread.start()
+    while thread.is_alive():
+        runner.step()
+        thread.join(0.001)
+    return result[0]
+
+
+def test_socket_is_owner_only(control):
+    runner, server, config = control
+    assert os.stat(server.address).st_mode & 0o777 == 0o600
+
+
+def test_batch_is_all_or_nothing(control):
+    runner, server, config = control
+    with ControlClient(server.address, timeout=TIMEOUT) as client:
+        results = client.batch([
+            ('rules.add', {'rule': {'process': 'editor', 'monitor': LEFT}}),
+            ('profiles.switch', {'name': 'laptop'}),
+            ('rules.remove', {'index': 5}),
+        ])
+        assert [r.code for r in results] == [BATCH_ABORTED, BATCH_ABORTED, INVALID_PARAMS]
+        assert not config.exists()
+        assert runner.engine.profile == 'docked'
+        assert client.call('rules.list') == PROFILES['docked']
+
+        rules = [{'process': f'tool{n}', 'monitor': LEFT} for n in range(100)]
+        results = client.batch([('rules.add', {'rule': rule}) for rule in rules])
+        assert results == list(range(1, 101))
+
+    saved = json.loads(config.read_text())
+    assert len(saved['profiles']['docked']) == 101
+    assert saved['profiles']['laptop'] == PROFILES['laptop']
+    runner.step()
+    assert len(runner.engine.rules) == 101
+
+
+def test_aborted_batch_runs_no_layout_pass(control):
+    runner, server, config = control
+    backend = runner.backend
+    hwnd, = backend.windows
+    # Placed when the engine first scanned; then dragged back by hand
+    backend.set_window_pos(hwnd, 100, 100, 800, 600, 0)
+    with ControlClient(server.address, timeout=TIMEOUT) as client:
+        results = client.batch([('layout.apply', {}), ('no.such.method', {})])
+        assert [r.code for r in results] == [BATCH_ABORTED, METHOD_NOT_FOUND]
+        runner.step()
+        assert backend.windows[hwnd].rect[0] < 1920
+
+        report = served(runner, lambda: client.call('layout.apply'))
+    assert report['moved'] == 1
+    assert backend.windows[hwnd].rect[0] >= 1920
+
+
+def test_bad_requests_get_errors_and_the_listener_survives(control):
+    runner, server, config = control
+    conn = Client(server.address)
+    try:
+        def exchange(data):
+            conn.send_bytes(data)
+            assert conn.poll(TIMEOUT)
+            return json.loads(conn.recv_bytes())
+
+        assert exchange(b'{"jsonrpc":')['error']['code'] == PARSE_ERROR
+        assert exchange(b'[]')['error']['code'] == INVALID_REQUEST
+        response = exchange(b'{"method": "ping", "id": 1}')
+        assert (response['error']['code'], response['id']) == (INVALID_REQUEST, 1)
+        response = exchange(b'{"jsonrpc": "2.0", "method": "ping", "params": [1], "id": 2}')
+        assert response['error']['code'] == INVALID_PARAMS
+
+        # The same connection still answers
+        response = exchange(b'{"jsonrpc": "2.0", "method": "ping", "id": 3}')
+        assert response['result']['profile'] == 'docked'
+    finally:
+        conn.close()
+
+    # And so does a new one
+    with ControlClient(server.address, timeout=TIMEOUT) as client:
+        assert client.call('profiles.list')['active'] == 'docked'
+        with pytest.raises(ControlError) as raised:
+            client.call('profiles.switch', name='travel')
+        assert raised.value.code == INVALID_PARAMS
+
+
+def test_windows_list_reads_engine_state(control):
+    runner, server, config = control
+    hwnd, = runner.backend.windows
+    runner.rescan(at=1.0)
+    with ControlClient(server.address, timeout=TIMEOUT) as client:
+        windows = served(runner, lambda: client.call('windows.list', placed_only=True))
+    assert [(w['hwnd'], w['rule']) for w in windows] == [(hwnd, 'app')]
@@ -0,0 +1,83 @@
+"""Event-driven detection: DispatchQueue and the engine's window events"""
+
+from wmm.backend import FakeBackend, make_monitor
+from wmm.events import CREATED, DESTROYED, RESCAN, SHOWN, DispatchQueue, WindowEvent
+
+MONITORS = [make_monitor(0, 0, 1920, 1080, is_primary=True), make_monitor(1920, 0, 3840, 1080)]
+
+
+def test_burst_is_coalesced_after_settling(clock):
+    queue = DispatchQueue(settle=0.02, clock=clock)
+    queue.put(WindowEvent(CREATED, 0x10, 0.0))
+    queue.put(WindowEvent(SHOWN, 0x10, 0.005))
+    queue.put(WindowEvent(CREATED, 0x20, 0.01))
+
+    clock.now = 0.01
+    assert queue.get_batch(timeout=0) == []
+    clock.now = 0.025
+    assert queue.get_batch(timeout=0) == [WindowEvent(SHOWN, 0x10, 0.0)]
+    clock.now = 0.03
+    assert queue.get_batch(timeout=0) == [WindowEvent(CREATED, 0x20, 0.01)]
+    assert queue.coalesced == 1
+
+
+def test_rescan_does_not_wait(clock):
+    queue = DispatchQueue(clock=clock)
+    queue.put(WindowEvent(RESCAN, None, 0.0))
+    assert queue.get_batch(timeout=0) == [WindowEvent(RESCAN, None, 0.0)]
+
+
+def test_closed_queue_returns_at_once(clock):
+    queue = DispatchQueue(clock=clock)
+    queue.close()
+    assert queue.get_batch(timeout=60) == []
+
+
+def test_wake_does_not_hide_settled_events(clock):
+    queue = DispatchQueue(clock=clock)
+    queue.put(WindowEvent(RESCAN, None, 0.0))
+    queue.wake()
+    assert queue.get_batch(timeout=60) == [WindowEvent(RESCAN, None, 0.0)]
+    # The wake was spent on that batch
+    assert queue.get_batch(timeout=0) == []
+
+
+def test_wake_returns_an_empty_batch(clock):
+    queue = DispatchQueue(clock=clock)
+    queue.put(WindowEvent(CREATED, 0x10, 0.0))
+    queue.wake()
+    assert queue.get_batch(timeout=60) == []
+    assert len(queue) == 1
+
+
+def desktop():
+    backend = FakeBackend()
+    backend.set_monitors(MONITORS)
+    backend.populate(100, process_count=10)
+    backend.add_process(9000, "app.exe")
+    return backend
+
+
+def test_created_window_placed_without_a_scan(engine_runner):
+    backend = desktop()
+    runner = engine_runner(backend, [{'process': 'app', 'monitor': MONITORS[1]}])
+    runner.rescan()
+
+    hwnd = backend.add_window(9000, "New")
+    backend.reset_calls()
+    runner.step([WindowEvent(CREATED, hwnd, runner.clock.now)])
+    assert backend.windows[hwnd].rect[0] >= 1920
+    assert backend.calls['enum_windows'] == 0
+    assert runner.engine.latency.count == 1
+
+
+def test_destroyed_window_is_forgotten(engine_runner):
+    backend = desktop()
+    hwnd = backend.add_window(9000, "Doomed")
+    runner = engine_runner(backend, [{'process': 'app', 'monitor': MONITORS[1]}])
+    runner.rescan()
+    assert len(runner.engine.tracker) == 1
+
+    backend.close_window(hwnd)
+    runner.step([WindowEvent(DESTROYED, hwnd, runner.clock.now)])
+    assert len(runner.engine.tracker) == 0
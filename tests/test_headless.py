@@ -0,0 +1,44 @@
+"""headless.run shutting down cleanly when it can't start"""
+
+import io
+import json
+import signal
+import socket
+
+import pytest
+
+from wmm.backend import FakeBackend, make_monitor
+from wmm.config import save_config
+from wmm.headless import run
+
+MONITOR = make_monitor(0, 0, 1920, 1080, is_primary=True)
+
+
+@pytest.fixture
+def signal_handlers():
+    """run() installs stop handlers; put pytest's back afterwards"""
+    names = [name for name in ('SIGINT', 'SIGTERM', 'SIGBREAK') if hasattr(signal, name)]
+    saved = {name: signal.getsignal(getattr(signal, name)) for name in names}
+    yield
+    for name, handler in saved.items():
+        signal.signal(getattr(signal, name), handler)
+
+
+def test_taken_stats_port_still_closes_the_trace(tmp_path, signal_handlers):
+    config = str(tmp_path / "config.json")
+    save_config(config, [{'process': 'app', 'monitor': MONITOR}])
+    trace = tmp_path / "desktop.trace"
+    stream = io.StringIO()
+
+    with socket.socket() as taken:
+        taken.bind(("127.0.0.1", 0))
+        taken.listen(1)
+        port = taken.getsockname()[1]
+        assert run(config, backend=FakeBackend(), stream=stream, stats_port=port,
+                   trace_file=str(trace)) == 1
+
+    assert f"Could not serve stats on port {port}" in stream.getvalue()
+    assert "records written" in stream.getvalue()
+    # Closed, so everything recorded so far reached the file
+    with open(trace, encoding='utf-8') as f:
+        assert json.loads(f.readline())['k'] == 'trace'
@@ -0,0 +1,100 @@
+"""Apply Layout Now: planning, the DeferWindowPos batch and its fallback"""
+
+from wmm import backend as wb
+from wmm.backend import FakeBackend, make_monitor
+from wmm.layout import apply_layout, plan_layout
+from wmm.rules import RuleSet
+from wmm.snapshot import DesktopSnapshot
+
+# Taskbar docked on the left of the primary monitor: workspace coordinates
+# start at x=100 on screen
+PRIMARY = make_monitor(0, 0, 1920, 1080, is_primary=True,
+                       work={'left': 100, 'top': 0, 'right': 1920, 'bottom': 1080})
+SECOND = make_monitor(1920, 0, 3840, 1080)
+
+
+def desktop():
+    backend = FakeBackend()
+    backend.set_monitors([PRIMARY, SECOND])
+    for pid, name in enumerate(("editor.exe", "chat.exe", "player.exe", "notes.exe"), start=1000):
+        backend.add_process(pid, name)
+    return backend
+
+
+def matches(backend, rules):
+    ruleset = RuleSet(rules)
+    return list(ruleset.matcher.match(DesktopSnapshot.capture(backend), backend))
+
+
+def test_plan_contents():
+    backend = desktop()
+    editor = backend.add_window(1000, "Editor", rect=(200, 100, 1000, 700))
+    chat = backend.add_window(1001, "Chat", rect=(2000, 100, 2600, 900))
+    player = backend.add_window(1002, "Player", rect=(300, 200, 1100, 800),
+                                show_cmd=wb.SW_SHOWMAXIMIZED)
+    # Minimized where it belongs; its restored rect starts left of the work
+    # area origin, so only screen coordinates put it on the primary
+    notes = backend.add_window(1003, "Notes", rect=(50, 100, 650, 500),
+                               show_cmd=wb.SW_SHOWMINIMIZED)
+    rules = [
+        {'process': 'editor', 'monitor': SECOND},
+        {'process': 'chat', 'monitor': SECOND},
+        {'process': 'player', 'monitor': SECOND, 'size': 'maximized'},
+        {'process': 'notes', 'monitor': PRIMARY, 'size': 'minimized'},
+    ]
+
+    plan, skipped, failed = plan_layout(backend, matches(backend, rules))
+
+    assert (skipped, failed) == (2, [])
+    moves = {move.hwnd: move for move in plan}
+    assert set(moves) == {editor, player}
+    assert chat not in moves and notes not in moves
+    # Default position on the target's work area, restored size kept
+    assert moves[editor].rect == (1970, 50, 800, 600)
+    assert (moves[editor].restore, moves[editor].show_after) == (False, None)
+    assert moves[player].rect == (1970, 50, 800, 600)
+    assert (moves[player].restore, moves[player].show_after) == (True, wb.SW_MAXIMIZE)
+    # Nothing was touched while planning
+    assert backend.calls['set_window_pos'] == backend.calls['show_window'] == 0
+
+
+def test_arranged_rect_compared_in_screen_coordinates():
+    backend = desktop()
+    hwnd = backend.add_window(1000, "Editor", rect=(100, 0, 1010, 1080),
+                              show_cmd=wb.SW_SHOWMAXIMIZED)
+    found = matches(backend, [{'process': 'editor', 'monitor': PRIMARY, 'size': 'maximized'}])
+
+    plan, skipped, _failed = plan_layout(backend, found, {hwnd: (100, 0, 910, 1080)})
+    assert (plan, skipped) == ([], 1)
+
+
+def test_moves_go_in_one_batch():
+    backend = desktop()
+    hwnds = [backend.add_window(1000, f"Editor {n}") for n in range(4)]
+    found = matches(backend, [{'process': 'editor', 'monitor': SECOND}])
+    backend.reset_calls()
+
+    report = apply_layout(backend, found, sleep=lambda seconds: None)
+
+    assert report.batched
+    assert sorted(report.moved) == sorted(hwnds) and report.failed == []
+    assert backend.calls['defer_window_pos'] == 1
+    assert backend.calls['set_window_pos'] == 0
+    assert all(backend.windows[hwnd].rect[0] >= 1920 for hwnd in hwnds)
+
+
+def test_failed_batch_falls_back_to_one_move_per_window():
+    backend = desktop()
+    hwnds = [backend.add_window(1000, f"Editor {n}") for n in range(4)]
+    backend.add_window(1001, "Chat", rect=(2000, 100, 2600, 900))
+    found = matches(backend, [{'process': '*', 'monitor': SECOND}])
+    backend.fail_deferred = True
+    backend.reset_calls()
+
+    report = apply_layout(backend, found, sleep=lambda seconds: None)
+
+    assert not report.batched
+    assert (len(report.moved), report.skipped, report.failed) == (4, 1, [])
+    assert backend.calls['set_window_pos'] == 4
+    assert all(backend.windows[hwnd].rect[0] >= 1920 for hwnd in hwnds)
+    assert "one by one" in report.format()
@@ -0,0 +1,66 @@
+"""LogSink drop counting and the rotating JSON lines file"""
+
+import json
+
+from wmm.logsink import LogRecord, LogSink, RotatingJsonlFile
+
+
+def test_full_queue_drops_the_oldest_records(clock):
+    sink = LogSink(capacity=3, clock=clock)
+    for n in range(5):
+        sink.log(f"line {n}")
+
+    assert (sink.emitted, sink.dropped, len(sink)) == (5, 2, 3)
+    assert [record.msg for record in sink.drain()] == ["line 2", "line 3", "line 4"]
+
+
+def test_drain_folds_repeats_and_honours_the_limit(clock):
+    sink = LogSink(clock=clock)
+    for msg in ("a", "a", "a", "b", "c"):
+        sink.log(msg)
+
+    first = sink.drain(limit=2)
+    assert [(record.msg, record.repeat) for record in first] == [("a", 3), ("b", 1)]
+    assert [record.msg for record in sink.drain()] == ["c"]
+
+
+def record(msg):
+    return LogRecord(0.0, 'info', msg, 1)
+
+
+def read_lines(path):
+    with open(path, encoding='utf-8') as f:
+        return [json.loads(line)['msg'] for line in f]
+
+
+def test_file_rotates_at_the_size_limit(tmp_path):
+    path = str(tmp_path / "wmm.jsonl")
+    line_bytes = len(json.dumps({'time': 0.0, 'level': 'info', 'msg': "m0", 'repeat': 1}) + '\n')
+    log_file = RotatingJsonlFile(path, max_bytes=2 * line_bytes, backups=2)
+
+    for n in range(7):
+        log_file.write([record(f"m{n}")])
+
+    assert read_lines(path) == ["m6"]
+    assert read_lines(path + ".1") == ["m4", "m5"]
+    assert read_lines(path + ".2") == ["m2", "m3"]
+    assert not (tmp_path / "wmm.jsonl.3").exists()
+
+
+def test_size_limit_counts_bytes_not_characters(tmp_path):
+    path = str(tmp_path / "wmm.jsonl")
+    # Each line is ~75 characters but ~115 bytes of UTF-8
+    log_file = RotatingJsonlFile(path, max_bytes=200, backups=1)
+    log_file.write([record("✓" * 20)])
+    log_file.write([record("✓" * 20)])
+
+    assert (tmp_path / "wmm.jsonl.1").exists()
+    assert (tmp_path / "wmm.jsonl").stat().st_size <= 200
+
+
+def test_unwritable_file_is_reported_in_the_log(tmp_path, clock):
+    sink = LogSink(jsonl=RotatingJsonlFile(str(tmp_path / "missing" / "wmm.jsonl")), clock=clock)
+    sink.log("hello")
+    batch = sink.drain()
+    assert batch[0].msg == "hello"
+    assert batch[-1].level == 'error'
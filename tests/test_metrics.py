@@ -0,0 +1,72 @@
+"""Prometheus exposition of engine stats, and the HTTP endpoint serving it"""
+
+import json
+import re
+from urllib.request import urlopen
+
+from wmm.backend import FakeBackend, make_monitor
+from wmm.metrics import format_prometheus
+from wmm.stats_server import StatsServer
+
+MONITORS = [make_monitor(0, 0, 1920, 1080, is_primary=True), make_monitor(1920, 0, 3840, 1080)]
+
+SAMPLE = re.compile(r'^wmm_\w+(\{(\w+="([^"\\\n]|\\[\\"n])*",?)+\})? \S+$')
+
+
+def running_engine(engine_runner):
+    backend = FakeBackend()
+    backend.set_monitors(MONITORS)
+    backend.populate(10, process_count=2)
+    runner = engine_runner(backend, [{'process': 'proc0', 'monitor': MONITORS[1]}])
+    runner.rescan()
+    return runner.engine
+
+
+def test_every_metric_has_help_and_type(engine_runner):
+    text = format_prometheus(running_engine(engine_runner).stats())
+    lines = text.splitlines()
+
+    families = []
+    for index, line in enumerate(lines):
+        if line.startswith("# TYPE "):
+            name = line.split()[2]
+            families.append(name)
+            assert lines[index - 1].startswith(f"# HELP {name} ")
+    assert families and len(families) == len(set(families))
+    # Generated HELP falls back to the name; every engine metric has its own
+    assert not any(line.split(" ", 3)[3] == line.split()[2][4:].replace('_', ' ')
+                   for line in lines if line.startswith("# HELP "))
+    for line in lines:
+        assert line.startswith("#") or SAMPLE.match(line), line
+    assert "wmm_scans_total 1" in lines
+
+
+def test_label_values_are_escaped():
+    stats = {
+        'mode': "polling",
+        'profile': 'C:\\Desk "2"\nnight',
+        'counters': {},
+        'gauges': {},
+        'histograms': {},
+    }
+    text = format_prometheus(stats)
+    assert 'wmm_engine_info{mode="polling",profile="C:\\\\Desk \\"2\\"\\nnight"} 1' in text
+    assert all(SAMPLE.match(line) for line in text.splitlines() if not line.startswith("#"))
+
+
+def test_endpoint_serves_metrics_and_stats(engine_runner):
+    engine = running_engine(engine_runner)
+    server = StatsServer(engine.stats, 0)
+    server.start()
+    try:
+        assert server.port != 0
+        with urlopen(server.url + "metrics", timeout=5) as response:
+            assert response.headers['Content-Type'].startswith("text/plain; version=0.0.4")
+            text = response.read().decode('utf-8')
+        with urlopen(server.url + "stats", timeout=5) as response:
+            stats = json.loads(response.read().decode('utf-8'))
+    finally:
+        server.stop()
+
+    assert "# HELP wmm_scans_total Full desktop enumerations" in text
+    assert stats['counters']['scans'] == 1
@@ -0,0 +1,94 @@
+"""Slotted records: equality, hashing, read-only fields and with_monitor()"""
+
+import pytest
+
+from wmm.backend import make_monitor
+from wmm.models import MonitorRect, Rule, SizeMode, WindowInfo
+from wmm.rules import resolve_rule
+
+LEFT = make_monitor(0, 0, 1920, 1080, is_primary=True)
+RIGHT = make_monitor(1920, 0, 3840, 1080)
+
+
+def test_monitors_compare_and_hash_by_value():
+    a, b = MonitorRect.from_dict(LEFT), MonitorRect.from_dict(dict(LEFT))
+    assert a == b and hash(a) == hash(b)
+    assert a != MonitorRect.from_dict(RIGHT)
+    assert a != LEFT  # not equal to its dict form
+    assert len({a, b, MonitorRect.from_dict(RIGHT)}) == 2
+
+
+def test_monitor_identity_is_part_of_equality():
+    plain = MonitorRect(0, 0, 1920, 1080)
+    assert plain != MonitorRect(0, 0, 1920, 1080, device=r"\\.\DISPLAY2")
+    assert plain != MonitorRect(0, 0, 1920, 1080, work=(0, 0, 1920, 1040))
+
+
+def test_monitor_dict_round_trip():
+    data = {'left': 0, 'top': 0, 'right': 1920, 'bottom': 1080, 'is_primary': True,
+            'work': {'left': 0, 'top': 0, 'right': 1920, 'bottom': 1040},
+            'device': r"\\.\DISPLAY1", 'number': 1}
+    monitor = MonitorRect.from_dict(data)
+    assert monitor.as_dict() == data
+    assert MonitorRect.from_dict(monitor.as_dict()) == monitor
+    assert monitor.work_area == (0, 0, 1920, 1040)
+
+
+@pytest.mark.parametrize('data, message', [
+    ({'left': 0, 'top': 0, 'right': 10}, "needs integer"),
+    ({'left': 0, 'top': 0, 'right': 0, 'bottom': 10}, "bounds are empty"),
+    (dict(LEFT, number='two'), "number must be an integer"),
+])
+def test_bad_monitors_are_rejected(data, message):
+    with pytest.raises(ValueError, match=message):
+        MonitorRect.from_dict(data)
+
+
+def test_records_are_read_only():
+    monitor = MonitorRect.from_dict(LEFT)
+    rule = resolve_rule({'process': 'app', 'monitor': LEFT})
+    for record, field in ((monitor, 'left'), (rule, 'process')):
+        with pytest.raises(AttributeError, match="read-only"):
+            setattr(record, field, None)
+        with pytest.raises(AttributeError, match="read-only"):
+            delattr(record, field)
+    assert not hasattr(rule, '__dict__')
+
+
+def test_spellings_of_one_rule_are_equal():
+    a = resolve_rule({'process': 'Chrome.exe', 'monitor': LEFT})
+    b = resolve_rule({'process': 'chrome', 'monitor': LEFT, 'size': 'normal'})
+    assert a == b and hash(a) == hash(b)
+    assert a.key == b.key
+    assert a != resolve_rule({'process': 'chrome', 'monitor': LEFT, 'size': 'maximized'})
+    assert {a: 1}[b] == 1
+
+
+def test_with_monitor_keeps_the_key():
+    rule = resolve_rule({'process': 'app', 'monitor': LEFT, 'size': 'maximized',
+                         'title': 'Inbox', 'priority': 2})
+    right = MonitorRect.from_dict(RIGHT)
+    moved = rule.with_monitor(right)
+
+    assert moved.monitor == right
+    assert moved.key == rule.key
+    assert (moved.process, moved.size, moved.title) == ('app', SizeMode.MAXIMIZED, 'Inbox')
+    assert moved.priority == 2
+    # Same key, different target: not the same rule
+    assert moved != rule
+    assert rule.with_monitor(rule.monitor) == rule
+
+
+def test_rule_key_comes_from_the_config_form():
+    rule = Rule('app', MonitorRect.from_dict(LEFT))
+    assert resolve_rule(rule.as_dict()).key == rule.key
+    assert str(rule.size) == 'normal'
+
+
+def test_window_info_is_mutable_and_compared_by_identity():
+    window = WindowInfo(0x10, 100, 'app', "App.exe", create_time=5.0)
+    assert window.key == (0x10, 100, 5.0)
+    window.title = "Document"
+    assert window.title == "Document"
+    assert window != WindowInfo(0x10, 100, 'app', "App.exe", create_time=5.0)
+    assert not hasattr(window, '__dict__')
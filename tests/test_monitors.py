@@ -0,0 +1,101 @@
+"""MonitorTopology and MonitorMap re-homing on a FakeBackend"""
+
+from wmm.backend import FakeBackend, make_monitor
+from wmm.monitors import MonitorMap, MonitorTopology
+from wmm.rules import RuleSet
+from wmm.trace import VirtualClock
+
+LEFT = make_monitor(0, 0, 1920, 1080, is_primary=True, device=r"\\.\DISPLAY1")
+RIGHT = make_monitor(1920, 0, 3840, 1080, device=r"\\.\DISPLAY2")
+
+
+def topology_for(*monitors):
+    backend = FakeBackend()
+    backend.set_monitors(monitors)
+    return backend, MonitorTopology(backend, clock=VirtualClock())
+
+
+def rules_for(*monitors):
+    return RuleSet([{'process': f"app{i}", 'monitor': dict(m, number=i)}
+                    for i, m in enumerate(monitors, 1)]).rules
+
+
+def test_monitors_numbered_primary_first():
+    _, topology = topology_for(RIGHT, LEFT)
+    assert [m['device'] for m in topology.monitors()] == [LEFT['device'], RIGHT['device']]
+    assert topology.monitor_at(2000, 10)['number'] == 2
+    assert topology.monitor_at(-5, 10) is None
+
+
+def test_unchanged_layout_is_not_enumerated_again():
+    backend, topology = topology_for(LEFT, RIGHT)
+    topology.monitors()
+    assert not topology.check()
+    assert backend.calls['enum_monitors'] == 1
+
+
+def test_primary_swap_is_a_layout_change():
+    backend, topology = topology_for(LEFT, RIGHT)
+    topology.monitors()
+    backend.set_monitors([dict(LEFT, is_primary=False), dict(RIGHT, is_primary=True)])
+    assert topology.check()
+    assert topology.monitors()[0]['device'] == RIGHT['device']
+
+
+def test_same_size_screens_swapping_places_is_a_layout_change():
+    backend, topology = topology_for(LEFT, RIGHT)
+    topology.monitors()
+    backend.set_monitors([dict(LEFT, device=RIGHT['device']), dict(RIGHT, device=LEFT['device'])])
+    assert topology.check()
+
+
+def test_rules_in_place_map_to_themselves():
+    rules = rules_for(LEFT, RIGHT)
+    homes = MonitorMap(rules, [LEFT, RIGHT])
+    assert all(homes.home(rule) is rule for rule in rules)
+    assert homes.moved == [] and homes.missing == []
+
+
+def test_moved_monitor_is_found_by_device():
+    rules = rules_for(LEFT, RIGHT)
+    # The right-hand screen now sits left of the primary
+    moved = make_monitor(-1920, 0, 0, 1080, device=RIGHT['device'])
+    homes = MonitorMap(rules, [LEFT, moved])
+    home = homes.home(rules[1])
+    assert home.monitor.bounds == (-1920, 0, 0, 1080)
+    assert home.key == rules[1].key
+    assert [(rule.key, how) for rule, _, how in homes.moved] == [(rules[1].key, 'device')]
+    assert homes.changed(MonitorMap(rules, [LEFT, RIGHT])) == {rules[1].key}
+
+
+def test_missing_monitor_goes_to_primary():
+    wide = make_monitor(1920, 0, 4480, 1440, device=r"\\.\DISPLAY3")
+    rules = rules_for(LEFT, wide)
+    homes = MonitorMap(rules, [LEFT])
+    assert homes.missing == [rules[1]]
+    assert homes.home(rules[1]).monitor.bounds == (0, 0, 1920, 1080)
+
+    # And back once it is plugged in again
+    assert MonitorMap(rules, [LEFT, wide]).home(rules[1]) is rules[1]
+
+
+def test_only_screen_of_the_same_size_stands_in():
+    rules = rules_for(LEFT, RIGHT)
+    homes = MonitorMap(rules, [LEFT])
+    assert homes.missing == []
+    assert [(rule.key, how) for rule, _, how in homes.moved] == [(rules[1].key, 'order')]
+
+
+def test_guessed_monitor_is_logged(engine_runner):
+    backend = FakeBackend()
+    backend.set_monitors([LEFT])
+    runner = engine_runner(backend, [{'process': 'app', 'monitor': dict(RIGHT, number=2)}])
+    runner.rescan()
+    assert any("guessed from its resolution" in line for line in runner.log)
+
+
+def test_no_monitors_maps_every_rule_to_itself():
+    rules = rules_for(LEFT, RIGHT)
+    homes = MonitorMap(rules, [])
+    assert homes.by_key == {rule.key: rule for rule in rules}
+    assert homes.home(rules[1]) is rules[1]
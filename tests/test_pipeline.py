@@ -0,0 +1,114 @@
+"""MovePipeline ordering, shutdown and errors, with real worker threads"""
+
+import threading
+import time
+
+from wmm.backend import FakeBackend, make_monitor
+from wmm.engine import PlacementEngine
+from wmm.models import MonitorRect
+from wmm.pipeline import MovePipeline
+
+MONITORS = [make_monitor(0, 0, 1920, 1080, is_primary=True), make_monitor(1920, 0, 3840, 1080)]
+TIMEOUT = 5.0
+
+
+def wait_idle(pipeline):
+    while pipeline.in_flight():
+        time.sleep(0.001)
+    return pipeline.drain()
+
+
+def test_moves_for_one_hwnd_run_in_order():
+    pipeline = MovePipeline(max_workers=4)
+    pipeline.start()
+    order = []
+    for n in range(20):
+        pipeline.submit(0x10, order.append, n, tag=n)
+    results = wait_idle(pipeline)
+    pipeline.shutdown()
+
+    assert order == list(range(20))
+    assert [result.tag for result in results] == list(range(20))
+
+
+def test_other_hwnds_are_not_held_up():
+    pipeline = MovePipeline(max_workers=2)
+    pipeline.start()
+    release = threading.Event()
+    pipeline.submit(0x10, release.wait, TIMEOUT)
+    moved = threading.Event()
+    pipeline.submit(0x20, moved.set)
+
+    assert moved.wait(TIMEOUT)
+    assert pipeline.busy(0x10)
+    release.set()
+    wait_idle(pipeline)
+    pipeline.shutdown()
+
+
+def test_shutdown_drops_queued_moves():
+    pipeline = MovePipeline(max_workers=1)
+    pipeline.start()
+    started, release = threading.Event(), threading.Event()
+    ran = []
+
+    def slow():
+        started.set()
+        release.wait(TIMEOUT)
+        ran.append('slow')
+        return True
+
+    pipeline.submit(0x10, slow)
+    pipeline.submit(0x10, ran.append, 'queued')
+    assert started.wait(TIMEOUT)
+    pipeline.shutdown()
+    assert not pipeline.submit(0x10, ran.append, 'late')
+
+    # The running move still finishes; the one behind it never starts
+    release.set()
+    for thread in threading.enumerate():
+        if thread.name.startswith('wmm-move'):
+            thread.join(TIMEOUT)
+    assert ran == ['slow']
+    assert pipeline.in_flight() == 0
+
+
+def test_errors_become_failed_results():
+    pipeline = MovePipeline(max_workers=1)
+    pipeline.start()
+
+    def broken():
+        raise OSError("access denied")
+
+    pipeline.submit(0x10, broken, tag='a')
+    pipeline.submit(0x10, lambda: True, tag='b')
+    results = wait_idle(pipeline)
+    pipeline.shutdown()
+
+    assert [(r.tag, r.ok) for r in results] == [('a', False), ('b', True)]
+    assert isinstance(results[0].error, OSError)
+    assert results[1].error is None
+
+
+def test_last_move_wins_on_a_fake_desktop():
+    # Slow calls make the workers interleave; each window must still end
+    # up where its last queued move sent it
+    backend = FakeBackend(call_latency={'set_window_pos': 0.001, 'get_window_rect': 0.001})
+    backend.set_monitors(MONITORS)
+    backend.add_process(100, "app.exe")
+    hwnds = [backend.add_window(100, f"W{n}") for n in range(8)]
+    engine = PlacementEngine(backend, log=lambda message: None, sleep=lambda seconds: None)
+    left, right = (MonitorRect.from_dict(monitor) for monitor in MONITORS)
+    pipeline = MovePipeline(max_workers=4)
+    pipeline.start()
+
+    for hwnd in hwnds:
+        for monitor in (right, left, right):
+            pipeline.submit(hwnd, engine.move_window, hwnd, monitor, tag=monitor)
+    results = wait_idle(pipeline)
+    pipeline.shutdown()
+
+    assert all(result.ok for result in results)
+    for hwnd in hwnds:
+        assert [r.tag for r in results if r.hwnd == hwnd] == [right, left, right]
+        assert backend.windows[hwnd].rect[0] >= 1920
@@ -0,0 +1,110 @@
+"""ProcessCache hits, PID reuse, TTL and LRU eviction on a fake process table"""
+
+import pytest
+
+from wmm.backend import FakeBackend
+from wmm.process_cache import ProcessCache
+
+
+def cache_for(backend, clock, **kwargs):
+    return ProcessCache(backend, clock=clock, **kwargs)
+
+
+def test_hit_makes_no_backend_call(clock):
+    backend = FakeBackend()
+    backend.add_process(100, "Editor.exe")
+    cache = cache_for(backend, clock)
+
+    info = cache.lookup(100)
+    assert (info.name, info.key) == ("Editor.exe", "editor")
+    backend.reset_calls()
+
+    assert cache.lookup(100) is info
+    assert sum(backend.calls.values()) == 0
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_recycled_pid_is_noticed_when_validated(clock):
+    backend = FakeBackend()
+    backend.add_process(100, "old.exe")
+    cache = cache_for(backend, clock)
+    cache.lookup(100)
+
+    backend.add_process(100, "new.exe")
+    # Until the TTL runs out a plain lookup trusts the entry...
+    assert cache.lookup(100).name == "old.exe"
+    # ...but a PID seen with a new window is checked
+    assert cache.lookup(100, validate=True).name == "new.exe"
+    assert cache.invalidations == 1
+
+
+def test_validated_hit_reads_only_the_create_time(clock):
+    backend = FakeBackend()
+    backend.add_process(100, "app.exe")
+    cache = cache_for(backend, clock)
+    cache.lookup(100)
+    backend.reset_calls()
+
+    cache.lookup(100, validate=True)
+    assert backend.calls['get_process_create_time'] == 1
+    assert backend.calls['get_process_name'] == 0
+    assert cache.hits == 1
+
+
+def test_expired_entry_is_checked_again(clock):
+    backend = FakeBackend()
+    backend.add_process(100, "old.exe")
+    cache = cache_for(backend, clock, ttl=10.0)
+    cache.lookup(100)
+
+    # Same process after the TTL: kept, and good for another TTL
+    clock.now = 11.0
+    cache.lookup(100)
+    assert (cache.hits, cache.misses) == (1, 1)
+
+    backend.add_process(100, "new.exe")
+    clock.now = 20.0
+    assert cache.lookup(100).name == "old.exe"
+    clock.now = 22.0
+    assert cache.lookup(100).name == "new.exe"
+    assert (cache.misses, cache.invalidations) == (2, 1)
+
+
+def test_least_recently_used_entry_is_evicted(clock):
+    backend = FakeBackend()
+    for pid in (1, 2, 3):
+        backend.add_process(pid, "p%d.exe" % pid)
+    cache = cache_for(backend, clock, max_size=2)
+
+    cache.lookup(1)
+    cache.lookup(2)
+    cache.lookup(1)  # 2 is now the oldest
+    cache.lookup(3)
+    assert len(cache) == 2
+    assert cache.evictions == 1
+
+    backend.reset_calls()
+    cache.lookup(1)
+    assert backend.calls['get_process_name'] == 0
+    cache.lookup(2)
+    assert backend.calls['get_process_name'] == 1
+
+
+def test_stats(clock):
+    backend = FakeBackend()
+    backend.add_process(100, "app.exe")
+    cache = cache_for(backend, clock)
+    for _ in range(4):
+        cache.lookup(100)
+
+    stats = cache.stats()
+    assert stats['size'] == 1
+    assert stats['hit_rate'] == pytest.approx(0.75)
+
+
+def test_dead_process_raises_and_is_not_cached(clock):
+    backend = FakeBackend()
+    cache = cache_for(backend, clock)
+    with pytest.raises(ProcessLookupError):
+        cache.lookup(100)
+    assert len(cache) == 0
@@ -0,0 +1,82 @@
+"""ProcessIndex search and ProcessLister on a FakeBackend"""
+
+import queue
+
+from wmm.backend import FakeBackend
+from wmm.process_picker import GRAM, ProcessIndex, ProcessLister
+
+NAMES = ["chrome", "Code", "explorer", "firefox", "OneDrive", "notepad++", "Teams", "msedge"]
+
+
+def test_prefix_matches_come_first():
+    index = ProcessIndex(NAMES + ["codecompanion", "vscode"])
+    assert index.search("code") == ["Code", "codecompanion", "vscode"]
+
+
+def test_long_substring_query():
+    index = ProcessIndex(NAMES)
+    query = "xplore"
+    assert len(query) > GRAM
+    assert index.search(query) == ["explorer"]
+    # Every trigram occurs, but not in this order
+    assert index.search("pad++note") == []
+
+
+def test_queries_shorter_than_a_gram():
+    index = ProcessIndex(NAMES)
+    assert index.search("e") == ["explorer", "chrome", "Code", "firefox", "msedge", "notepad++",
+                                 "OneDrive", "Teams"]
+    assert index.search("fi") == ["firefox"]
+    assert index.search("dg") == ["msedge"]
+    assert index.search("zz") == []
+
+
+def test_search_folds_case_and_keeps_display_names():
+    index = ProcessIndex(NAMES)
+    assert index.search("ONED") == ["OneDrive"]
+    assert index.search("  teaMS ") == ["Teams"]
+    # The same name in another case is not indexed twice
+    assert index.add(["onedrive", "Slack"]) == ["Slack"]
+    assert len(index) == len(NAMES) + 1
+
+
+def test_empty_query_lists_everything_sorted():
+    index = ProcessIndex(["b", "A", "c"])
+    assert index.search() == ["A", "b", "c"]
+
+
+def test_retain_drops_exited_processes():
+    index = ProcessIndex(NAMES)
+    assert sorted(index.retain(["chrome", "CODE", "Teams"])) == sorted(
+        set(NAMES) - {"chrome", "Code", "Teams"})
+
+    assert index.search() == ["chrome", "Code", "Teams"]
+    assert index.search("fire") == []
+    assert index.search("e") == ["chrome", "Code", "Teams"]
+    assert index.retain(["chrome", "Code", "Teams"]) == []
+    # A process that starts again is found again
+    index.add(["firefox"])
+    assert index.search("fox") == ["firefox"]
+
+
+def test_lister_streams_batches_and_caches_the_list(clock):
+    backend = FakeBackend()
+    backend.populate(30, process_count=6)
+    backend.add_process(9000, "Hidden.exe")
+    backend.add_window(9000, "")  # untitled: not listed
+    lister = ProcessLister(backend, max_age=10.0, clock=clock)
+    assert lister.fresh() is None
+
+    batches = queue.Queue()
+    lister.start(batches.put).join()
+    names = []
+    while True:
+        batch = batches.get_nowait()
+        if batch is None:
+            break
+        names.extend(batch)
+
+    assert sorted(names) == sorted(f"proc{n}" for n in range(6))
+    assert lister.fresh() == sorted(names)
+    clock.now = 11.0
+    assert lister.fresh() is None
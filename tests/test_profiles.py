@@ -0,0 +1,106 @@
+"""Layout profiles: parsing, switching on a running engine, persisting"""
+
+import io
+
+import pytest
+
+from wmm.backend import FakeBackend, make_monitor
+from wmm.config import load_profiles, save_config
+from wmm.headless import apply_once
+from wmm.profiles import DEFAULT_PROFILE, ProfileSet, split_profiles
+
+LEFT = make_monitor(0, 0, 1920, 1080, is_primary=True)
+RIGHT = make_monitor(1920, 0, 3840, 1080)
+PROFILES = {
+    'docked': [{'process': 'app', 'monitor': RIGHT}],
+    'laptop': [{'process': 'app', 'monitor': LEFT}],
+}
+
+
+def test_plain_configs_are_the_default_profile():
+    rules = PROFILES['docked']
+    assert split_profiles(rules) == ({DEFAULT_PROFILE: rules}, DEFAULT_PROFILE)
+    assert split_profiles({'rules': rules}) == ({DEFAULT_PROFILE: rules}, DEFAULT_PROFILE)
+    assert split_profiles({'profiles': PROFILES}) == (PROFILES, 'docked')
+    assert split_profiles({'profile': 'laptop', 'profiles': PROFILES}) == (PROFILES, 'laptop')
+
+
+@pytest.mark.parametrize('data, message', [
+    ("docked", "must be a list of rules or an object"),
+    ({'rules': {}}, "rules must be a list"),
+    ({'profiles': {}}, "profiles must be an object"),
+    ({'profiles': {'docked': {}}}, "profile 'docked' must be a list"),
+    ({'profile': 'travel', 'profiles': PROFILES}, "active profile 'travel' is not in profiles"),
+])
+def test_invalid_profiles_are_rejected(data, message):
+    with pytest.raises(ValueError, match=message):
+        split_profiles(data)
+
+
+def desktop():
+    backend = FakeBackend()
+    backend.set_monitors([LEFT, RIGHT])
+    backend.add_process(100, "app.exe")
+    return backend, [backend.add_window(100, f"Doc {n}") for n in range(3)]
+
+
+def test_switching_profiles_replaces_the_windows(engine_runner):
+    backend, hwnds = desktop()
+    runner = engine_runner(backend, None)
+    engine = runner.engine
+    engine.set_profiles(PROFILES, 'docked')
+    runner.rescan()
+    assert all(backend.windows[hwnd].rect[0] >= 1920 for hwnd in hwnds)
+
+    # Already compiled: switching only hands over the profile's RuleSet
+    ruleset = engine.profiles.get('laptop').ruleset
+    assert engine.switch_profile('laptop') is ruleset
+    runner.step()
+    assert engine.ruleset is ruleset and engine.profile == 'laptop'
+    assert all(backend.windows[hwnd].rect[0] < 1920 for hwnd in hwnds)
+    assert engine.stats()['counters']['profile_switches'] == 2
+    assert any(line.startswith("Profile laptop:") for line in runner.log)
+
+
+def test_unknown_profile_is_refused(engine_runner):
+    backend, _hwnds = desktop()
+    runner = engine_runner(backend, None)
+    runner.engine.set_profiles(PROFILES, 'docked')
+    with pytest.raises(ValueError, match="no profile named 'travel'.*docked, laptop"):
+        runner.engine.switch_profile('travel')
+    assert runner.engine.profile == 'docked'
+
+
+def test_with_profile_leaves_the_original_set_alone():
+    profiles = ProfileSet(PROFILES)
+    edited = profiles.with_profile('laptop', PROFILES['docked'])
+    assert profiles.get('laptop').rules is PROFILES['laptop']
+    assert edited.get('laptop').rules is PROFILES['docked']
+    assert edited.get('docked') is profiles.get('docked')
+    assert edited.for_ruleset(profiles.get('laptop').ruleset) is None
+
+
+def test_active_profile_is_saved_and_loaded(tmp_path):
+    path = str(tmp_path / "config.json")
+    save_config(path, PROFILES['laptop'], profiles=PROFILES, active='laptop')
+    profiles, active, _settings = load_profiles(path)
+    assert (profiles, active) == (PROFILES, 'laptop')
+
+    # A lone default profile is saved in the plain form
+    save_config(path, PROFILES['docked'], profiles={DEFAULT_PROFILE: PROFILES['docked']},
+                active=DEFAULT_PROFILE)
+    assert load_profiles(path)[:2] == ({DEFAULT_PROFILE: PROFILES['docked']}, DEFAULT_PROFILE)
+
+
+def test_apply_once_with_a_missing_profile(tmp_path):
+    path = str(tmp_path / "config.json")
+    save_config(path, PROFILES['laptop'], profiles=PROFILES, active='laptop')
+    backend, hwnds = desktop()
+    stream = io.StringIO()
+
+    assert apply_once(path, backend=backend, stream=stream, profile='travel') == 1
+    assert "No profile named 'travel'; the config has docked, laptop" in stream.getvalue()
+    assert backend.calls['set_window_pos'] == backend.calls['defer_window_pos'] == 0
+
+    assert apply_once(path, backend=backend, stream=io.StringIO(), profile='docked') == 0
+    assert all(backend.windows[hwnd].rect[0] >= 1920 for hwnd in hwnds)
@@ -0,0 +1,88 @@
+"""RetryQueue backoff and the engine giving up on windows it can't move"""
+
+from wmm.backend import FakeBackend, make_monitor
+from wmm.retry import RetryQueue
+
+MONITORS = [make_monitor(0, 0, 1920, 1080, is_primary=True), make_monitor(1920, 0, 3840, 1080)]
+
+
+def test_delay_doubles_up_to_the_cap():
+    retries = RetryQueue(base_delay=1.0, factor=2.0, max_delay=5.0)
+    assert [retries.delay(attempts) for attempts in range(1, 6)] == [1.0, 2.0, 4.0, 5.0, 5.0]
+
+
+def test_gives_up_after_max_attempts():
+    retries = RetryQueue(max_attempts=3)
+    assert retries.schedule('a', 2, now=0.0) == 2.0
+    assert retries.schedule('a', 3, now=0.0) is None
+    assert 'a' not in retries
+
+
+def test_pop_due_earliest_first():
+    retries = RetryQueue(base_delay=1.0)
+    retries.schedule('late', 3, now=0.0)
+    retries.schedule('soon', 1, now=0.0)
+    retries.schedule('later', 2, now=1.0)
+    assert retries.next_due() == 1.0
+    assert retries.pop_due(0.5) == []
+    assert retries.pop_due(3.0) == ['soon', 'later']
+    assert retries.pop_due(10.0) == ['late']
+    assert len(retries) == 0 and retries.next_due() is None
+
+
+def test_reschedule_and_discard_replace_the_old_due_time():
+    retries = RetryQueue(base_delay=1.0)
+    retries.schedule('a', 1, now=0.0)
+    retries.schedule('a', 3, now=0.0)
+    assert retries.pop_due(2.0) == []
+    assert retries.pop_due(4.0) == ['a']
+
+    retries.schedule('b', 1, now=0.0)
+    retries.discard('b')
+    assert retries.next_due() is None
+    assert retries.pop_due(10.0) == []
+
+
+class StuckBackend(FakeBackend):
+    """Refuses to move the windows in `stuck`, like elevated windows"""
+
+    def __init__(self):
+        super().__init__()
+        self.stuck = set()
+
+    def set_window_pos(self, hwnd, x, y, w, h, flags):
+        if hwnd in self.stuck:
+            self._enter('set_window_pos')
+            raise OSError("Access is denied")
+        super().set_window_pos(hwnd, x, y, w, h, flags)
+
+
+def test_engine_backs_off_then_gives_up(engine_runner):
+    backend = StuckBackend()
+    backend.set_monitors(MONITORS)
+    backend.add_process(9000, "app.exe")
+    hwnd = backend.add_window(9000, "Elevated")
+    backend.stuck.add(hwnd)
+    runner = engine_runner(backend, [{'process': 'app', 'monitor': MONITORS[1]}])
+    engine = runner.engine
+    engine.retries.configure(max_attempts=3, base_delay=1.0)
+
+    runner.rescan(at=0.0)
+    assert engine.retries.next_due() == 1.0
+    # Not tried again before the backoff has run out, however often it rescans
+    runner.rescan(at=0.5)
+    assert backend.calls['set_window_pos'] == 1
+
+    runner.rescan(at=1.0)
+    assert backend.calls['set_window_pos'] == 2
+    runner.rescan(at=3.0)
+    assert backend.calls['set_window_pos'] == 3
+    assert engine.stats()['gauges']['windows_given_up'] == 1
+
+    runner.rescan(at=100.0)
+    assert backend.calls['set_window_pos'] == 3
+
+    # Apply Layout Now gives it another chance
+    backend.stuck.clear()
+    engine.apply_layout()
+    assert backend.windows[hwnd].rect[0] >= 1920
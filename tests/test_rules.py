@@ -0,0 +1,153 @@
+"""RuleSet and RuleMatcher against a FakeBackend desktop"""
+
+import threading
+
+import pytest
+
+from wmm.backend import FakeBackend, make_monitor
+from wmm.models import SizeMode
+from wmm.rules import RuleSet, resolve_rule
+from wmm.snapshot import DesktopSnapshot
+
+MONITOR = make_monitor(1920, 0, 3840, 1080)
+
+
+def rule(process, **fields):
+    return dict(fields, process=process, monitor=MONITOR)
+
+
+def desktop(*windows):
+    """FakeBackend with one window per (process name, title[, class]), and their hwnds"""
+    backend = FakeBackend()
+    hwnds = []
+    for pid, (name, title, *class_name) in enumerate(windows, start=1000):
+        backend.add_process(pid, name)
+        hwnds.append(backend.add_window(pid, title, class_name=class_name[0] if class_name else "Window"))
+    return backend, hwnds
+
+
+def matched(rules, backend):
+    """{hwnd: process pattern of the rule it matched}"""
+    matcher = RuleSet(rules).matcher
+    return {window.hwnd: rule.process
+            for rule, window in matcher.match(DesktopSnapshot.capture(backend), backend)}
+
+
+def test_resolve_rule_fills_defaults():
+    resolved = resolve_rule({'process': 'Chrome.EXE', 'monitor': MONITOR})
+    assert resolved.process == 'chrome'
+    assert resolved.size is SizeMode.NORMAL
+    assert resolved.priority == 0
+    assert resolved.monitor.bounds == (1920, 0, 3840, 1080)
+    assert resolved.key == resolve_rule({'process': 'chrome', 'monitor': MONITOR}).key
+
+
+@pytest.mark.parametrize('config, message', [
+    ({'monitor': MONITOR}, "no process"),
+    ({'process': 'app'}, "no target monitor"),
+    ({'process': 'app', 'monitor': MONITOR, 'size': 'huge'}, "size must be"),
+    ({'process': 'app', 'monitor': MONITOR, 'priority': 'high'}, "priority must be"),
+    ({'process': 'app', 'monitor': dict(MONITOR, right=1920)}, "empty"),
+])
+def test_resolve_rule_rejects(config, message):
+    with pytest.raises(ValueError, match=message):
+        resolve_rule(config)
+
+
+def test_ruleset_skips_invalid_rules():
+    ruleset = RuleSet([rule('app'), rule('re:('), {'process': 'x'}])
+    assert len(ruleset) == 1
+    assert len(ruleset.errors) == 2
+
+
+def test_exact_glob_and_regex():
+    backend, (chrome, term, code) = desktop(("chrome.exe", "a"), ("WindowsTerminal.exe", "b"),
+                                            ("Code.exe", "c"))
+    assert matched([rule('Chrome.exe'), rule('windows*'), rule('re:^co')], backend) == {
+        chrome: 'chrome', term: 'windows*', code: 're:^co'}
+
+
+def test_priority_then_order():
+    backend, (hwnd,) = desktop(("chrome.exe", "Grafana"))
+    assert matched([rule('ch*'), rule('chrome')], backend) == {hwnd: 'ch*'}
+    assert matched([rule('ch*'), rule('chrome', priority=1)], backend) == {hwnd: 'chrome'}
+
+
+def test_title_and_class():
+    backend, (grafana, mail, dialog) = desktop(("chrome.exe", "Grafana - Home"),
+                                               ("chrome.exe", "Inbox"),
+                                               ("chrome.exe", "Save as", "#32770"))
+    rules = [rule('chrome', title='re:grafana', size='maximized'),
+             rule('chrome', **{'class': '#32770'}, priority=-1)]
+    assert matched(rules, backend) == {grafana: 'chrome', dialog: 'chrome'}
+
+
+def test_title_fetched_only_when_needed():
+    backend, _ = desktop(("chrome.exe", "a"), ("notepad.exe", "b"))
+    backend.reset_calls()
+    matched([rule('notepad')], backend)
+    assert backend.calls['get_window_text'] == 0
+    matched([rule('chrome', title='a*')], backend)
+    assert backend.calls['get_window_text'] == 1
+
+
+def test_regex_backreference():
+    backend, (hwnd,) = desktop(("aab.exe", "x"))
+    assert matched([rule(r're:^(z)q'), rule(r're:^(\w)\1')], backend) == {hwnd: r're:^(\w)\1'}
+
+
+def test_many_patterns_match_like_one_by_one():
+    names = [f"proc{i}.exe" for i in range(30)]
+    backend, hwnds = desktop(*((name, name) for name in names))
+    patterns = ['proc1*', 'proc2?', 're:^proc(3|4)$', 'proc[5-6]', 're:7$']
+    combined = matched([rule(p) for p in patterns], backend)
+    separate = {}
+    for pattern in reversed(patterns):
+        separate.update(matched([rule(pattern)], backend))
+    assert combined == separate
+    assert combined
+
+
+class EditedMidScan(FakeBackend):
+    """Backend whose next enumeration has another thread replace the rules"""
+
+    def __init__(self):
+        super().__init__()
+        self.edit = None
+
+    def enum_windows(self):
+        edit, self.edit = self.edit, None
+        if edit is not None:
+            editor = threading.Thread(target=edit)
+            editor.start()
+            editor.join()
+        return super().enum_windows()
+
+
+def test_rules_reloaded_mid_scan_apply_from_the_next_batch(engine_runner):
+    left, right = make_monitor(0, 0, 1920, 1080, is_primary=True), MONITOR
+    backend = EditedMidScan()
+    backend.set_monitors([left, right])
+    backend.add_process(1000, "app.exe")
+    hwnds = [backend.add_window(1000, f"Doc {n}") for n in range(5)]
+    runner = engine_runner(backend, [{'process': 'app', 'monitor': right}])
+    engine = runner.engine
+    old = engine.ruleset
+    seen = []
+
+    def edit():
+        new = engine.update_rules([{'process': 'app', 'monitor': left}])
+        seen.append((new, engine.ruleset))
+
+    backend.edit = edit
+    runner.rescan()
+
+    # The editor got its RuleSet back, but the batch it interrupted kept
+    # using the old one for every window
+    (new, during), = seen
+    assert during is old and new is not old
+    assert all(backend.windows[hwnd].rect[0] >= 1920 for hwnd in hwnds)
+    # Swapped in once the batch was over; the next one places by it
+    assert engine.ruleset is new
+    runner.rescan(at=1.0)
+    assert all(backend.windows[hwnd].rect[0] < 1920 for hwnd in hwnds)
@@ -0,0 +1,74 @@
+"""AdaptivePollScheduler backoff, cap and snap-back on a fake clock"""
+
+import pytest
+
+from wmm.scheduler import (REASON_CHANGED, REASON_IDLE, REASON_NEW_PIDS, REASON_NEW_WINDOWS,
+                           REASON_START, AdaptivePollScheduler)
+
+
+def scheduler(clock, **kwargs):
+    kwargs.setdefault('min_interval', 0.1)
+    kwargs.setdefault('max_interval', 5.0)
+    kwargs.setdefault('initial_interval', 0.5)
+    return AdaptivePollScheduler(clock=clock, **kwargs)
+
+
+def test_first_snapshot_keeps_the_initial_interval(clock):
+    poll = scheduler(clock)
+    assert poll.observe({1, 2}, set()) == 0.5
+    assert poll.reason == REASON_START
+
+
+def test_idle_desktop_backs_off_up_to_the_cap(clock):
+    poll = scheduler(clock)
+    intervals = [poll.observe({1, 2}, {10}) for _ in range(8)]
+    assert intervals == [0.5, 1.0, 2.0, 4.0, 5.0, 5.0, 5.0, 5.0]
+    assert poll.reason == REASON_IDLE
+    # Only actual interval changes are counted
+    assert poll.changes == 4
+
+
+def test_new_window_snaps_back_to_the_fast_interval(clock):
+    poll = scheduler(clock)
+    for _ in range(5):
+        poll.observe({1, 2}, set())
+    assert poll.interval == 5.0
+
+    clock.now = 30.0
+    assert poll.observe({1, 2, 3}, set()) == 0.1
+    assert poll.reason == REASON_NEW_WINDOWS
+    assert poll.history[-1] == (30.0, 0.1, REASON_NEW_WINDOWS)
+
+
+def test_new_watched_pid_snaps_back(clock):
+    poll = scheduler(clock)
+    for _ in range(3):
+        poll.observe({1, 2}, {10})
+    assert poll.observe({1, 2}, {10, 11}) == 0.1
+    assert poll.reason == REASON_NEW_PIDS
+
+
+def test_closed_windows_hold_the_interval(clock):
+    poll = scheduler(clock)
+    poll.observe({1, 2, 3}, set())
+    poll.observe({1, 2, 3}, set())
+    assert poll.observe({1, 2}, set()) == 1.0
+    assert poll.reason == REASON_CHANGED
+
+
+def test_set_bounds_clamps_the_interval(clock):
+    poll = scheduler(clock)
+    for _ in range(5):
+        poll.observe({1}, set())
+    poll.set_bounds(0.2, 2.0)
+    assert poll.interval == 2.0
+    with pytest.raises(ValueError):
+        poll.set_bounds(1.0, 0.5)
+
+
+def test_stats_report_reason_and_changes(clock):
+    poll = scheduler(clock)
+    poll.observe({1}, set())
+    poll.observe({1}, set())
+    stats = poll.stats()
+    assert (stats['interval'], stats['reason'], stats['changes']) == (1.0, REASON_IDLE, 1)
@@ -0,0 +1,149 @@
+"""DeltaScanner against DesktopSnapshot.capture on a FakeBackend"""
+
+from wmm.backend import FakeBackend, FakeWindow, make_monitor
+from wmm.process_cache import ProcessCache
+from wmm.snapshot import DeltaScanner, DesktopSnapshot
+
+MONITORS = [make_monitor(0, 0, 1920, 1080, is_primary=True), make_monitor(1920, 0, 3840, 1080)]
+
+
+def scanner_for(backend, clock):
+    return DeltaScanner(backend, ProcessCache(backend, clock=clock), clock=clock)
+
+
+def hwnds(snapshot):
+    return sorted(window.hwnd for window in snapshot.windows)
+
+
+def test_scan_matches_capture(clock):
+    backend = FakeBackend()
+    backend.populate(50, process_count=5)
+    backend.add_window(1000, "Hidden", visible=False)
+    backend.add_window(1000, "Dialog", parent=0x10000)
+    scanner = scanner_for(backend, clock)
+
+    assert hwnds(scanner.scan()) == hwnds(DesktopSnapshot.capture(backend))
+
+
+def test_steady_state_scan_makes_one_call(clock):
+    backend = FakeBackend()
+    backend.populate(50, process_count=5)
+    scanner = scanner_for(backend, clock)
+    scanner.scan()
+
+    clock.now = 1.0
+    snapshot = scanner.scan()
+    assert scanner.last_calls == 1
+    assert len(snapshot.windows) == 50
+
+
+def test_new_and_closed_windows(clock):
+    backend = FakeBackend()
+    backend.populate(10, process_count=2)
+    scanner = scanner_for(backend, clock)
+    first = scanner.scan()
+
+    closed = first.windows[0].hwnd
+    backend.close_window(closed)
+    added = backend.add_window(1001, "New")
+    clock.now = 0.5
+    snapshot = scanner.scan()
+    assert closed not in hwnds(snapshot)
+    assert added in hwnds(snapshot)
+    assert scanner.last_new == 1
+
+
+def test_window_shown_after_creation(clock):
+    backend = FakeBackend()
+    backend.add_process(1000, "app.exe")
+    hwnd = backend.add_window(1000, "Splash", visible=False)
+    scanner = scanner_for(backend, clock)
+    assert scanner.scan().windows == []
+
+    backend.windows[hwnd].visible = True
+    clock.now = 0.5
+    assert hwnds(scanner.scan()) == [hwnd]
+
+
+def test_forgotten_hwnd_is_inspected_again(clock):
+    backend = FakeBackend()
+    backend.add_process(1000, "app.exe")
+    hwnd = backend.add_window(1000, "Editor")
+    scanner = scanner_for(backend, clock)
+    scanner.scan()
+
+    scanner.forget(hwnd)
+    clock.now = 0.5
+    assert hwnds(scanner.scan()) == [hwnd]
+    assert scanner.last_new == 1
+
+
+def test_reused_hwnd_gets_a_new_record_on_refresh(clock):
+    backend = FakeBackend()
+    backend.add_process(1000, "old.exe")
+    backend.add_process(2000, "new.exe")
+    hwnd = backend.add_window(1000, "Old")
+    scanner = scanner_for(backend, clock)
+    old = scanner.scan().windows[0]
+
+    # Closed and its handle reused, with no event in between
+    backend.close_window(hwnd)
+    backend.windows[hwnd] = FakeWindow(hwnd, 2000, "New")
+    clock.now = scanner.refresh_interval
+    window = scanner.scan().windows[0]
+    assert window.hwnd == hwnd
+    assert window.process == "new"
+    assert window.key != old.key
+
+
+def test_owned_window_is_checked_again_on_refresh(clock):
+    backend = FakeBackend()
+    backend.add_process(1000, "app.exe")
+    main = backend.add_window(1000, "Main")
+    dialog = backend.add_window(1000, "Find", parent=main)
+    scanner = scanner_for(backend, clock)
+    assert hwnds(scanner.scan()) == [main]
+
+    # The owner lets go, with no event; left alone until the next refresh
+    backend.windows[dialog].parent = 0
+    clock.now = 0.5
+    assert hwnds(scanner.scan()) == [main]
+    assert scanner.last_calls == 1
+    clock.now = scanner.refresh_interval
+    assert hwnds(scanner.scan()) == [main, dialog]
+
+
+def test_owned_hwnd_reused_by_a_top_level_window(clock):
+    backend = FakeBackend()
+    backend.add_process(1000, "app.exe")
+    backend.add_process(2000, "new.exe")
+    main = backend.add_window(1000, "Main")
+    dialog = backend.add_window(1000, "Find", parent=main)
+    scanner = scanner_for(backend, clock)
+    scanner.scan()
+
+    backend.close_window(dialog)
+    backend.windows[dialog] = FakeWindow(dialog, 2000, "New")
+    clock.now = scanner.refresh_interval
+    window = {window.hwnd: window for window in scanner.scan().windows}[dialog]
+    assert window.process == "new"
+
+
+def test_reused_hwnd_is_placed_when_polling(engine_runner):
+    backend = FakeBackend()
+    backend.set_monitors(MONITORS)
+    backend.add_process(1000, "app.exe")
+    backend.add_process(2000, "other.exe")
+    hwnd = backend.add_window(1000, "First")
+    runner = engine_runner(backend, [{'process': 'app', 'monitor': MONITORS[1]},
+                                     {'process': 'other', 'monitor': MONITORS[1]}])
+    runner.rescan()
+    assert backend.windows[hwnd].rect[0] >= 1920
+
+    # No event: the polling rescans have to notice the new owner
+    backend.close_window(hwnd)
+    backend.windows[hwnd] = FakeWindow(hwnd, 2000, "Second")
+    for now in (1.0, 2.0, 3.0):
+        runner.rescan(at=now)
+    assert backend.windows[hwnd].rect[0] >= 1920
+    assert runner.engine.tracker.reused == 1
@@ -0,0 +1,72 @@
+"""Recording a session with TraceRecorder and replaying it"""
+
+from wmm.backend import FakeBackend, make_monitor
+from wmm.trace import TraceRecorder, read_trace, replay
+
+# Taskbar on the left of the primary: restored rects are recorded from
+# workspace coordinates, offset from the screen by 100 px
+LEFT = make_monitor(0, 0, 1920, 1080, is_primary=True,
+                    work={'left': 100, 'top': 0, 'right': 1920, 'bottom': 1080})
+RIGHT = make_monitor(1920, 0, 3840, 1080)
+
+
+class ProtectedBackend(FakeBackend):
+    """FakeBackend whose `protected` processes' paths can't be read"""
+
+    def __init__(self):
+        super().__init__()
+        self.protected = set()
+
+    def get_process_path(self, pid):
+        if pid in self.protected:
+            raise PermissionError(pid)
+        return super().get_process_path(pid)
+
+
+def record_session(engine_runner, path):
+    backend = ProtectedBackend()
+    backend.set_monitors([LEFT, RIGHT])
+    for pid, name in ((100, "editor.exe"), (200, "antivirus.exe")):
+        backend.add_process(pid, name)
+    backend.protected.add(200)
+    hwnds = {
+        'editor': backend.add_window(100, "Editor", rect=(200, 100, 1000, 700)),
+        'scanner': backend.add_window(200, "Scanner", rect=(200, 100, 1000, 700)),
+        # Already in place, 80 px inside the right-hand monitor
+        'docs': backend.add_window(100, "Docs", rect=(2000, 100, 2800, 700)),
+    }
+
+    runner = engine_runner(backend, [{'process': '*', 'path': "C:\\Program Files\\*",
+                                      'monitor': RIGHT}])
+    recorder = TraceRecorder(path, backend, clock=runner.clock)
+    recorder.attach(runner.engine)
+    runner.rescan()
+    hwnds['second'] = backend.add_window(100, "Second editor", rect=(300, 200, 1100, 800))
+    runner.rescan(at=2.0)
+    recorder.close()
+    return backend, hwnds
+
+
+def test_replay_makes_the_recorded_decisions(engine_runner, tmp_path):
+    path = str(tmp_path / "session.trace")
+    recorded, hwnds = record_session(engine_runner, path)
+
+    report = replay(path)
+
+    assert [decision for _, _, decision in report.recorded] == [
+        decision for _, _, decision in report.decisions]
+    assert [decision[0] for _, _, decision in report.decisions] == [
+        hwnds['editor'], hwnds['docs'], hwnds['second']]
+    assert report.differences() == []
+    # Docs was left where it was both times: the replay saw the same rects
+    assert report.api_calls['set_window_pos'] == recorded.calls['set_window_pos'] == 2
+
+
+def test_unreadable_path_is_recorded_and_replayed_as_none(engine_runner, tmp_path):
+    path = str(tmp_path / "session.trace")
+    _backend, hwnds = record_session(engine_runner, path)
+
+    paths = {record['pid']: record['path'] for record in read_trace(path) if record['k'] == 'proc'}
+    assert paths == {100: "C:\\Program Files\\editor.exe", 200: None}
+    # The scanner's path rule can't match in the replay either
+    assert hwnds['scanner'] not in {decision[0] for _, _, decision in replay(path).decisions}
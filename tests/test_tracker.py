@@ -0,0 +1,76 @@
+"""WindowTracker keys and eviction, and what the engine does with them"""
+
+from wmm.backend import FakeBackend, make_monitor
+from wmm.models import WindowInfo
+from wmm.tracker import WindowTracker
+
+MONITORS = [make_monitor(0, 0, 1920, 1080, is_primary=True), make_monitor(1920, 0, 3840, 1080)]
+
+
+def window(hwnd, pid, process="app", create_time=None):
+    return WindowInfo(hwnd, pid, process, f"{process}.exe", create_time)
+
+
+def test_recycled_hwnd_is_a_new_window(clock):
+    tracker = WindowTracker(clock)
+    first = tracker.observe(window(0x10, 100, create_time=1.0))
+    tracker.record(first.key, True, "rule")
+    assert tracker.observe(window(0x10, 100, create_time=1.0)).placed
+
+    second = tracker.observe(window(0x10, 200, "other", create_time=2.0))
+    assert not second.placed
+    assert len(tracker) == 1
+    assert tracker.reused == 1
+
+
+def test_recycled_pid_is_a_new_window(clock):
+    tracker = WindowTracker(clock)
+    first = tracker.observe(window(0x10, 100, create_time=1.0))
+    tracker.record(first.key, True, "rule")
+    assert not tracker.observe(window(0x10, 100, create_time=5.0)).placed
+
+
+def test_full_scan_evicts_unseen_windows(clock):
+    tracker = WindowTracker(clock)
+    tracker.begin_scan()
+    kept = tracker.observe(window(0x10, 100))
+    tracker.observe(window(0x20, 100))
+    tracker.end_scan()
+
+    tracker.begin_scan()
+    tracker.observe(window(0x10, 100))
+    assert tracker.end_scan() == 1
+    assert list(tracker) == [kept]
+
+
+def test_placed_window_is_left_alone(engine_runner):
+    backend = FakeBackend()
+    backend.set_monitors(MONITORS)
+    backend.add_process(9000, "app.exe")
+    hwnd = backend.add_window(9000, "Editor")
+    runner = engine_runner(backend, [{'process': 'app', 'monitor': MONITORS[1]}])
+    runner.rescan()
+    assert backend.windows[hwnd].rect[0] >= 1920
+
+    # The user drags it back; it was placed once, so it stays
+    backend.windows[hwnd].rect = (0, 0, 800, 600)
+    runner.rescan(at=10.0)
+    assert backend.windows[hwnd].rect == (0, 0, 800, 600)
+
+
+def test_window_of_restarted_process_is_placed(engine_runner):
+    backend = FakeBackend()
+    backend.set_monitors(MONITORS)
+    backend.add_process(9000, "app.exe")
+    hwnd = backend.add_window(9000, "Editor")
+    runner = engine_runner(backend, [{'process': 'app', 'monitor': MONITORS[1]}])
+    runner.rescan()
+
+    # Same hwnd and PID, but a new process behind them; noticed once the
+    # cached process entry is due to be checked again
+    backend.add_process(9000, "app.exe")
+    backend.windows[hwnd].rect = (0, 0, 800, 600)
+    runner.rescan(at=10.0)
+    assert backend.windows[hwnd].rect[0] < 1920
+    runner.rescan(at=400.0)
+    assert backend.windows[hwnd].rect[0] >= 1920
@@ -0,0 +1,5 @@
+"""Placement engine for Window Monitor Mover
+
+Everything in this package is importable without pywin32 so the engine can be
+exercised against a fake desktop on any platform.
+"""
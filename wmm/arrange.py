@@ -0,0 +1,70 @@
+"""Per-monitor placement solver
+
+Without an `arrange` setting a rule drops every window at the top-left of
+its monitor plus 50 px, so ten windows of one app end up exactly on top of
+each other. A rule can instead ask for its windows to be arranged:
+
+    "cascade"   each window 32 px down and right of the previous one,
+                keeping its size; wraps before running off the work area
+    "grid"      tiled in a near-square grid of equal cells
+    "columns"   side by side in equal full-height columns
+
+Windows going to the same monitor with the same mode share one arrangement,
+whichever rule sent them. Positions are computed in the monitor's work area
+(rcWork: the monitor minus the taskbar and docked toolbars), for all slots
+of an arrangement at once, so the cost per window is a little arithmetic
+rather than another look at the desktop.
+"""
+
+import math
+
+ARRANGE_MODES = ('cascade', 'grid', 'columns')
+
+OFFSET = 50        # distance from the work area's top-left corner
+CASCADE_STEP = 32  # about one title bar
+
+
+def group_key(rule):
+    """Arrangement a rule's windows belong to, or None if the rule does not arrange"""
+    mode = rule.arrange
+    if mode is None:
+        return None
+    return (rule.monitor.work_area, mode)
+
+
+def default_position(monitor):
+    """Where an un-arranged window goes on a MonitorRect: top-left of the work area plus OFFSET"""
+    left, top = monitor.work_area[:2]
+    return left + OFFSET, top + OFFSET
+
+
+def slot_rects(work, mode, count):
+    """(x, y, w, h) for slots 0..count-1 of an arrangement in `work`
+
+    Cascade slots keep the window's size, so their w and h are None.
+    """
+    left, top, right, bottom = work
+    width = right - left
+    height = bottom - top
+    if count <= 0:
+        return []
+
+    if mode == 'cascade':
+        # Wrap once the cascade has used half the work area
+        steps = max(1, min(width, height) // 2 // CASCADE_STEP)
+        return [(left + OFFSET + (i % steps) * CASCADE_STEP,
+                 top + OFFSET + (i % steps) * CASCADE_STEP, None, None)
+                for i in range(count)]
+
+    if mode == 'grid':
+        columns = math.ceil(math.sqrt(count))
+        rows = math.ceil(count / columns)
+    elif mode == 'columns':
+        columns, rows = count, 1
+    else:
+        raise ValueError(f"unknown arrange mode {mode!r}")
+
+    cell_w = width // columns
+    cell_h = height // rows
+    return [(left + (i % columns) * cell_w, top + (i // columns) * cell_h, cell_w, cell_h)
+            for i in range(count)]
@@ -0,0 +1,394 @@
+"""Window-system backends
+
+The engine never talks to win32gui/win32process/psutil directly. It goes
+through a backend object so the real desktop can be swapped for an in-memory
+fake when measuring or debugging the placement logic off Windows.
+"""
+
+import ctypes
+import threading
+import time
+from collections import Counter
+from ctypes import wintypes
+
+# win32con values used by the engine, duplicated here so the fake backend
+# works without pywin32 installed
+SW_SHOWNORMAL = 1
+SW_SHOWMINIMIZED = 2
+SW_SHOWMAXIMIZED = 3
+SW_MAXIMIZE = 3
+SW_MINIMIZE = 6
+SW_RESTORE = 9
+
+SWP_NOZORDER = 0x0004
+SWP_NOACTIVATE = 0x0010
+SWP_SHOWWINDOW = 0x0040
+
+
+MONITORINFOF_PRIMARY = 1
+
+
+class MONITORINFOEXW(ctypes.Structure):
+    _fields_ = [
+        ("cbSize", wintypes.DWORD),
+        ("rcMonitor", wintypes.RECT),
+        ("rcWork", wintypes.RECT),
+        ("dwFlags", wintypes.DWORD),
+        ("szDevice", wintypes.WCHAR * 32)
+    ]
+
+
+def make_monitor(left, top, right, bottom, is_primary=False, work=None, device=""):
+    """Monitor record as stored in rules; `work` is the work-area rect dict"""
+    return {
+        'left': left,
+        'top': top,
+        'right': right,
+        'bottom': bottom,
+        'is_primary': is_primary,
+        'work': work or {'left': left, 'top': top, 'right': right, 'bottom': bottom},
+        'device': device,
+    }
+
+
+def monitor_fingerprint(monitors):
+    """Hashable summary of monitor records, for display_fingerprint()"""
+    return tuple((m['left'], m['top'], m['right'], m['bottom'], m['is_primary'],
+                  tuple((m.get('work') or m)[name] for name in ('left', 'top', 'right', 'bottom')),
+                  m.get('device'))
+                 for m in monitors)
+
+
+def workspace_origin(monitors):
+    """Screen position of workspace (0, 0): the primary monitor's work area corner
+
+    GetWindowPlacement reports a top-level window's restored rect in
+    workspace coordinates, which a taskbar docked at the top or left of the
+    primary monitor shifts away from screen coordinates.
+    """
+    for monitor in monitors:
+        if monitor['is_primary']:
+            work = monitor.get('work') or monitor
+            return work['left'], work['top']
+    return 0, 0
+
+
+def normalize_process_name(name):
+    """Lower-case a process name and strip the .exe suffix"""
+    name = name.lower()
+    if name.endswith('.exe'):
+        name = name[:-4]
+    return name
+
+
+class Win32Backend:
+    """Backend that talks to the real Windows desktop"""
+
+    def __init__(self):
+        # Imported here so the package stays importable on other platforms
+        import win32gui
+        import win32process
+        import psutil
+
+        self._win32gui = win32gui
+        self._win32process = win32process
+        self._psutil = psutil
+
+    def enum_windows(self):
+        """Return every top-level hwnd in z-order"""
+        hwnds = []
+        self._win32gui.EnumWindows(lambda hwnd, _: hwnds.append(hwnd) or True, None)
+        return hwnds
+
+    def is_window_visible(self, hwnd):
+        return bool(self._win32gui.IsWindowVisible(hwnd))
+
+    def get_window_pid(self, hwnd):
+        _, pid = self._win32process.GetWindowThreadProcessId(hwnd)
+        return pid
+
+    def get_parent(self, hwnd):
+        return self._win32gui.GetParent(hwnd)
+
+    def get_window_text(self, hwnd):
+        return self._win32gui.GetWindowText(hwnd)
+
+    def get_class_name(self, hwnd):
+        return self._win32gui.GetClassName(hwnd)
+
+    def get_process_name(self, pid):
+        return self._psutil.Process(pid).name()
+
+    def get_process_path(self, pid):
+        return self._psutil.Process(pid).exe()
+
+    def get_process_create_time(self, pid):
+        try:
+            return self._psutil.Process(pid).create_time()
+        except self._psutil.AccessDenied:
+            # Protected processes; fall back to PID-only identity
+            return None
+
+    def get_window_placement(self, hwnd):
+        return self._win32gui.GetWindowPlacement(hwnd)
+
+    def get_window_rect(self, hwnd):
+        return self._win32gui.GetWindowRect(hwnd)
+
+    def show_window(self, hwnd, cmd):
+        self._win32gui.ShowWindow(hwnd, cmd)
+
+    def set_window_pos(self, hwnd, x, y, w, h, flags):
+        self._win32gui.SetWindowPos(hwnd, 0, x, y, w, h, flags)
+
+    def defer_window_pos(self, moves):
+        """Move several windows in one DeferWindowPos transaction
+
+        `moves` is a list of (hwnd, x, y, w, h, flags). Windows repaint once,
+        together, instead of once per window. Raises OSError if any window
+        can't be deferred, in which case none of them has moved.
+        """
+        user32 = ctypes.windll.user32
+        user32.BeginDeferWindowPos.restype = wintypes.HANDLE
+        user32.DeferWindowPos.restype = wintypes.HANDLE
+        user32.DeferWindowPos.argtypes = [wintypes.HANDLE, wintypes.HWND, wintypes.HWND,
+                                          ctypes.c_int, ctypes.c_int, ctypes.c_int, ctypes.c_int,
+                                          wintypes.UINT]
+        user32.EndDeferWindowPos.argtypes = [wintypes.HANDLE]
+
+        hdwp = user32.BeginDeferWindowPos(len(moves))
+        if not hdwp:
+            raise ctypes.WinError()
+        for hwnd, x, y, w, h, flags in moves:
+            hdwp = user32.DeferWindowPos(hdwp, hwnd, None, x, y, w, h, flags)
+            if not hdwp:
+                # The system has already freed the batch
+                raise ctypes.WinError()
+        if not user32.EndDeferWindowPos(hdwp):
+            raise ctypes.WinError()
+
+    def enum_monitors(self):
+        """Return monitor records in EnumDisplayMonitors order"""
+        user32 = ctypes.windll.user32
+        user32.GetMonitorInfoW.argtypes = [wintypes.HMONITOR, ctypes.POINTER(MONITORINFOEXW)]
+        monitors = []
+
+        MonitorEnumProc = ctypes.WINFUNCTYPE(
+            wintypes.BOOL,
+            wintypes.HMONITOR,
+            wintypes.HDC,
+            ctypes.POINTER(wintypes.RECT),
+            wintypes.LPARAM
+        )
+
+        def callback(hMonitor, hdcMonitor, lprcMonitor, dwData):
+            info = MONITORINFOEXW()
+            info.cbSize = ctypes.sizeof(MONITORINFOEXW)
+
+            if user32.GetMonitorInfoW(hMonitor, ctypes.byref(info)):
+                rect = info.rcMonitor
+                work = info.rcWork
+                monitors.append(make_monitor(
+                    rect.left, rect.top, rect.right, rect.bottom,
+                    is_primary=bool(info.dwFlags & MONITORINFOF_PRIMARY),
+                    work={'left': work.left, 'top': work.top,
+                          'right': work.right, 'bottom': work.bottom},
+                    device=info.szDevice))
+            return 1
+
+        user32.EnumDisplayMonitors(None, None, MonitorEnumProc(callback), 0)
+        return monitors
+
+    def display_fingerprint(self):
+        """Cheap value that changes whenever the display layout does
+
+        Every monitor's bounds, work area, primary flag and device name: the
+        monitor count and virtual-screen rect stay the same when the primary
+        moves to another screen or two screens of one size trade places.
+        """
+        return monitor_fingerprint(self.enum_monitors())
+
+
+class FakeWindow:
+    """A window on the fake desktop"""
+
+    def __init__(self, hwnd, pid, title="", rect=(0, 0, 800, 600),
+                 visible=True, parent=0, show_cmd=SW_SHOWNORMAL, class_name="Window"):
+        self.hwnd = hwnd
+        self.pid = pid
+        self.title = title
+        self.class_name = class_name
+        self.rect = rect
+        self.visible = visible
+        self.parent = parent
+        self.show_cmd = show_cmd
+
+
+class FakeBackend:
+    """In-memory desktop that counts every API call made against it
+
+    `calls` is a Counter keyed by method name, so a caller can assert how many
+    enumerations or process lookups a tick actually cost. `call_latency` maps
+    method names to seconds each call should block for, and when `call_log`
+    is a list every call is appended to it as (name, start, end, thread name).
+    """
+
+    def __init__(self, call_latency=None, record_calls=False):
+        self.windows = {}
+        self.processes = {}  # pid -> (name, create_time, path)
+        self.monitors = [make_monitor(0, 0, 1920, 1080, is_primary=True, device=r"\\.\DISPLAY1")]
+        self.calls = Counter()
+        self.call_latency = dict(call_latency or {})
+        self.call_log = [] if record_calls else None
+        self._calls_lock = threading.Lock()
+        self.fail_deferred = False  # make defer_window_pos fail, to exercise fallbacks
+        self._next_hwnd = 0x10000
+        self._next_create_time = 1.0
+
+    def add_process(self, pid, name, create_time=None, path=None):
+        """Start a process; reusing a PID simulates the OS recycling it"""
+        if create_time is None:
+            create_time = self._next_create_time
+            self._next_create_time += 1.0
+        if path is None:
+            path = f"C:\\Program Files\\{name}"
+        self.processes[pid] = (name, create_time, path)
+
+    def kill_process(self, pid):
+        """End a process and close its windows"""
+        self.processes.pop(pid, None)
+        for hwnd in [h for h, w in self.windows.items() if w.pid == pid]:
+            del self.windows[hwnd]
+
+    def add_window(self, pid, title="", **kwargs):
+        """Create a window owned by `pid` and return its hwnd"""
+        hwnd = self._next_hwnd
+        self._next_hwnd += 4
+        self.windows[hwnd] = FakeWindow(hwnd, pid, title, **kwargs)
+        return hwnd
+
+    def close_window(self, hwnd):
+        self.windows.pop(hwnd, None)
+
+    def populate(self, window_count, process_count, prefix="proc"):
+        """Fill the desktop with `window_count` windows spread over `process_count` processes"""
+        for i in range(process_count):
+            self.add_process(1000 + i, f"{prefix}{i}.exe")
+        for i in range(window_count):
+            pid = 1000 + (i % process_count)
+            self.add_window(pid, f"Window {i}")
+
+    def set_monitors(self, monitors):
+        """Replace the display layout, like plugging or unplugging a screen"""
+        self.monitors = list(monitors)
+
+    def reset_calls(self):
+        with self._calls_lock:
+            self.calls.clear()
+            if self.call_log is not None:
+                self.call_log.clear()
+
+    def _enter(self, name):
+        start = time.perf_counter()
+        delay = self.call_latency.get(name)
+        if delay:
+            time.sleep(delay)
+        with self._calls_lock:
+            self.calls[name] += 1
+            if self.call_log is not None:
+                self.call_log.append((name, start, time.perf_counter(),
+                                      threading.current_thread().name))
+
+    def _window(self, hwnd):
+        try:
+            return self.windows[hwnd]
+        except KeyError:
+            raise OSError(f"Invalid window handle {hwnd:#x}") from None
+
+    def enum_windows(self):
+        self._enter('enum_windows')
+        return list(self.windows)
+
+    def is_window_visible(self, hwnd):
+        self._enter('is_window_visible')
+        window = self.windows.get(hwnd)
+        return bool(window and window.visible)
+
+    def get_window_pid(self, hwnd):
+        self._enter('get_window_pid')
+        return self._window(hwnd).pid
+
+    def get_parent(self, hwnd):
+        self._enter('get_parent')
+        return self._window(hwnd).parent
+
+    def get_window_text(self, hwnd):
+        self._enter('get_window_text')
+        return self._window(hwnd).title
+
+    def _process(self, pid):
+        try:
+            return self.processes[pid]
+        except KeyError:
+            raise ProcessLookupError(pid) from None
+
+    def get_class_name(self, hwnd):
+        self._enter('get_class_name')
+        return self._window(hwnd).class_name
+
+    def get_process_name(self, pid):
+        self._enter('get_process_name')
+        return self._process(pid)[0]
+
+    def get_process_path(self, pid):
+        self._enter('get_process_path')
+        return self._process(pid)[2]
+
+    def get_process_create_time(self, pid):
+        self._enter('get_process_create_time')
+        return self._process(pid)[1]
+
+    def get_window_placement(self, hwnd):
+        self._enter('get_window_placement')
+        window = self._window(hwnd)
+        # The restored rect, in workspace coordinates as Windows reports it
+        dx, dy = workspace_origin(self.monitors)
+        left, top, right, bottom = window.rect
+        return (0, window.show_cmd, (-1, -1), (-1, -1), (left - dx, top - dy, right - dx, bottom - dy))
+
+    def get_window_rect(self, hwnd):
+        self._enter('get_window_rect')
+        return self._window(hwnd).rect
+
+    def show_window(self, hwnd, cmd):
+        self._enter('show_window')
+        window = self._window(hwnd)
+        if cmd == SW_RESTORE:
+            cmd = SW_SHOWNORMAL
+        window.show_cmd = cmd
+
+    def set_window_pos(self, hwnd, x, y, w, h, flags):
+        self._enter('set_window_pos')
+        window = self._window(hwnd)
+        window.rect = (x, y, x + w, y + h)
+        if flags & SWP_SHOWWINDOW:
+            window.visible = True
+
+    def defer_window_pos(self, moves):
+        self._enter('defer_window_pos')
+        if self.fail_deferred:
+            raise OSError("DeferWindowPos failed")
+        # All or nothing, like the real batch
+        windows = [self._window(hwnd) for hwnd, *_ in moves]
+        for window, (_, x, y, w, h, flags) in zip(windows, moves):
+            window.rect = (x, y, x + w, y + h)
+            if flags & SWP_SHOWWINDOW:
+                window.visible = True
+
+    def enum_monitors(self):
+        self._enter('enum_monitors')
+        return [dict(m) for m in self.monitors]
+
+    def display_fingerprint(self):
+        self._enter('display_fingerprint')
+        return monitor_fingerprint(self.monitors)
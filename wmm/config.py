@@ -0,0 +1,208 @@
+"""Config file loading and saving
+
+The config used to be a bare JSON list of rules. That form is still read and
+is still what gets written when no settings are set; otherwise the file is
+an object:
+
+    {"settings": {"poll_min_interval": 0.1, "poll_max_interval": 5.0},
+     "rules": [...]}
+
+or, with named layout profiles (see profiles.py), "profile" and "profiles"
+in place of "rules".
+
+Saves go through a temp file and os.replace, so a crash or power loss
+mid-write leaves either the old file or the new one, never a truncated one.
+ConfigWatcher picks up changes made by other tools (or pushed by config
+management) without a restart.
+"""
+
+import hashlib
+import json
+import os
+import stat
+import tempfile
+import time
+
+from .profiles import DEFAULT_PROFILE, split_profiles
+
+DEFAULT_SETTINGS = {
+    # Adaptive polling bounds, in seconds
+    'poll_min_interval': 0.1,
+    'poll_max_interval': 5.0,
+    # Optional JSON-lines activity log, rotated by size
+    'log_file': None,
+    'log_max_bytes': 1024 * 1024,
+    'log_backups': 3,
+    # Local HTTP stats endpoint (JSON and Prometheus); off unless a port is set
+    'stats_port': None,
+    # Local JSON-RPC control API (control.py): null for off, true for the
+    # default socket/pipe, or an address of its own
+    'control_address': None,
+    # Failed moves are retried after move_retry_delay seconds, doubling each
+    # time, until move_max_attempts attempts have failed
+    'move_max_attempts': 5,
+    'move_retry_delay': 1.0,
+}
+
+
+def validate_settings(settings):
+    """Merge `settings` over the defaults and check the values"""
+    merged = dict(DEFAULT_SETTINGS)
+    merged.update(settings)
+
+    for key in ('poll_min_interval', 'poll_max_interval'):
+        value = merged[key]
+        if not isinstance(value, (int, float)) or value <= 0:
+            raise ValueError(f"{key} must be a positive number of seconds, got {value!r}")
+    if merged['poll_min_interval'] > merged['poll_max_interval']:
+        raise ValueError("poll_min_interval must not exceed poll_max_interval")
+
+    if merged['log_file'] is not None and not isinstance(merged['log_file'], str):
+        raise ValueError("log_file must be a path or null")
+    if not isinstance(merged['log_max_bytes'], int) or merged['log_max_bytes'] <= 0:
+        raise ValueError("log_max_bytes must be a positive integer")
+    if not isinstance(merged['log_backups'], int) or merged['log_backups'] < 0:
+        raise ValueError("log_backups must be a non-negative integer")
+    port = merged['stats_port']
+    if port is not None and (not isinstance(port, int) or not 0 < port < 65536):
+        raise ValueError(f"stats_port must be a port number or null, got {port!r}")
+    address = merged['control_address']
+    if address is not None and address is not True and (not isinstance(address, str) or not address):
+        raise ValueError(f"control_address must be true, a socket/pipe address or null, "
+                         f"got {address!r}")
+    attempts = merged['move_max_attempts']
+    if not isinstance(attempts, int) or isinstance(attempts, bool) or attempts < 1:
+        raise ValueError(f"move_max_attempts must be a positive integer, got {attempts!r}")
+    delay = merged['move_retry_delay']
+    if not isinstance(delay, (int, float)) or delay <= 0:
+        raise ValueError(f"move_retry_delay must be a positive number of seconds, got {delay!r}")
+    return merged
+
+
+def parse_config(data):
+    """(rules, settings) from decoded config JSON; rules of the active profile"""
+    profiles, active = split_profiles(data)
+    settings = data.get('settings', {}) if isinstance(data, dict) else {}
+    validate_settings(settings)
+    return profiles[active], settings
+
+
+def load_config(path):
+    """Return (rules, settings) where settings holds only what the file sets"""
+    with open(path, 'r') as f:
+        data = json.load(f)
+    return parse_config(data)
+
+
+def load_profiles(path):
+    """Return (profiles, active, settings); profiles maps names to rule lists"""
+    with open(path, 'r') as f:
+        data = json.load(f)
+    settings = parse_config(data)[1]
+    return (*split_profiles(data), settings)
+
+
+def save_config(path, rules, settings=None, profiles=None, active=None):
+    """Write the config atomically: temp file in the same directory, then replace
+
+    With `profiles` ({name: rules}, `rules` being the active one's list)
+    other than a lone default profile, the profile form is written.
+    """
+    if profiles and set(profiles) != {DEFAULT_PROFILE}:
+        data = {'profile': active, 'profiles': profiles}
+        if settings:
+            data['settings'] = settings
+    else:
+        data = {'settings': settings, 'rules': rules} if settings else rules
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, temp_path = tempfile.mkstemp(prefix=os.path.basename(path) + '.', suffix='.tmp',
+                                     dir=directory)
+    try:
+        with os.fdopen(fd, 'w') as f:
+            json.dump(data, f, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        # mkstemp creates the file owner-only; keep the old file's permissions
+        try:
+            os.chmod(temp_path, stat.S_IMODE(os.stat(path).st_mode))
+        except FileNotFoundError:
+            os.chmod(temp_path, 0o644)
+        os.replace(temp_path, path)
+    except BaseException:
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+        raise
+
+
+class ConfigWatcher:
+    """Detects changes to the config file made by something else
+
+    Call check() periodically. A change is reported once the file's mtime
+    and size have stayed the same for `debounce` seconds, so an editor or
+    deployment tool writing in several steps produces a single reload, and
+    only if the content hash differs from the last version seen, so a touch
+    or our own save (after mark_saved()) does not. A deleted file keeps the
+    current rules.
+    """
+
+    def __init__(self, path, debounce=0.5, clock=time.monotonic):
+        self.path = path
+        self.debounce = debounce
+        self.clock = clock
+        self._stat = None
+        self._digest = None
+        self._changed_at = None
+        # (profiles, active) of the last change check() reported
+        self.profiles = None
+        self.mark_saved()
+
+    def _read_stat(self):
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            return None
+        return (st.st_mtime_ns, st.st_size)
+
+    def _read(self):
+        with open(self.path, 'rb') as f:
+            return f.read()
+
+    def mark_saved(self):
+        """Treat the file as it is now as already applied"""
+        self._stat = self._read_stat()
+        self._changed_at = None
+        try:
+            self._digest = hashlib.sha256(self._read()).hexdigest()
+        except OSError:
+            self._digest = None
+
+    def check(self):
+        """(rules, settings) if the file changed and settled, else None
+
+        Raises OSError or ValueError if the changed file can't be read or
+        parsed; the change is then considered seen until the file changes
+        again.
+        """
+        current = self._read_stat()
+        now = self.clock()
+        if current != self._stat:
+            self._stat = current
+            self._changed_at = now
+            return None
+        if self._changed_at is None or now - self._changed_at < self.debounce:
+            return None
+        self._changed_at = None
+        if current is None:
+            return None
+
+        data = self._read()
+        digest = hashlib.sha256(data).hexdigest()
+        if digest == self._digest:
+            return None
+        self._digest = digest
+        data = json.loads(data)
+        change = parse_config(data)
+        self.profiles = split_profiles(data)
+        return change
@@ -0,0 +1,582 @@
+"""Local control API: JSON-RPC 2.0 over a Unix socket or a named pipe
+
+Scripts and macro pads can change rules, switch profiles, trigger
+placement and ask what the engine did, without driving the GUI or
+rewriting the config file:
+
+    ping                                 API version and active profile
+    stats                                PlacementEngine.stats()
+    windows.list      [placed_only]      tracked windows: placed, attempts, rule
+    layout.apply                         Apply Layout Now; returns the outcome
+    rules.list        [profile]
+    rules.add         rule [index] [profile]
+    rules.update      index rule [profile]
+    rules.remove      index | process [profile]
+    rules.replace     rules [profile]
+    profiles.list
+    profiles.switch   name
+    profiles.create   name [rules]       starts as a copy of the active profile
+    profiles.delete   name
+
+Parameters are passed by name. A JSON-RPC batch (an array of requests) is
+applied atomically: its rule and profile changes are made to a copy, and
+only if every request succeeded is the copy saved and handed to the engine,
+as one rule set swap. If one fails, nothing changes, no layout pass runs
+and the others answer with a "batch aborted" error. Batches are applied one at a time.
+
+Messages are framed by multiprocessing.connection, which speaks the same
+protocol over a Unix socket and a Windows named pipe. Unix sockets are
+made owner-only; a named pipe's default access limits writers to the
+user, administrators and SYSTEM. Off unless the control_address setting or
+--control is given. The client side is ControlClient, and `main()` is the
+command-line client (`python wmmctl.py`).
+"""
+
+import argparse
+import copy
+import json
+import os
+import sys
+import tempfile
+import threading
+from multiprocessing.connection import Client, Listener
+
+from .backend import normalize_process_name
+from .rules import RuleSet
+
+API_VERSION = 1
+MAX_MESSAGE = 4 * 1024 * 1024
+CALL_TIMEOUT = 10.0  # seconds to wait for the engine thread or the GUI
+
+PARSE_ERROR = -32700
+INVALID_REQUEST = -32600
+METHOD_NOT_FOUND = -32601
+INVALID_PARAMS = -32602
+INTERNAL_ERROR = -32603
+BATCH_ABORTED = -32000
+
+
+class ControlError(Exception):
+    """A JSON-RPC error, raised by methods and by ControlClient"""
+
+    def __init__(self, code, message):
+        super().__init__(message)
+        self.code = code
+        self.message = message
+
+    def as_dict(self):
+        return {'code': self.code, 'message': self.message}
+
+
+def default_address():
+    """Per-user pipe name on Windows, socket path elsewhere"""
+    if sys.platform == 'win32':
+        return r'\\.\pipe\window_mover-' + os.environ.get('USERNAME', 'user')
+    directory = os.environ.get('XDG_RUNTIME_DIR') or tempfile.gettempdir()
+    return os.path.join(directory, f"window_mover-{os.getuid()}.sock")
+
+
+def apply_profiles(engine, old, new, active):
+    """Hand edited profiles ({name: rules}) to the engine, recompiling only what changed"""
+    if set(old) != set(new):
+        engine.set_profiles(new, active)
+        return
+    for name, rules in new.items():
+        if rules != old[name]:
+            engine.update_profile(name, rules)
+    if engine.profile != active:
+        engine.switch_profile(active)
+
+
+class ConfigStore:
+    """Profiles for the control API where the engine is their only holder (headless)
+
+    read() copies them from the engine; write() saves the config and applies
+    them. `settings` is what the config file sets, kept for saving.
+    """
+
+    def __init__(self, engine, config_file, settings, watcher=None):
+        self.engine = engine
+        self.config_file = config_file
+        self.settings = settings
+        self.watcher = watcher
+
+    def read(self):
+        profiles = {profile.name: copy.deepcopy(profile.rules) for profile in self.engine.profiles}
+        return profiles, self.engine.profile
+
+    def write(self, profiles, active):
+        from .config import save_config
+        old, _ = self.read()
+        save_config(self.config_file, profiles[active], self.settings, profiles, active)
+        if self.watcher is not None:
+            self.watcher.mark_saved()
+        apply_profiles(self.engine, old, profiles, active)
+
+
+class _Transaction:
+    """Working copy of the profiles for one request or batch"""
+
+    def __init__(self, profiles, active):
+        self.profiles = profiles
+        self.active = active
+        self.changed = False
+        self.layout = []  # response dicts waiting for a layout pass after the commit
+
+    def rules(self, params):
+        name = params.get('profile', self.active)
+        rules = self.profiles.get(name)
+        if rules is None:
+            raise ControlError(INVALID_PARAMS, f"no profile named {name!r}")
+        return rules
+
+
+def _param(params, name, kind=None):
+    if name not in params:
+        raise ControlError(INVALID_PARAMS, f"missing parameter {name!r}")
+    value = params[name]
+    if kind is not None and (not isinstance(value, kind) or isinstance(value, bool)):
+        raise ControlError(INVALID_PARAMS, f"{name!r} must be {kind.__name__}")
+    return value
+
+
+def _check_rule(rule):
+    """The rule, if the engine would accept it; else INVALID_PARAMS"""
+    errors = RuleSet([rule]).errors
+    if errors:
+        raise ControlError(INVALID_PARAMS, f"invalid rule: {errors[0][1]}")
+    return rule
+
+
+def _index(params, rules):
+    index = _param(params, 'index', int)
+    if not 0 <= index < len(rules):
+        raise ControlError(INVALID_PARAMS, f"no rule at index {index} ({len(rules)} rules)")
+    return index
+
+
+class ControlServer:
+    """Serves the control API from background threads
+
+    `store` holds the profiles: read() returns ({name: rules}, active) as
+    copies the server may change, write(profiles, active) saves and applies
+    them. ConfigStore is the headless one; the GUI has its own.
+    """
+
+    def __init__(self, engine, store, address=None, log=None):
+        self.engine = engine
+        self.store = store
+        self.address = address or default_address()
+        self.log = log or (lambda msg: None)
+        self._lock = threading.Lock()  # one batch at a time
+        self._listener = None
+        self._closed = False
+        self.methods = {
+            'ping': self.ping,
+            'stats': self.stats,
+            'windows.list': self.windows_list,
+            'layout.apply': self.layout_apply,
+            'rules.list': self.rules_list,
+            'rules.add': self.rules_add,
+            'rules.update': self.rules_update,
+            'rules.remove': self.rules_remove,
+            'rules.replace': self.rules_replace,
+            'profiles.list': self.profiles_list,
+            'profiles.switch': self.profiles_switch,
+            'profiles.create': self.profiles_create,
+            'profiles.delete': self.profiles_delete,
+        }
+
+    # Lifecycle
+
+    def start(self):
+        """Listen and serve; raises OSError if the address is in use"""
+        self._closed = False
+        try:
+            self._listener = Listener(self.address)
+        except OSError:
+            if sys.platform == 'win32' or not os.path.exists(self.address):
+                raise
+            # A socket file left by a crash: remove it if nobody answers
+            try:
+                Client(self.address).close()
+            except OSError:
+                os.unlink(self.address)
+                self._listener = Listener(self.address)
+            else:
+                raise
+        if sys.platform != 'win32':
+            os.chmod(self.address, 0o600)
+        threading.Thread(target=self._accept, daemon=True, name="wmm-control").start()
+
+    def stop(self):
+        if self._listener is None:
+            return
+        self._closed = True
+        try:
+            # accept() can't be interrupted portably; wake it with a connection
+            Client(self.address).close()
+        except OSError:
+            pass
+        self._listener.close()
+        self._listener = None
+
+    def _accept(self):
+        listener = self._listener
+        while not self._closed:
+            try:
+                conn = listener.accept()
+            except OSError:
+                if self._closed:
+                    return
+                continue
+            if self._closed:
+                conn.close()
+                return
+            threading.Thread(target=self._serve, args=(conn,), daemon=True,
+                             name="wmm-control-conn").start()
+
+    def _serve(self, conn):
+        try:
+            while True:
+                try:
+                    data = conn.recv_bytes(MAX_MESSAGE)
+                except (EOFError, OSError):
+                    return
+                response = self.handle_text(data)
+                if response is not None:
+                    conn.send_bytes(response.encode('utf-8'))
+        finally:
+            conn.close()
+
+    # Requests
+
+    def handle_text(self, data):
+        """JSON response text for one message, or None if nothing is to be sent"""
+        try:
+            message = json.loads(data)
+        except ValueError as e:
+            return json.dumps(self._error(None, ControlError(PARSE_ERROR, f"parse error: {e}")))
+        response = self.handle(message)
+        return json.dumps(response, default=str) if response is not None else None
+
+    def handle(self, message):
+        """Response to a decoded request or batch (None for notifications only)"""
+        if isinstance(message, list) and not message:
+            return self._error(None, ControlError(INVALID_REQUEST, "empty batch"))
+        try:
+            responses = self._run(message if isinstance(message, list) else [message])
+        except Exception as e:
+            # Reading or saving the profiles failed: nothing was applied
+            return self._error(None, ControlError(INTERNAL_ERROR, f"not applied: {e}"))
+        if isinstance(message, list):
+            return responses or None
+        return responses[0] if responses else None
+
+    def _error(self, request_id, error):
+        return {'jsonrpc': '2.0', 'error': error.as_dict(), 'id': request_id}
+
+    def _run(self, requests):
+        with self._lock:
+            txn = _Transaction(*self.store.read())
+            responses = []
+            failed = False
+            for request in requests:
+                request_id = request.get('id') if isinstance(request, dict) else None
+                try:
+                    if (not isinstance(request, dict) or request.get('jsonrpc') != '2.0'
+                            or not isinstance(request.get('method'), str)):
+                        raise ControlError(INVALID_REQUEST, "not a JSON-RPC 2.0 request")
+                    method = self.methods.get(request['method'])
+                    if method is None:
+                        raise ControlError(METHOD_NOT_FOUND, f"no method {request['method']!r}")
+                    params = request.get('params', {})
+                    if not isinstance(params, dict):
+                        raise ControlError(INVALID_PARAMS, "parameters must be passed by name")
+                    result = method(txn, params)
+                    response = {'jsonrpc': '2.0', 'result': result, 'id': request_id}
+                    if method == self.layout_apply:
+                        txn.layout.append(response)
+                except ControlError as e:
+                    failed = True
+                    response = self._error(request_id, e)
+                except Exception as e:
+                    failed = True
+                    response = self._error(request_id, ControlError(INTERNAL_ERROR, str(e)))
+                if not (isinstance(request, dict) and 'id' not in request):  # notifications get no answer
+                    responses.append(response)
+
+            if failed:
+                # Nothing is saved and no layout pass runs for a batch with a failure
+                aborted = ControlError(BATCH_ABORTED, "batch aborted: another request in it failed")
+                return [response if 'error' in response else self._error(response['id'], aborted)
+                        for response in responses]
+            if txn.changed:
+                self.store.write(txn.profiles, txn.active)
+                self.log(f"Control API: rules changed (profile {txn.active})")
+            if txn.layout:
+                try:
+                    report = self._apply_layout()
+                except ControlError as e:
+                    for response in txn.layout:
+                        del response['result']
+                        response['error'] = e.as_dict()
+                else:
+                    for response in txn.layout:
+                        response['result'] = report
+            return responses
+
+    def _apply_layout(self):
+        done = threading.Event()
+        reports = []
+
+        def finished(report):
+            reports.append(report)
+            done.set()
+
+        self.engine.request_layout(finished)
+        if not done.wait(CALL_TIMEOUT) or reports[0] is None:
+            raise ControlError(INTERNAL_ERROR, "layout pass failed or timed out")
+        report = reports[0]
+        return {'moved': len(report.moved), 'skipped': report.skipped,
+                'failed': len(report.failed), 'batched': report.batched,
+                'seconds': round(report.seconds, 4)}
+
+    # Methods: (transaction, params) -> result
+
+    def ping(self, txn, params):
+        return {'version': API_VERSION, 'profile': txn.active, 'running': self.engine.running}
+
+    def stats(self, txn, params):
+        return self.engine.stats()
+
+    def windows_list(self, txn, params):
+        placed_only = bool(params.get('placed_only', False))
+        engine = self.engine
+
+        def collect():
+            now = engine.clock()
+            rules = {rule.key: rule for rule in engine.rules}
+            windows = []
+            for entry in engine.tracker:
+                if placed_only and not entry.placed:
+                    continue
+                rule = rules.get(entry.rule_key)
+                windows.append({
+                    'hwnd': entry.hwnd,
+                    'pid': entry.key[1],
+                    'placed': entry.placed,
+                    'placed_seconds_ago': (round(now - entry.placed_at, 3)
+                                           if entry.placed_at is not None else None),
+                    'rule': rule.process if rule is not None else None,
+                    'attempts': entry.attempts,
+                    'gave_up': entry.gave_up,
+                    'target': list(entry.target) if entry.target else None,
+                })
+            return windows
+
+        try:
+            return engine.call(collect).result(CALL_TIMEOUT)
+        except TimeoutError:
+            raise ControlError(INTERNAL_ERROR, "engine did not answer") from None
+
+    def layout_apply(self, txn, params):
+        return None  # filled in after the batch is committed
+
+    def rules_list(self, txn, params):
+        return copy.deepcopy(txn.rules(params))
+
+    def rules_add(self, txn, params):
+        rules = txn.rules(params)
+        rule = _check_rule(_param(params, 'rule', dict))
+        index = params.get('index', len(rules))
+        if not isinstance(index, int) or not 0 <= index <= len(rules):
+            raise ControlError(INVALID_PARAMS, f"index must be 0..{len(rules)}")
+        rules.insert(index, rule)
+        txn.changed = True
+        return index
+
+    def rules_update(self, txn, params):
+        rules = txn.rules(params)
+        index = _index(params, rules)
+        rules[index] = _check_rule(_param(params, 'rule', dict))
+        txn.changed = True
+        return index
+
+    def rules_remove(self, txn, params):
+        rules = txn.rules(params)
+        if 'index' in params:
+            del rules[_index(params, rules)]
+            txn.changed = True
+            return 1
+        process = normalize_process_name(_param(params, 'process', str))
+        keep = [rule for rule in rules
+                if normalize_process_name(str(rule.get('process', ''))) != process]
+        removed = len(rules) - len(keep)
+        if removed:
+            rules[:] = keep
+            txn.changed = True
+        return removed
+
+    def rules_replace(self, txn, params):
+        rules = txn.rules(params)
+        new = _param(params, 'rules', list)
+        for rule in new:
+            if not isinstance(rule, dict):
+                raise ControlError(INVALID_PARAMS, "rules must be objects")
+            _check_rule(rule)
+        rules[:] = new
+        txn.changed = True
+        return len(new)
+
+    def profiles_list(self, txn, params):
+        return {'active': txn.active,
+                'profiles': {name: len(rules) for name, rules in txn.profiles.items()}}
+
+    def profiles_switch(self, txn, params):
+        name = _param(params, 'name', str)
+        if name not in txn.profiles:
+            raise ControlError(INVALID_PARAMS, f"no profile named {name!r}")
+        if name != txn.active:
+            txn.active = name
+            txn.changed = True
+        return name
+
+    def profiles_create(self, txn, params):
+        name = _param(params, 'name', str).strip()
+        if not name or name in txn.profiles:
+            raise ControlError(INVALID_PARAMS, f"profile name {name!r} is empty or taken")
+        if 'rules' in params:
+            rules = _param(params, 'rules', list)
+            for rule in rules:
+                _check_rule(rule)
+        else:
+            rules = copy.deepcopy(txn.profiles[txn.active])
+        txn.profiles[name] = rules
+        txn.changed = True
+        return name
+
+    def profiles_delete(self, txn, params):
+        name = _param(params, 'name', str)
+        if name not in txn.profiles:
+            raise ControlError(INVALID_PARAMS, f"no profile named {name!r}")
+        if name == txn.active:
+            raise ControlError(INVALID_PARAMS, "can't delete the active profile")
+        del txn.profiles[name]
+        txn.changed = True
+        return name
+
+
+class ControlClient:
+    """Connection to a running instance's control API"""
+
+    def __init__(self, address=None, timeout=CALL_TIMEOUT + 5):
+        self.address = address or default_address()
+        self.timeout = timeout
+        self._conn = Client(self.address)
+        self._ids = iter(range(1, sys.maxsize))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self._conn.close()
+
+    def _exchange(self, message):
+        self._conn.send_bytes(json.dumps(message).encode('utf-8'))
+        if not self._conn.poll(self.timeout):
+            raise TimeoutError(f"no answer from {self.address}")
+        return json.loads(self._conn.recv_bytes(MAX_MESSAGE))
+
+    def _request(self, method, params):
+        return {'jsonrpc': '2.0', 'method': method, 'params': params, 'id': next(self._ids)}
+
+    def call(self, method, **params):
+        """Result of one call; raises ControlError if it failed"""
+        response = self._exchange(self._request(method, params))
+        if 'error' in response:
+            raise ControlError(response['error']['code'], response['error']['message'])
+        return response['result']
+
+    def batch(self, calls):
+        """Results of (method, params) calls sent as one atomic batch
+
+        Failed calls come back as ControlError instances in their place.
+        """
+        requests = [self._request(method, params) for method, params in calls]
+        responses = self._exchange(requests)
+        if isinstance(responses, dict):
+            # The batch as a whole failed
+            raise ControlError(responses['error']['code'], responses['error']['message'])
+        by_id = {response.get('id'): response for response in responses}
+        results = []
+        for request in requests:
+            response = by_id.get(request['id'], {})
+            if 'result' in response:
+                results.append(response['result'])
+            else:
+                error = response.get('error', {'code': INTERNAL_ERROR, 'message': "no answer"})
+                results.append(ControlError(error['code'], error['message']))
+        return results
+
+
+def _value(text):
+    """A command-line parameter value: JSON if it parses, else the text itself"""
+    try:
+        return json.loads(text)
+    except ValueError:
+        return text
+
+
+def main(argv=None):
+    """Command-line client; returns an exit code"""
+    parser = argparse.ArgumentParser(
+        prog="wmmctl", description="Talk to a running Window Monitor Mover's control API",
+        epilog="Example: wmmctl rules.add rule='{\"process\": \"teams\", \"monitor\": {...}}'")
+    parser.add_argument('--address', help=f"socket or pipe (default: {default_address()})")
+    parser.add_argument('--batch', metavar='FILE',
+                        help="send a JSON array of {\"method\", \"params\"} from FILE "
+                             "(- for stdin) as one atomic batch")
+    parser.add_argument('method', nargs='?', help="e.g. ping, profiles.switch, layout.apply")
+    parser.add_argument('params', nargs='*', metavar='NAME=VALUE',
+                        help="parameters; values are parsed as JSON where possible")
+    args = parser.parse_args(argv)
+    if not args.batch and not args.method:
+        parser.error("give a method or --batch")
+
+    try:
+        client = ControlClient(args.address)
+    except OSError as e:
+        print(f"Could not connect to {args.address or default_address()}: {e}\n"
+              "Is Window Monitor Mover running with --control?", file=sys.stderr)
+        return 2
+
+    with client:
+        if args.batch:
+            if args.batch == '-':
+                calls = json.load(sys.stdin)
+            else:
+                with open(args.batch, encoding='utf-8') as f:
+                    calls = json.load(f)
+            results = client.batch([(call['method'], call.get('params', {})) for call in calls])
+            failed = [r for r in results if isinstance(r, ControlError)]
+            print(json.dumps([r.as_dict() if isinstance(r, ControlError) else r for r in results],
+                             indent=2))
+            return 1 if failed else 0
+
+        params = {}
+        for item in args.params:
+            name, sep, text = item.partition('=')
+            if not sep:
+                parser.error(f"parameters are NAME=VALUE, got {item!r}")
+            params[name] = _value(text)
+        try:
+            result = client.call(args.method, **params)
+        except ControlError as e:
+            print(f"Error {e.code}: {e.message}", file=sys.stderr)
+            return 1
+        print(json.dumps(result, indent=2))
+    return 0
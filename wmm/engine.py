@@ -0,0 +1,754 @@
+"""Placement engine: consumes window events and moves matching windows"""
+
+import itertools
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+
+from . import backend as wb
+from .arrange import default_position, group_key, slot_rects
+from .events import (CREATED, DESTROYED, RESCAN, SHOWN, DispatchQueue,
+                     PollingEventSource, WindowEvent)
+from .layout import apply_layout
+from .metrics import EngineMetrics
+from .models import SizeMode
+from .monitors import MATCHED_BY, MonitorMap, MonitorTopology, describe_monitor
+from .pipeline import MovePipeline
+from .process_cache import ProcessCache
+from .profiles import ProfileSet
+from .retry import RetryQueue
+from .scheduler import AdaptivePollScheduler
+from .rules import RuleSet
+from .snapshot import DeltaScanner, DesktopSnapshot
+from .tracker import TrackedWindow, WindowTracker
+
+# Safety-net rescan cadence when an event source is active
+RECONCILE_INTERVAL = 5.0
+
+
+class PlacementEngine:
+    """Moves windows matching `rules` to their target monitors
+
+    Detection is driven by an optional event source (WinEvent hooks on
+    Windows) plus a polling source that requests full rescans; both feed one
+    DispatchQueue consumed by the engine thread. Without an event source the
+    engine polls, with the rescan interval set by an AdaptivePollScheduler.
+    """
+
+    def __init__(self, backend, rules=None, log=print, process_cache=None,
+                 event_source=None, scheduler=None, move_workers=4, topology=None,
+                 clock=time.monotonic, sleep=time.sleep):
+        self.backend = backend
+        self.log = log
+        self.process_cache = (process_cache if process_cache is not None
+                              else ProcessCache(backend, clock=clock))
+        self.event_source = event_source
+        self.scheduler = scheduler if scheduler is not None else AdaptivePollScheduler(clock=clock)
+        self.topology = topology if topology is not None else MonitorTopology(backend, clock=clock)
+        self.clock = clock
+        self.sleep = sleep
+
+        self.running = False
+        self.tracker = WindowTracker(clock)
+        # Rescans inspect only hwnds they haven't seen; engine thread only
+        self.scanner = DeltaScanner(backend, self.process_cache, clock=clock)
+        self.retries = RetryQueue()  # failed placements, by when they are due again
+        self._layout_requests = deque()  # callbacks waiting for apply_layout()
+        self._calls = deque()  # call() requests to run on the engine thread
+        # The engine thread reads `ruleset`; update_rules() publishes a new one
+        # in `_next_ruleset` and the engine swaps it in between batches
+        self.ruleset = RuleSet()
+        self._next_ruleset = self.ruleset
+        # Named profiles, compiled ahead; switch_profile() publishes one's RuleSet
+        self.profiles = ProfileSet()
+        self.profile = None
+        # Rule key -> rule aimed at its monitor on the current displays
+        self.monitor_map = None
+        self.queue = None
+        self.poller = None
+        self.metrics = EngineMetrics()
+        self.latency = self.metrics.placement_latency
+        self.pipeline = MovePipeline(move_workers, notify=self._wake, clock=clock)
+        # Optional TraceRecorder (see trace.py); called on the engine thread
+        self.recorder = None
+        self._thread = None
+        if rules:
+            self.update_rules(rules)
+
+    @property
+    def mode(self):
+        return self.event_source.name if self.event_source else "polling"
+
+    def start(self):
+        # A previous run shuts the pipeline down on its way out, so it must be
+        # gone before this one starts it again
+        self.join()
+        self.running = True
+        self._thread = threading.Thread(target=self.run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self.running = False
+        if self.queue is not None:
+            self.queue.close()
+
+    def join(self, timeout=None):
+        """Wait for the engine thread to finish after stop()"""
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    @property
+    def rules(self):
+        """Resolved rules currently in use, as Rule records"""
+        return self.ruleset.rules
+
+    @property
+    def matcher(self):
+        return self.ruleset.matcher
+
+    def update_rules(self, rules):
+        """Switch to a new rule list without restarting; returns the RuleSet
+
+        Safe to call from any thread. The rules are resolved and compiled
+        here, on the caller's thread; a running engine then swaps the result
+        in between event batches. Windows placed by rules that are still in
+        the new list stay placed; windows placed by rules that changed or
+        were removed are forgotten so the current rules apply to them again.
+        """
+        ruleset = RuleSet(rules)
+        self.profile = None
+        self._publish(ruleset)
+        return ruleset
+
+    def set_profiles(self, profiles, active):
+        """Compile every profile ({name: rules}) and switch to `active`
+
+        Safe to call from any thread; the compiling happens on the caller's.
+        """
+        self.profiles = ProfileSet(profiles, self.topology)
+        return self.switch_profile(active)
+
+    def update_profile(self, name, rules):
+        """Recompile one profile after its rules were edited; applied if it is active"""
+        self.profiles = self.profiles.with_profile(name, rules, self.topology)
+        if name == self.profile:
+            self.switch_profile(name)
+
+    def switch_profile(self, name):
+        """Make profile `name` active; returns its RuleSet. Safe to call from any thread
+
+        Nothing is parsed or compiled: the profile's RuleSet and MonitorMap
+        were built beforehand, so this only publishes a reference. A running
+        engine then places the windows of rules new in this profile in one
+        batched layout pass. Raises ValueError for an unknown name.
+        """
+        profile = self.profiles.get(name)
+        if profile is None:
+            raise ValueError(f"no profile named {name!r} (have: {', '.join(self.profiles.names())})")
+        self.profile = name
+        self._publish(profile.ruleset)
+        return profile.ruleset
+
+    def _publish(self, ruleset):
+        self._next_ruleset = ruleset
+        queue = self.queue
+        if self.running and queue is not None:
+            queue.wake()
+        else:
+            self._swap_ruleset()
+
+    def _swap_ruleset(self):
+        """Install _next_ruleset if it is new; engine thread (or engine stopped)"""
+        ruleset = self._next_ruleset
+        previous = self.ruleset
+        if ruleset is previous:
+            return
+        self.ruleset = ruleset
+        if self.recorder is not None:
+            self.recorder.rules(ruleset.rules)
+        for rule, error in ruleset.errors:
+            process = rule.get('process', '?') if isinstance(rule, dict) else '?'
+            self.log(f"Rule error ({process}): {error}")
+
+        stale = previous.keys - ruleset.keys
+        forgotten = self.tracker.unplace(stale) if stale else 0
+        # A rule edit may be the fix for windows that kept failing
+        forgotten += self.tracker.reset_failures()
+        self.retries.clear()
+
+        if self.running and self.queue is not None:
+            added = ruleset.keys - previous.keys
+            profile = self.profiles.for_ruleset(ruleset)
+            what = f"Profile {profile.name}" if profile is not None else "Rules updated"
+            self.log(f"{what}: {len(ruleset)} rules (+{len(added)} -{len(stale)}), "
+                     f"{self.tracker.placed_count()} placed windows kept, {forgotten} to re-place")
+            if profile is not None:
+                self.metrics.incr('profile_switches')
+            if profile is not None and added:
+                # Windows of the profile's new rules go in one batch
+                report = self.apply_layout(rule_keys=added)
+                self.log(report.format())
+            if added or forgotten:
+                # Apply new and changed rules now rather than at the next rescan
+                self.queue.put(WindowEvent(RESCAN, None, self.clock()))
+
+    def stats(self):
+        """Counters, gauges and histogram exports; safe to call from any thread"""
+        queue = self.queue
+        counters = dict(self.metrics.counters)
+        counters['windows_evicted'] = self.tracker.evicted
+        counters['hwnd_reuses'] = self.tracker.reused
+        counters['poll_interval_changes'] = self.scheduler.changes
+        return {
+            'mode': self.mode,
+            'profile': self.profile,
+            'counters': counters,
+            'gauges': {
+                'running': int(self.running),
+                'queue_depth': len(queue) if queue is not None else 0,
+                'moves_in_flight': self.pipeline.in_flight(),
+                'tracked_windows': len(self.tracker),
+                'scan_calls_last': self.scanner.last_calls,
+                'retries_pending': len(self.retries),
+                'windows_given_up': self.tracker.gave_up_count(),
+                'rules': len(self._next_ruleset),
+                'monitors': len(self.monitor_map.monitors) if self.monitor_map else 0,
+                'poll_interval_seconds': self.poller.interval if self.poller else 0,
+                'process_cache_hit_rate': self.process_cache.stats()['hit_rate'],
+            },
+            'histograms': {name: hist.export()
+                           for name, hist in self.metrics.histograms().items()},
+            # Current rescan interval, why it was set and its recent changes;
+            # only drives the rescans in polling mode
+            'poll_scheduler': self.scheduler.stats(),
+        }
+
+    def _wake(self):
+        queue = self.queue
+        if queue is not None:
+            queue.wake()
+
+    def run(self):
+        """Engine thread body"""
+        self.log("Monitoring started")
+        self.tracker.clear()
+        self.scanner.reset()
+        self.retries.clear()
+        self.monitor_map = None
+        self.queue = DispatchQueue(clock=self.clock)
+
+        if self.event_source:
+            self.poller = PollingEventSource(RECONCILE_INTERVAL, self.clock)
+            sources = [self.event_source, self.poller]
+            self.log(f"Detection: {self.event_source.name} events, rescan every {RECONCILE_INTERVAL:g}s")
+        else:
+            self.scheduler.reset()
+            self.poller = PollingEventSource(self.scheduler.interval, self.clock)
+            sources = [self.poller]
+
+        self.pipeline.start()
+        for source in sources:
+            source.start(self.queue.put)
+
+        try:
+            while self.running:
+                self.housekeeping()
+                self.dispatch(self.queue.get_batch(timeout=self._batch_timeout()))
+        finally:
+            for source in sources:
+                source.stop()
+            self.pipeline.shutdown()
+            if self.latency.count:
+                self.log(f"Placement latency: {self.latency.format()}")
+            self.log("Monitoring stopped")
+
+    def housekeeping(self):
+        """Work due between event batches: new rules, display changes, layout requests, retries"""
+        self._swap_ruleset()
+        self._check_displays()
+        self._run_calls()
+        self._run_layout_requests()
+        self._run_retries()
+
+    def dispatch(self, events):
+        """Handle a batch of events, then apply finished moves; engine thread"""
+        recorder = self.recorder
+        for event in events:
+            if not self.running:
+                break
+            if recorder is not None:
+                recorder.event(event)
+            try:
+                self.handle_event(event)
+            except Exception as e:
+                self.log(f"Error: {e}")
+        self.collect_results()
+        self._swap_ruleset()
+
+    def _batch_timeout(self):
+        """How long to wait for events: at most 1 s, less if a retry is due sooner"""
+        due = self.retries.next_due()
+        if due is None:
+            return 1.0
+        return min(1.0, max(0.0, due - self.clock()))
+
+    def _run_retries(self):
+        """Try failed placements whose backoff has run out; engine thread"""
+        now = self.clock()
+        hwnds = []
+        for key in self.retries.pop_due(now):
+            entry = self.tracker.get(key)
+            if entry is not None and not entry.placed:
+                hwnds.append(entry.hwnd)
+        if not hwnds:
+            return
+        snapshot = DesktopSnapshot.capture(self.backend, self.process_cache, hwnds=hwnds)
+        matches = list(self.matcher.match(snapshot, self.backend))
+        self.place(matches, WindowEvent(RESCAN, None, now), retry=True)
+
+    def _homes(self):
+        """MonitorMap for the current rules, rebuilt after a rule change
+
+        Only _check_displays() picks up new monitors; a rule change reuses
+        the monitor list of the map it replaces.
+        """
+        homes = self.monitor_map
+        rules = self.ruleset.rules
+        if homes is None:
+            homes = self.monitor_map = self.topology.monitor_map(rules)
+        elif homes.rules is not rules:
+            profile = self.profiles.for_ruleset(self.ruleset)
+            if (profile is not None and profile.monitor_map is not None
+                    and profile.monitor_map.generation == homes.generation):
+                # Mapped when the profile was compiled
+                homes = self.monitor_map = profile.monitor_map
+            else:
+                homes = self.monitor_map = MonitorMap(rules, homes.monitors, homes.generation)
+        else:
+            return homes
+        self._log_homes(homes)
+        return homes
+
+    def _log_homes(self, homes, changed=()):
+        """Log the rules of `changed` that moved, and every guessed or missing monitor"""
+        for rule, number, how in homes.moved:
+            if rule.key in changed or how == 'order':
+                self.log(f"  {rule.process}: {describe_monitor(rule.monitor)} "
+                         f"is now monitor {number} ({MATCHED_BY[how]})")
+        for rule in homes.missing:
+            self.log(f"  {rule.process}: {describe_monitor(rule.monitor)} "
+                     f"not connected, using the primary monitor")
+
+    def _check_displays(self):
+        """Re-home rules if the monitor layout changed
+
+        The topology re-checks its display fingerprint at most every few
+        seconds, so this is cheap to call every loop. When the layout did
+        change, the rule -> monitor mapping is rebuilt once and, on a running
+        engine, windows of every rule whose target moved are placed again in
+        one batched pass.
+        """
+        previous = self._homes()
+        monitors = self.topology.monitors()
+        if self.recorder is not None:
+            self.recorder.monitors(monitors)
+        if self.topology.generation == previous.generation:
+            return
+        homes = self.monitor_map = self.topology.monitor_map(self.ruleset.rules)
+        changed = homes.changed(previous)
+        # Keep the other profiles ready to switch to
+        profile = self.profiles.for_ruleset(self.ruleset)
+        if profile is not None:
+            profile.monitor_map = homes
+        self.profiles.rehome(self.topology, homes.generation)
+        self.metrics.incr('display_changes')
+        self.metrics.incr('rules_rehomed', len(changed))
+        self.log(f"Display change: {len(homes.monitors)} monitors, "
+                 f"{len(changed)} rules with a new target")
+        self._log_homes(homes, changed)
+
+        if changed and self.running:
+            self.tracker.unplace(changed)
+            report = self.apply_layout(rule_keys=changed)
+            self.log(report.format())
+
+    def request_layout(self, done=None):
+        """Apply the layout now; safe to call from any thread
+
+        A running engine does it on its own thread before the next batch;
+        otherwise it runs on a short-lived thread. `done(report)` is called
+        afterwards with the LayoutReport (or None if it failed).
+        """
+        queue = self.queue
+        if self.running and queue is not None:
+            self._layout_requests.append(done)
+            queue.wake()
+        else:
+            threading.Thread(target=self._layout_and_notify, args=([done],), daemon=True,
+                             name="wmm-layout").start()
+
+    def call(self, fn):
+        """Run fn() where engine state can be read safely; returns a Future
+
+        A running engine calls it on its own thread before the next batch;
+        otherwise it is called right away on the caller's thread.
+        """
+        future = Future()
+
+        def run():
+            if not future.set_running_or_notify_cancel():
+                return
+            try:
+                future.set_result(fn())
+            except Exception as e:
+                future.set_exception(e)
+
+        queue = self.queue
+        if self.running and queue is not None:
+            self._calls.append(run)
+            queue.wake()
+        else:
+            run()
+        return future
+
+    def _run_calls(self):
+        while self._calls:
+            self._calls.popleft()()
+
+    def _run_layout_requests(self):
+        callbacks = []
+        while self._layout_requests:
+            callbacks.append(self._layout_requests.popleft())
+        if callbacks:
+            # Several clicks before the engine got to them: one layout pass
+            self._layout_and_notify(callbacks)
+
+    def _layout_and_notify(self, callbacks):
+        try:
+            report = self.apply_layout()
+            self.log(report.format())
+        except Exception as e:
+            self.log(f"Apply layout error: {e}")
+            report = None
+        for done in callbacks:
+            if done is not None:
+                done(report)
+
+    def apply_layout(self, rule_keys=None):
+        """Place every matched window now in one batched pass; returns a LayoutReport
+
+        Blocking. Windows already placed are placed again if they were moved
+        away; windows with a move in the pipeline are left to it. With
+        `rule_keys`, only windows of those rules are considered.
+        """
+        if not self.running:
+            # No engine loop watching the displays
+            self._check_displays()
+        homes = self._homes()
+        snapshot = DesktopSnapshot.capture(self.backend, self.process_cache)
+        matches = [(homes.home(rule), window)
+                   for rule, window in self.matcher.match(snapshot, self.backend)
+                   if (rule_keys is None or rule.key in rule_keys)
+                   and not self.pipeline.busy(window.hwnd)]
+        if self.running:
+            entries = [self.tracker.observe(window) for _, window in matches]
+        else:
+            # The tracker belongs to the engine thread; slots only last this pass
+            entries = [TrackedWindow(window.key, 0, 0) for _, window in matches]
+        slots, _ = self._arrange([(rule, entry) for (rule, _), entry in zip(matches, entries)],
+                                 retile=True)
+        rects = {entry.key[0]: slots[entry.key] for entry in entries if entry.key in slots}
+        report = apply_layout(self.backend, matches, rects, sleep=self.sleep)
+
+        if self.running:
+            # Engine thread: placed windows need no move from the next scan,
+            # including ones that had been given up on
+            failed = set(report.failed)
+            for (rule, window), entry in zip(matches, entries):
+                if window.hwnd not in failed:
+                    self.tracker.record(entry.key, True, rule.key)
+                    self.retries.discard(entry.key)
+            if self.recorder is not None:
+                self.recorder.layout(matches, report)
+        return report
+
+    def handle_event(self, event):
+        matcher = self.matcher
+        metrics = self.metrics
+
+        if event.kind == RESCAN:
+            # One enumeration, shared by matching and cleanup
+            started = self.clock()
+            snapshot = self.scanner.scan()
+            metrics.enumeration.record(self.clock() - started)
+            if self.recorder is not None:
+                self.recorder.snapshot(snapshot, full=True)
+            matches = list(matcher.match(snapshot, self.backend))
+            metrics.incr('scans')
+            metrics.incr('scan_calls', self.scanner.last_calls)
+            metrics.incr('windows_scanned', len(snapshot.windows))
+            metrics.incr('rule_matches', len(matches))
+            # Everything this scan matched is stamped with the new generation;
+            # windows that closed or stopped matching are evicted after
+            self.tracker.begin_scan()
+            self.place(matches, event)
+            self.tracker.end_scan()
+
+            if not self.event_source:
+                interval = self.scheduler.observe((w.hwnd for w in snapshot.windows),
+                                                  (window.pid for _, window in matches))
+                if interval != self.poller.interval:
+                    self.poller.reschedule(interval)
+        elif event.kind == DESTROYED:
+            metrics.incr('events')
+            self.scanner.forget(event.hwnd)
+            key = self.tracker.discard_hwnd(event.hwnd)
+            if key is not None:
+                self.retries.discard(key)
+        elif event.kind in (CREATED, SHOWN):
+            metrics.incr('events')
+            self.scanner.forget(event.hwnd)
+            # Capture even if the hwnd is known: it may have been recycled
+            snapshot = DesktopSnapshot.capture(self.backend, self.process_cache, hwnds=(event.hwnd,))
+            if self.recorder is not None:
+                self.recorder.snapshot(snapshot)
+            matches = list(matcher.match(snapshot, self.backend))
+            metrics.incr('windows_scanned', len(snapshot.windows))
+            metrics.incr('rule_matches', len(matches))
+            self.place(matches, event)
+
+    def place(self, matches, event, retry=False):
+        """Queue a move for each not-yet-placed (rule, window) match
+
+        Windows waiting out a retry backoff, or given up on, are skipped
+        before any window call is made.
+        """
+        homes = self._homes()
+        retries = self.retries
+        todo = []
+        for rule, window in matches:
+            entry = self.tracker.observe(window)
+            if entry.placed or entry.gave_up or self.pipeline.busy(window.hwnd):
+                continue
+            if not retry and entry.key in retries:
+                continue
+            todo.append((homes.home(rule), window, entry))
+        if not todo:
+            return
+        rects, rearranged = self._arrange([(rule, entry) for rule, _, entry in todo])
+
+        for rule, window, entry in todo:
+            hwnd = window.hwnd
+            proc = rule.process
+            title = window.title
+            if title is None:
+                title = self.backend.get_window_text(hwnd)
+            title = title or "(No Title)"
+            if entry.attempts:
+                self.log(f"Retrying: {proc} - {title[:40]} (attempt {entry.attempts + 1})")
+            else:
+                self.log(f"Found: {proc} - {title[:40]}")
+            self._submit(rule, entry, rects.get(entry.key), event)
+
+        if rearranged:
+            self.log(f"  Rearranging {len(rearranged)} windows to make room")
+            for rule, entry in rearranged:
+                self._submit(rule, entry, rects[entry.key], event)
+
+    def _submit(self, rule, entry, rect, event):
+        hwnd = entry.hwnd
+        if self.pipeline.submit(hwnd, self.move_window, hwnd, rule.monitor, rule.size, rect,
+                                tag=(rule, event.timestamp, entry.key)):
+            self.metrics.incr('moves_attempted')
+
+    def _arrange(self, items, retile=False):
+        """Solver rects for (rule, TrackedWindow) items whose rule arranges its windows
+
+        Returns ({key: (x, y, w, h)}, rearranged). Windows are grouped per
+        arrangement (work area + mode) and each group is solved in one go.
+        New cascade windows take the lowest free slots; a grid or column
+        group is laid out again, since its cell size depends on the count,
+        and `rearranged` lists (rule, entry) for already placed windows that
+        have to move for it. With `retile`, only `items` are laid out, from
+        slot 0, ignoring slots held by other windows.
+        """
+        groups = {}
+        for rule, entry in items:
+            group = group_key(rule)
+            if group is not None:
+                groups.setdefault(group, []).append(entry)
+        rects = {}
+        rearranged = []
+        if not groups:
+            return rects, rearranged
+
+        keys = {entry.key for _, entry in items}
+        held = {}
+        if not retile:
+            for entry in self.tracker:
+                if entry.group in groups and entry.slot is not None and entry.key not in keys:
+                    held.setdefault(entry.group, []).append(entry)
+        rule_for = self._homes().by_key
+
+        for group, entries in groups.items():
+            work, mode = group
+            others = held.get(group, [])
+            if mode == 'cascade' and not retile:
+                taken = {entry.slot for entry in others}
+                for entry in entries:
+                    # A retry keeps its slot
+                    if entry.group == group and entry.slot is not None and entry.slot not in taken:
+                        taken.add(entry.slot)
+                    else:
+                        entry.slot = None
+                free = (slot for slot in itertools.count() if slot not in taken)
+                for entry in entries:
+                    if entry.slot is None:
+                        entry.slot = next(free)
+                        taken.add(entry.slot)
+                slots = slot_rects(work, mode, max(entry.slot for entry in entries) + 1)
+                for entry in entries:
+                    entry.group = group
+                    entry.target = rects[entry.key] = slots[entry.slot]
+                continue
+
+            members = others + entries
+            # Windows keep their order; newcomers go last, by hwnd
+            members.sort(key=lambda e: (e.group != group or e.slot is None,
+                                        e.slot if e.slot is not None else 0, e.key[0]))
+            slots = slot_rects(work, mode, len(members))
+            for slot, entry in enumerate(members):
+                target = slots[slot]
+                moved = entry.group != group or entry.target != target
+                entry.group, entry.slot, entry.target = group, slot, target
+                if entry.key in keys:
+                    rects[entry.key] = target
+                elif moved and entry.placed and not self.pipeline.busy(entry.hwnd):
+                    rule = rule_for.get(entry.rule_key)
+                    if rule is not None:
+                        rects[entry.key] = target
+                        rearranged.append((rule, entry))
+        return rects, rearranged
+
+    def collect_results(self):
+        """Apply finished moves on the engine thread"""
+        for result in self.pipeline.drain():
+            rule, event_time, key = result.tag
+            proc = rule.process
+            window_size = rule.size
+            self.metrics.move_duration.record(result.finished - result.started)
+            entry = self.tracker.record(key, result.ok, rule.key)
+            if self.recorder is not None:
+                self.recorder.move(result)
+
+            if result.ok:
+                if entry is not None and rule.key not in self.ruleset.keys:
+                    # Queued before a rule change dropped its rule: leave the
+                    # window to the current rules
+                    entry.placed = False
+                size_text = f" ({window_size})" if window_size != SizeMode.NORMAL else ""
+                self.log(f"  ✓ Moved {proc} to target monitor{size_text}")
+                self.latency.record(result.finished - event_time)
+                self.metrics.incr('moves_succeeded')
+                self.retries.discard(key)
+                continue
+
+            self.metrics.incr('moves_failed')
+            reason = f": {result.error}" if result.error is not None else ""
+            if entry is None:
+                # Window closed meanwhile
+                self.log(f"  ✗ Failed to move {proc}{reason}")
+                continue
+            now = self.clock()
+            due = self.retries.schedule(key, entry.attempts, now)
+            if due is None:
+                entry.gave_up = True
+                self.metrics.incr('moves_given_up')
+                self.log(f"  ✗ Failed to move {proc}{reason}; "
+                         f"gave up after {entry.attempts} attempts")
+            else:
+                self.log(f"  ✗ Failed to move {proc}{reason} (attempt {entry.attempts}/"
+                         f"{self.retries.max_attempts}, retrying in {due - now:.3g}s)")
+
+    def move_window(self, hwnd, target_monitor, window_size=SizeMode.NORMAL, rect=None):
+        """Move window to a MonitorRect and apply a SizeMode
+
+        `rect` is the (x, y, w, h) the arrangement solver picked (w and h
+        None to keep the size); without it the window goes to the work
+        area's top-left corner plus 50 px.
+        """
+
+        try:
+            # Get current placement
+            placement = self.backend.get_window_placement(hwnd)
+            current_state = placement[1]
+            was_maximized = (current_state == wb.SW_SHOWMAXIMIZED)
+
+            # Restore maximized windows FIRST so we can get their true position
+            if was_maximized:
+                self.backend.show_window(hwnd, wb.SW_RESTORE)
+                self.sleep(0.15)
+
+            # NOW get the actual window position and size
+            current = self.backend.get_window_rect(hwnd)
+            current_x = current[0]
+            current_y = current[1]
+            w = current[2] - current[0]
+            h = current[3] - current[1]
+
+            # Check if already on target monitor
+            already_on_target = target_monitor.contains(current_x, current_y)
+
+            # Check if already in desired state (after restore, so was_maximized tells us original state)
+            desired_state_matches = False
+            if window_size == SizeMode.MAXIMIZED and was_maximized and already_on_target:
+                desired_state_matches = True
+            elif window_size == SizeMode.MINIMIZED and current_state == wb.SW_SHOWMINIMIZED:
+                desired_state_matches = True
+            elif (window_size == SizeMode.NORMAL and not was_maximized
+                  and current_state != wb.SW_SHOWMINIMIZED):
+                desired_state_matches = True
+
+            if rect is not None:
+                x, y, target_w, target_h = rect
+                # An arranged window is in place only in its own slot
+                already_on_target = (current_x, current_y) == (x, y) and (
+                    target_w is None or (w, h) == (target_w, target_h))
+                if target_w is not None:
+                    w, h = target_w, target_h
+            else:
+                x, y = default_position(target_monitor)
+
+            # Only skip if BOTH on target monitor AND in desired state
+            if already_on_target and desired_state_matches:
+                # Re-maximize if it was maximized and should stay maximized
+                if was_maximized and window_size == SizeMode.MAXIMIZED:
+                    self.backend.show_window(hwnd, wb.SW_MAXIMIZE)
+                return True
+
+            # Move window to target monitor
+            self.backend.set_window_pos(hwnd, x, y, w, h,
+                                        wb.SWP_NOZORDER | wb.SWP_SHOWWINDOW)
+            self.sleep(0.15)
+
+            # Apply size preference AFTER moving
+            if window_size == SizeMode.MAXIMIZED:
+                self.backend.show_window(hwnd, wb.SW_MAXIMIZE)
+                self.sleep(0.1)
+                return True  # Don't verify position for maximized windows
+            elif window_size == SizeMode.MINIMIZED:
+                self.backend.show_window(hwnd, wb.SW_MINIMIZE)
+                self.sleep(0.1)
+                return True  # Don't verify position for minimized windows
+
+            # Verify for normal windows only
+            new_rect = self.backend.get_window_rect(hwnd)
+            nx = new_rect[0]
+            ny = new_rect[1]
+
+            return target_monitor.contains(nx, ny)
+
+        except Exception as e:
+            self.log(f"  Move error: {e}")
+            return False
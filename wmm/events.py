@@ -0,0 +1,288 @@
+"""Window event sources and the dispatch queue the engine consumes
+
+An event source reports that a window was created, shown or destroyed, or
+asks for a full rescan. Sources push WindowEvents into a DispatchQueue, which
+coalesces bursts per hwnd (a new window typically fires create, show and
+several name changes within a few milliseconds) so the engine evaluates each
+window once.
+"""
+
+import sys
+import threading
+import time
+from collections import OrderedDict, namedtuple
+
+CREATED = 'created'
+SHOWN = 'shown'
+DESTROYED = 'destroyed'
+RESCAN = 'rescan'
+
+WindowEvent = namedtuple('WindowEvent', 'kind hwnd timestamp')
+
+
+class DispatchQueue:
+    """Thread-safe queue of pending events, coalesced per hwnd
+
+    A window event is held for `settle` seconds after the first event for
+    that hwnd so the rest of the burst folds into it. The coalesced event
+    keeps the first timestamp (for latency) and the latest kind.
+    """
+
+    def __init__(self, settle=0.02, clock=time.monotonic):
+        self.settle = settle
+        self.clock = clock
+        self._cond = threading.Condition()
+        self._pending = OrderedDict()  # hwnd (None for rescans) -> WindowEvent
+        self._closed = False
+        self._woken = False
+        self.received = 0
+        self.coalesced = 0
+
+    def put(self, event):
+        with self._cond:
+            self.received += 1
+            existing = self._pending.get(event.hwnd)
+            if existing is not None:
+                self.coalesced += 1
+                self._pending[event.hwnd] = existing._replace(kind=event.kind)
+            else:
+                self._pending[event.hwnd] = event
+            self._cond.notify()
+
+    def get_batch(self, timeout):
+        """Wait up to `timeout` seconds and return every settled event"""
+        with self._cond:
+            deadline = self.clock() + timeout
+            while not self._closed:
+                now = self.clock()
+                next_due = None
+                ready = []
+                for key, event in self._pending.items():
+                    due = event.timestamp if event.kind == RESCAN else event.timestamp + self.settle
+                    if due <= now:
+                        ready.append(key)
+                    elif next_due is None or due < next_due:
+                        next_due = due
+                # Settled events first: a wake only asks for a pass through the
+                # loop, and the batch is one
+                if ready or self._woken:
+                    self._woken = False
+                    return [self._pending.pop(key) for key in ready]
+
+                remaining = deadline - now
+                if remaining <= 0:
+                    return []
+                if next_due is not None:
+                    remaining = min(remaining, next_due - now)
+                self._cond.wait(remaining)
+            return []
+
+    def wake(self):
+        """Make a waiting get_batch return early (e.g. a move finished)"""
+        with self._cond:
+            self._woken = True
+            self._cond.notify_all()
+
+    def close(self):
+        """Wake any waiter and make get_batch return immediately"""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    def __len__(self):
+        return len(self._pending)
+
+
+class EventSource:
+    """Base class: start(sink) begins delivering WindowEvents to sink(event)"""
+
+    name = "base"
+
+    def start(self, sink):
+        raise NotImplementedError
+
+    def stop(self):
+        pass
+
+
+class PollingEventSource(EventSource):
+    """Requests a full rescan every `interval` seconds
+
+    On its own this is the polling fallback, with the interval adjusted by
+    the engine's scheduler. With an event-driven source it runs at a long
+    fixed interval as a safety net for missed events.
+    """
+
+    name = "polling"
+
+    def __init__(self, interval=0.5, clock=time.monotonic):
+        self.interval = interval
+        self.clock = clock
+        self._stopped = False
+        self._wake = threading.Event()
+        self._thread = None
+
+    def start(self, sink):
+        self._stopped = False
+        self._wake.clear()
+        self._thread = threading.Thread(target=self._run, args=(sink,), daemon=True)
+        self._thread.start()
+
+    def reschedule(self, interval):
+        """Change the interval, measured from the last rescan request"""
+        self.interval = interval
+        self._wake.set()
+
+    def _run(self, sink):
+        while not self._stopped:
+            last = self.clock()
+            sink(WindowEvent(RESCAN, None, last))
+            while not self._stopped:
+                remaining = last + self.interval - self.clock()
+                if remaining <= 0:
+                    break
+                self._wake.wait(remaining)
+                self._wake.clear()
+
+    def stop(self):
+        self._stopped = True
+        self._wake.set()
+
+
+class ScriptedEventSource(EventSource):
+    """Plays back a fixed list of (offset_seconds, kind, hwnd) events
+
+    Used to drive the engine against a FakeBackend. Events can also be
+    injected directly with emit() once the source is started.
+    """
+
+    name = "scripted"
+
+    def __init__(self, script=(), clock=time.monotonic):
+        self.script = sorted(script, key=lambda item: item[0])
+        self.clock = clock
+        self.finished = threading.Event()
+        self._stop = threading.Event()
+        self._sink = None
+
+    def start(self, sink):
+        self._sink = sink
+        self._stop.clear()
+        self.finished.clear()
+        threading.Thread(target=self._run, daemon=True).start()
+
+    def _run(self):
+        start = self.clock()
+        for offset, kind, hwnd in self.script:
+            delay = start + offset - self.clock()
+            if delay > 0 and self._stop.wait(delay):
+                break
+            self.emit(kind, hwnd)
+        self.finished.set()
+
+    def emit(self, kind, hwnd):
+        if self._sink is not None:
+            self._sink(WindowEvent(kind, hwnd, self.clock()))
+
+    def stop(self):
+        self._stop.set()
+        self._sink = None
+
+
+class WinEventHookSource(EventSource):
+    """Out-of-context SetWinEventHook for object create/destroy/show
+
+    The hook needs a message loop on the thread that installed it, so it
+    runs on its own thread and is stopped by posting WM_QUIT to it.
+    """
+
+    name = "winevent"
+
+    EVENT_OBJECT_CREATE = 0x8000
+    EVENT_OBJECT_DESTROY = 0x8001
+    EVENT_OBJECT_SHOW = 0x8002
+    WINEVENT_OUTOFCONTEXT = 0x0000
+    WINEVENT_SKIPOWNPROCESS = 0x0002
+    OBJID_WINDOW = 0
+    CHILDID_SELF = 0
+    WM_QUIT = 0x0012
+
+    KINDS = {
+        EVENT_OBJECT_CREATE: CREATED,
+        EVENT_OBJECT_DESTROY: DESTROYED,
+        EVENT_OBJECT_SHOW: SHOWN,
+    }
+
+    def __init__(self, clock=time.monotonic):
+        self.clock = clock
+        self._thread = None
+        self._thread_id = None
+        self._ready = threading.Event()
+
+    @staticmethod
+    def available():
+        return sys.platform == 'win32'
+
+    def start(self, sink):
+        self._ready.clear()
+        self._thread = threading.Thread(target=self._run, args=(sink,), daemon=True)
+        self._thread.start()
+        self._ready.wait(2.0)
+
+    def _run(self, sink):
+        import ctypes
+        from ctypes import wintypes
+
+        user32 = ctypes.windll.user32
+        kernel32 = ctypes.windll.kernel32
+
+        WinEventProc = ctypes.WINFUNCTYPE(
+            None,
+            wintypes.HANDLE,
+            wintypes.DWORD,
+            wintypes.HWND,
+            wintypes.LONG,
+            wintypes.LONG,
+            wintypes.DWORD,
+            wintypes.DWORD
+        )
+
+        kinds = self.KINDS
+        clock = self.clock
+
+        def callback(hook, event, hwnd, id_object, id_child, thread_id, time_ms):
+            # Only whole-window events, not carets, cursors or child objects
+            if hwnd and id_object == self.OBJID_WINDOW and id_child == self.CHILDID_SELF:
+                sink(WindowEvent(kinds[event], hwnd, clock()))
+
+        proc = WinEventProc(callback)
+        user32.SetWinEventHook.restype = wintypes.HANDLE
+        hook = user32.SetWinEventHook(
+            self.EVENT_OBJECT_CREATE, self.EVENT_OBJECT_SHOW,
+            None, proc, 0, 0,
+            self.WINEVENT_OUTOFCONTEXT | self.WINEVENT_SKIPOWNPROCESS)
+
+        self._thread_id = kernel32.GetCurrentThreadId()
+        self._ready.set()
+
+        try:
+            msg = wintypes.MSG()
+            while user32.GetMessageW(ctypes.byref(msg), None, 0, 0) > 0:
+                user32.TranslateMessage(ctypes.byref(msg))
+                user32.DispatchMessageW(ctypes.byref(msg))
+        finally:
+            if hook:
+                user32.UnhookWinEvent(hook)
+
+    def stop(self):
+        if self._thread_id is not None:
+            import ctypes
+            ctypes.windll.user32.PostThreadMessageW(self._thread_id, self.WM_QUIT, 0, 0)
+            self._thread_id = None
+
+
+def default_event_source():
+    """The best live event source on this platform, or None to poll only"""
+    if WinEventHookSource.available():
+        return WinEventHookSource()
+    return None
@@ -0,0 +1,1053 @@
+"""Tk user interface: rule editing, activity log and system tray
+
+Only imported when the GUI is requested; headless mode never loads Tk,
+pystray or PIL.
+"""
+
+import tkinter as tk
+from tkinter import ttk, messagebox, simpledialog
+import copy
+import importlib.util
+import queue
+import threading
+import os
+
+from . import backend as wb
+from .config import ConfigWatcher, load_profiles, save_config, validate_settings
+from .engine import PlacementEngine
+from .events import default_event_source
+from .logsink import LogSink, RotatingJsonlFile, format_record
+from .monitors import MonitorTopology
+from .process_cache import ProcessCache
+from .process_picker import ProcessIndex, ProcessLister
+from .profiles import DEFAULT_PROFILE
+from .profiling import NULL_PROFILER
+from .rules import MATCH_FIELDS
+from .stats_server import StatsServer
+from .trace import TraceRecorder
+
+# System tray libraries are optional and importing them (PIL especially)
+# costs more than the rest of startup. find_spec only checks they are
+# installed; load_tray_modules() imports them once the window is on screen.
+TRAY_AVAILABLE = (importlib.util.find_spec("pystray") is not None
+                  and importlib.util.find_spec("PIL") is not None)
+TRAY_IMPORT_ERROR = None if TRAY_AVAILABLE else "pystray and/or PIL not installed"
+pystray = None
+Image = None
+ImageDraw = None
+
+
+def load_tray_modules():
+    """Import pystray and PIL on first use; returns whether the tray is usable"""
+    global TRAY_AVAILABLE, TRAY_IMPORT_ERROR, pystray, Image, ImageDraw
+    if TRAY_AVAILABLE and pystray is None:
+        try:
+            import pystray as tray_module
+            from PIL import Image as image_module, ImageDraw as draw_module
+        except ImportError as e:
+            TRAY_AVAILABLE = False
+            TRAY_IMPORT_ERROR = str(e)
+        else:
+            pystray, Image, ImageDraw = tray_module, image_module, draw_module
+    return TRAY_AVAILABLE
+
+
+# Activity log: how often the Tk thread drains queued messages, and how many
+# lines the log widget keeps
+LOG_FLUSH_MS = 100
+LOG_MAX_LINES = 1000
+# How often the engine stats panel is redrawn
+STATS_REFRESH_MS = 1000
+# How often the config file is checked for changes made outside the app
+CONFIG_CHECK_MS = 1000
+
+
+# How often the Add Rule dialog takes process names from the lister thread
+PICKER_POLL_MS = 50
+# How long a control API request waits for the Tk thread
+CONTROL_TK_TIMEOUT = 10.0
+
+
+def ms(seconds):
+    return "-" if seconds is None else f"{seconds * 1000:.0f}ms"
+
+
+def format_stats(stats):
+    """Two-line summary of PlacementEngine.stats() for the stats panel"""
+    c = stats['counters']
+    g = stats['gauges']
+    h = stats['histograms']
+    enum = h['enumeration_seconds']
+    move = h['move_duration_seconds']
+    place = h['placement_latency_seconds']
+    return (f"Scans {c['scans']}  enum p50 {ms(enum['p50'])} p95 {ms(enum['p95'])}  "
+            f"windows scanned {c['windows_scanned']}  matches {c['rule_matches']}  "
+            f"API calls {g['scan_calls_last']}  events {c['events']}  queue {g['queue_depth']}\n"
+            f"Moves {c['moves_attempted']} (✓ {c['moves_succeeded']} ✗ {c['moves_failed']}, "
+            f"{g['moves_in_flight']} in flight)  move p50 {ms(move['p50'])} p95 {ms(move['p95'])}  "
+            f"placed p50 {ms(place['p50'])}  tracked {g['tracked_windows']}  "
+            f"retrying {g['retries_pending']}  gave up {g['windows_given_up']}"
+            + format_polling(stats))
+
+
+def format_polling(stats):
+    """Third stats panel line in polling mode: the rescan interval and why"""
+    if stats['mode'] != "polling":
+        return ""
+    scheduler = stats['poll_scheduler']
+    recent = "  ".join(f"{interval:g}s ({reason})"
+                       for _, interval, reason in scheduler['history'][-3:])
+    return (f"\nPolling every {scheduler['interval']:g}s ({scheduler['reason']})  "
+            f"{scheduler['changes']} changes" + (f"  recent: {recent}" if recent else ""))
+
+
+class AddRuleDialog:
+    def __init__(self, parent, callback, existing_rule=None, target_monitor=None,
+                 backend=None, process_cache=None, topology=None, process_lister=None):
+        self.window = tk.Toplevel(parent)
+        self.window.title("Add Rule - Drag to Target Monitor" if not existing_rule else "Edit Rule - Drag to Target Monitor")
+        
+        self.callback = callback
+        self.monitor_num = None
+        self.existing_rule = existing_rule
+        self.backend = backend or wb.Win32Backend()
+        if process_cache is None:
+            process_cache = ProcessCache(self.backend)
+        self.process_cache = process_cache
+        self.topology = topology or MonitorTopology(self.backend)
+        self.process_lister = process_lister or ProcessLister(self.backend, self.process_cache)
+        self.process_index = ProcessIndex()
+        self.process_batches = queue.Queue()
+        
+        # Position window on target monitor if provided
+        if target_monitor:
+            # Calculate center of target monitor
+            mon_width = target_monitor['right'] - target_monitor['left']
+            mon_height = target_monitor['bottom'] - target_monitor['top']
+            win_width = 500
+            win_height = 580
+            
+            x = target_monitor['left'] + (mon_width - win_width) // 2
+            y = target_monitor['top'] + (mon_height - win_height) // 2
+            
+            self.window.geometry(f"{win_width}x{win_height}+{x}+{y}")
+        else:
+            self.window.geometry("500x580")
+        
+        self.window.configure(bg='#FFD700')
+        
+        # Make window stay on top
+        self.window.attributes('-topmost', True)
+        
+        # Big instructions
+        instructions = tk.Label(self.window, 
+                              text="1. Select process from list or type name\n"
+                                   "2. DRAG THIS WINDOW to your target monitor\n"
+                                   "3. Choose window size behavior\n"
+                                   "4. Click Save\n"
+                                   "5. Click Start Monitoring when ready to activate all rules",
+                              font=("Arial", 11, "bold"),
+                              bg='#FFD700',
+                              fg='#000000',
+                              justify=tk.LEFT)
+        instructions.pack(pady=12, padx=20, anchor=tk.W)
+        
+        # Process selection
+        select_frame = tk.Frame(self.window, bg='#FFD700')
+        select_frame.pack(pady=10, padx=20, fill=tk.BOTH, expand=True)
+        
+        tk.Label(select_frame, text="Select Running Process:", 
+                font=("Arial", 10, "bold"), bg='#FFD700').pack(anchor=tk.W, pady=5)
+        
+        # Type-to-filter box for the process list
+        filter_frame = tk.Frame(select_frame, bg='#FFD700')
+        filter_frame.pack(fill=tk.X, pady=(0, 5))
+        tk.Label(filter_frame, text="Filter:", font=("Arial", 9),
+                bg='#FFD700').pack(side=tk.LEFT)
+        self.filter_text = tk.StringVar()
+        self.filter_text.trace_add('write', lambda *args: self.show_processes())
+        tk.Entry(filter_frame, textvariable=self.filter_text,
+                font=("Arial", 10)).pack(side=tk.LEFT, fill=tk.X, expand=True, padx=(5, 0))
+        self.list_status = tk.Label(filter_frame, text="", font=("Arial", 9), bg='#FFD700')
+        self.list_status.pack(side=tk.LEFT, padx=(5, 0))
+        
+        # Listbox with scrollbar for processes
+        list_frame = tk.Frame(select_frame, bg='#FFD700')
+        list_frame.pack(fill=tk.BOTH, expand=True)
+        
+        scrollbar = tk.Scrollbar(list_frame)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        
+        self.process_listbox = tk.Listbox(list_frame, 
+                                         yscrollcommand=scrollbar.set,
+                                         font=("Consolas", 9),
+                                         height=6)
+        self.process_listbox.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        scrollbar.config(command=self.process_listbox.yview)
+        
+        # Populate with running processes
+        self.populate_processes()
+        
+        # Manual entry option
+        tk.Label(select_frame, text="Or type manually:", 
+                font=("Arial", 10, "bold"), bg='#FFD700').pack(anchor=tk.W, pady=(10, 5))
+        
+        self.process_entry = tk.Entry(select_frame, font=("Arial", 10))
+        self.process_entry.pack(fill=tk.X)
+        
+        # Pre-fill if editing
+        if existing_rule:
+            self.process_entry.insert(0, existing_rule['process'])
+        
+        # Bind listbox selection to update entry
+        self.process_listbox.bind('<<ListboxSelect>>', self.on_process_select)
+        
+        # Window size options
+        size_frame = tk.Frame(self.window, bg='#FFD700')
+        size_frame.pack(pady=10, padx=20, fill=tk.X)
+        
+        tk.Label(size_frame, text="Window Size:", 
+                font=("Arial", 10, "bold"), bg='#FFD700').pack(anchor=tk.W, pady=5)
+        
+        self.window_size = tk.StringVar(value=existing_rule.get('size', 'normal') if existing_rule else 'normal')
+        
+        size_options = tk.Frame(size_frame, bg='#FFD700')
+        size_options.pack(fill=tk.X)
+        
+        tk.Radiobutton(size_options, text="Keep Current Size (default)", 
+                      variable=self.window_size, value="normal",
+                      bg='#FFD700', font=("Arial", 9),
+                      selectcolor='#FFD700').pack(anchor=tk.W)
+        
+        tk.Radiobutton(size_options, text="Maximize After Moving", 
+                      variable=self.window_size, value="maximized",
+                      bg='#FFD700', font=("Arial", 9),
+                      selectcolor='#FFD700').pack(anchor=tk.W)
+        
+        tk.Radiobutton(size_options, text="Minimize After Moving", 
+                      variable=self.window_size, value="minimized",
+                      bg='#FFD700', font=("Arial", 9),
+                      selectcolor='#FFD700').pack(anchor=tk.W)
+        
+        # Buttons
+        btn_frame = tk.Frame(self.window, bg='#FFD700')
+        btn_frame.pack(pady=15)
+        
+        tk.Button(btn_frame, text="💾 Save Rule", 
+                 command=self.save_rule,
+                 font=("Arial", 11, "bold"),
+                 bg='#4CAF50',
+                 fg='white',
+                 padx=20,
+                 pady=8).pack(side=tk.LEFT, padx=10)
+        
+        tk.Button(btn_frame, text="✖ Cancel", 
+                 command=self.window.destroy,
+                 font=("Arial", 11),
+                 bg='#f44336',
+                 fg='white',
+                 padx=20,
+                 pady=8).pack(side=tk.LEFT, padx=10)
+    
+    def populate_processes(self):
+        """Fill the process list without blocking the dialog
+
+        A list made in the last few seconds is shown straight away. Either
+        way a worker thread lists the processes again and the names are
+        added batch by batch as they arrive; once it is done, processes that
+        exited meanwhile are dropped.
+        """
+        names = self.process_lister.fresh()
+        if names is not None:
+            self.process_index.add(names)
+            self.show_processes()
+        self.list_status.config(text="loading...")
+        self.process_lister.start(self.process_batches.put)
+        self.window.after(PICKER_POLL_MS, self.receive_processes)
+    
+    def receive_processes(self):
+        """Add the batches the lister thread has sent so far (Tk thread)"""
+        if not self.window.winfo_exists():
+            return
+        done = False
+        changed = False
+        while True:
+            try:
+                batch = self.process_batches.get_nowait()
+            except queue.Empty:
+                break
+            if batch is None:
+                done = True
+                break
+            changed = bool(self.process_index.add(batch)) or changed
+        if done:
+            # The lister's new list, unless listing failed
+            listed = self.process_lister.fresh()
+            if listed is not None and self.process_index.retain(listed):
+                changed = True
+        if changed:
+            self.show_processes(keep_view=True)
+        if done:
+            self.list_status.config(text="")
+        else:
+            self.window.after(PICKER_POLL_MS, self.receive_processes)
+    
+    def show_processes(self, keep_view=False):
+        """Show the processes matching the filter box, prefix matches first
+
+        The selected name stays selected when the list is rebuilt; with
+        `keep_view` (a batch arrived while loading) the list isn't scrolled
+        back to the top either.
+        """
+        listbox = self.process_listbox
+        selection = listbox.curselection()
+        selected = listbox.get(selection[0]) if selection else None
+        top = listbox.yview()[0]
+        listbox.delete(0, tk.END)
+        for index, proc in enumerate(self.process_index.search(self.filter_text.get())):
+            listbox.insert(tk.END, proc)
+            if proc == selected:
+                listbox.selection_set(index)
+                listbox.activate(index)
+        if keep_view:
+            listbox.yview_moveto(top)
+    
+    def on_process_select(self, event):
+        """When user selects from listbox, update entry"""
+        selection = self.process_listbox.curselection()
+        if selection:
+            process = self.process_listbox.get(selection[0])
+            self.process_entry.delete(0, tk.END)
+            self.process_entry.insert(0, process)
+    
+    def save_rule(self):
+        process_name = self.process_entry.get().strip()
+        if not process_name:
+            messagebox.showwarning("Error", "Enter a process name")
+            return
+        
+        # Remove .exe if present
+        process_name = process_name.replace('.exe', '').replace('.EXE', '')
+        
+        # Get which monitor this window is on
+        monitor_num = self.get_monitor_number()
+        
+        # Get window size preference
+        window_size = self.window_size.get()
+        
+        if monitor_num:
+            self.callback(process_name, monitor_num, window_size, self.existing_rule)
+            self.window.destroy()
+        else:
+            messagebox.showerror("Error", "Could not detect monitor")
+    
+    def get_monitor_number(self):
+        """Detect which monitor this window is on"""
+        # Get window position
+        x = self.window.winfo_x()
+        y = self.window.winfo_y()
+        
+        return self.topology.monitor_at(x, y)
+
+
+class TkControlStore:
+    """The app's profiles for the control API (see control.py)
+
+    The server calls read() and write() on its own threads; both run on the
+    Tk thread, which owns the rule lists and the widgets showing them.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    def _on_tk(self, fn, *args):
+        done = threading.Event()
+        outcome = []
+
+        def run():
+            try:
+                outcome.append((fn(*args), None))
+            except Exception as e:
+                outcome.append((None, e))
+            done.set()
+
+        self.app.root.after(0, run)
+        if not done.wait(CONTROL_TK_TIMEOUT):
+            raise TimeoutError("the window is not responding")
+        result, error = outcome[0]
+        if error is not None:
+            raise error
+        return result
+
+    def read(self):
+        return self._on_tk(self.app.control_snapshot)
+
+    def write(self, profiles, active):
+        self._on_tk(self.app.apply_control_change, profiles, active)
+
+
+class WindowMoverApp:
+    def __init__(self, root, config_file="window_mover_config.json", profiler=None,
+                 stats_port=None, trace_file=None, profile=None, control_address=None):
+        self.root = root
+        self.profiler = profiler or NULL_PROFILER
+        self.root.title("Window Monitor Mover")
+        self.root.geometry("700x700")
+        
+        self.monitoring = False
+        self.rules = []
+        self.settings = {}
+        # Layout profiles: name -> rule list; self.rules is the active one's
+        self.profiles = {DEFAULT_PROFILE: self.rules}
+        self.profile = DEFAULT_PROFILE
+        self.start_profile = profile  # --profile
+        self.log_sink = LogSink()
+        with self.profiler.phase("backend + engine"):
+            self.backend = wb.Win32Backend()
+            self.process_cache = ProcessCache(self.backend)
+            self.topology = MonitorTopology(self.backend)
+            self.process_lister = ProcessLister(self.backend, self.process_cache)
+            self.engine = PlacementEngine(self.backend, log=self.log,
+                                          process_cache=self.process_cache,
+                                          event_source=default_event_source(),
+                                          topology=self.topology)
+            self.recorder = None
+            if trace_file:
+                # --record-trace: everything the engine observes, for replay
+                self.recorder = TraceRecorder(trace_file, self.backend)
+                self.recorder.attach(self.engine)
+        self.config_file = config_file
+        self.config_watcher = ConfigWatcher(config_file)
+        self.stats_port = stats_port  # --stats-port, overrides the setting
+        self.stats_server = None
+        self.control_address = control_address  # --control, overrides the setting
+        self.control_server = None
+        self.tray_icon = None
+        # Stays False until finish_startup() has loaded the tray libraries
+        self.tray_available = False
+        self.icon_images = {}
+        
+        # Handle window close event
+        self.root.protocol("WM_DELETE_WINDOW", self.on_closing)
+        
+        with self.profiler.phase("build UI"):
+            self.setup_ui()
+        with self.profiler.phase("load config"):
+            self.load_config()
+        if self.stats_port:
+            # No-op if load_config already started it
+            self.start_stats_server(self.stats_port)
+        if self.control_address:
+            self.start_control_server(self.control_address)
+        self.flush_log()
+        self.refresh_stats()
+        self.root.after(CONFIG_CHECK_MS, self.check_config)
+        
+        # Tray and taskbar icons wait until the window has been drawn
+        self.init_finished = self.profiler.clock()
+        self.root.after_idle(self.finish_startup)
+        
+        # Auto-start monitoring if rules exist
+        if self.rules:
+            self.log("Auto-starting monitoring (rules found)")
+            self.root.after(500, self.start_monitoring)  # Small delay to ensure UI is ready
+        
+    def setup_ui(self):
+        # Header with Exit button
+        header = ttk.Frame(self.root, padding="10")
+        header.pack(fill=tk.X)
+        
+        # Title in center
+        title_frame = ttk.Frame(header)
+        title_frame.pack(expand=True)
+        
+        ttk.Label(title_frame, text="Window Monitor Mover", 
+                 font=("Segoe UI", 16, "bold")).pack()
+        ttk.Label(title_frame, text="Automatically move application windows to specified monitors", 
+                 font=("Segoe UI", 9)).pack()
+        
+        # Exit button in top-right
+        exit_btn = ttk.Button(header, text="✖ Exit", command=self.quit_app, width=8)
+        exit_btn.place(relx=1.0, rely=0, anchor='ne')
+        
+        # Rules List
+        list_frame = ttk.LabelFrame(self.root, text="Active Rules", padding="10")
+        list_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=5)
+        
+        # Layout profile selector
+        profile_row = ttk.Frame(list_frame)
+        profile_row.pack(fill=tk.X, pady=(0, 5))
+        ttk.Label(profile_row, text="Profile:").pack(side=tk.LEFT)
+        self.profile_var = tk.StringVar(value=self.profile)
+        self.profile_combo = ttk.Combobox(profile_row, textvariable=self.profile_var,
+                                          state='readonly', width=24)
+        self.profile_combo.pack(side=tk.LEFT, padx=5)
+        self.profile_combo.bind('<<ComboboxSelected>>',
+                                lambda e: self.switch_profile(self.profile_var.get()))
+        ttk.Button(profile_row, text="➕ New Profile",
+                  command=self.new_profile).pack(side=tk.LEFT, padx=5)
+        
+        list_container = ttk.Frame(list_frame)
+        list_container.pack(fill=tk.BOTH, expand=True)
+        
+        scrollbar = ttk.Scrollbar(list_container)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        
+        self.rules_listbox = tk.Listbox(list_container, 
+                                        yscrollcommand=scrollbar.set,
+                                        font=("Consolas", 10))
+        self.rules_listbox.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        scrollbar.config(command=self.rules_listbox.yview)
+        
+        # Rule management buttons
+        btn_row = ttk.Frame(list_frame)
+        btn_row.pack(fill=tk.X, pady=5)
+        
+        ttk.Button(btn_row, text="➕ Add New Rule", 
+                  command=self.show_add_rule_dialog).pack(side=tk.LEFT, padx=5)
+        ttk.Button(btn_row, text="✏️ Edit Selected", 
+                  command=self.edit_rule).pack(side=tk.LEFT, padx=5)
+        ttk.Button(btn_row, text="🗑 Remove Selected", 
+                  command=self.remove_rule).pack(side=tk.LEFT, padx=5)
+        
+        # Note at bottom of Active Rules section
+        note_label = ttk.Label(list_frame, 
+                              text="Note: Monitor numbers are assigned by the app and may differ from Windows Display Settings", 
+                              font=("Segoe UI", 8), 
+                              foreground="gray")
+        note_label.pack(pady=(5, 0))
+        
+        # Control Panel
+        control_frame = ttk.Frame(self.root, padding="10")
+        control_frame.pack(fill=tk.X)
+        
+        self.start_btn = ttk.Button(control_frame, text="▶ Start Monitoring",
+                                    command=self.start_monitoring)
+        self.start_btn.pack(side=tk.LEFT, padx=5)
+        
+        self.stop_btn = ttk.Button(control_frame, text="⬛ Stop Monitoring",
+                                   command=self.stop_monitoring,
+                                   state=tk.DISABLED)
+        self.stop_btn.pack(side=tk.LEFT, padx=5)
+        
+        ttk.Button(control_frame, text="🔄 Restart Monitoring",
+                  command=self.restart_monitoring).pack(side=tk.LEFT, padx=5)
+        
+        ttk.Button(control_frame, text="📐 Apply Layout Now",
+                  command=self.apply_layout_now).pack(side=tk.LEFT, padx=5)
+        
+        ttk.Button(control_frame, text="Clear Log",
+                  command=self.clear_log).pack(side=tk.LEFT, padx=5)
+        
+        self.status_label = ttk.Label(control_frame, text="⚫ Not Monitoring",
+                                     font=("Segoe UI", 10))
+        self.status_label.pack(side=tk.LEFT, padx=20)
+        
+        # Engine stats
+        stats_frame = ttk.LabelFrame(self.root, text="Engine Stats", padding="5")
+        stats_frame.pack(fill=tk.X, padx=10, pady=5)
+        
+        self.stats_label = ttk.Label(stats_frame, text="", font=("Consolas", 8),
+                                     justify=tk.LEFT)
+        self.stats_label.pack(anchor='w')
+        
+        # Log
+        log_frame = ttk.LabelFrame(self.root, text="Activity Log", padding="10")
+        log_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=5)
+        
+        log_scroll = ttk.Scrollbar(log_frame)
+        log_scroll.pack(side=tk.RIGHT, fill=tk.Y)
+        
+        self.log_text = tk.Text(log_frame, height=6, wrap=tk.WORD,
+                               yscrollcommand=log_scroll.set,
+                               font=("Consolas", 9))
+        self.log_text.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        log_scroll.config(command=self.log_text.yview)
+        
+    def log(self, msg):
+        """Queue a log message; safe to call from any thread"""
+        self.log_sink.log(msg)
+    
+    def flush_log(self):
+        """Drain queued log messages into the log widget (Tk thread only)"""
+        records = self.log_sink.drain()
+        if records:
+            self.log_text.insert(tk.END, ''.join(format_record(r) for r in records))
+            
+            # Keep only the newest LOG_MAX_LINES lines
+            lines = int(self.log_text.index('end-1c').split('.')[0])
+            if lines > LOG_MAX_LINES:
+                self.log_text.delete('1.0', f"{lines - LOG_MAX_LINES + 1}.0")
+            self.log_text.see(tk.END)
+        
+        self.root.after(LOG_FLUSH_MS, self.flush_log)
+        
+    def clear_log(self):
+        self.log_text.delete(1.0, tk.END)
+    
+    def refresh_stats(self):
+        """Redraw the stats panel (Tk thread only)"""
+        self.stats_label.config(text=format_stats(self.engine.stats()))
+        self.root.after(STATS_REFRESH_MS, self.refresh_stats)
+    
+    def start_stats_server(self, port):
+        """Serve engine stats on localhost:port, replacing any running server"""
+        if self.stats_server is not None:
+            if self.stats_server.port == port:
+                return
+            self.stats_server.stop()
+            self.stats_server = None
+        try:
+            server = StatsServer(self.engine.stats, port)
+            server.start()
+        except OSError as e:
+            self.log(f"Stats endpoint unavailable on port {port}: {e}")
+            return
+        self.stats_server = server
+        self.log(f"Stats endpoint: {server.url}stats and {server.url}metrics")
+    
+    def start_control_server(self, address):
+        """Serve the control API on `address` (True: the default one), replacing any running server"""
+        from .control import ControlServer, default_address  # imports multiprocessing; only when used
+        address = default_address() if address is True else address
+        if self.control_server is not None:
+            if self.control_server.address == address:
+                return
+            self.control_server.stop()
+            self.control_server = None
+        server = ControlServer(self.engine, TkControlStore(self), address, log=self.log)
+        try:
+            server.start()
+        except OSError as e:
+            self.log(f"Control API unavailable on {address}: {e}")
+            return
+        self.control_server = server
+        self.log(f"Control API: {address}")
+    
+    def control_snapshot(self):
+        """Copies of the profiles and the active name, for the control API (Tk thread)"""
+        return copy.deepcopy(self.profiles), self.profile
+    
+    def apply_control_change(self, profiles, active):
+        """Use profiles edited through the control API (Tk thread)"""
+        from .control import apply_profiles
+        old = self.profiles
+        self.profiles = profiles
+        self.profile = active
+        self.rules = profiles[active]
+        apply_profiles(self.engine, old, profiles, active)
+        self.show_rules()
+        self.save_config()
+        if self.tray_icon:
+            self.tray_icon.update_menu()
+    
+    def show_add_rule_dialog(self):
+        """Show the drag-to-target dialog"""
+        AddRuleDialog(self.root, self.add_rule_callback,
+                      backend=self.backend, process_cache=self.process_cache,
+                      topology=self.topology, process_lister=self.process_lister)
+    
+    def edit_rule(self):
+        """Edit selected rule"""
+        sel = self.rules_listbox.curselection()
+        if not sel:
+            messagebox.showwarning("Error", "Select a rule to edit")
+            return
+        
+        idx = sel[0]
+        rule = self.rules[idx]
+        
+        # Show dialog with existing rule, positioned on rule's target monitor
+        AddRuleDialog(self.root, self.add_rule_callback, rule, rule['monitor'],
+                      backend=self.backend, process_cache=self.process_cache,
+                      topology=self.topology, process_lister=self.process_lister)
+    
+    def rule_display_text(self, rule, monitor_num):
+        """Text for a rule in the rules list"""
+        size = rule.get('size', 'normal')
+        size_icon = ""
+        if size == "maximized":
+            size_icon = " [MAX]"
+        elif size == "minimized":
+            size_icon = " [MIN]"
+        if rule.get('arrange'):
+            size_icon += f" [{rule['arrange']}]"
+        
+        # Title/class/path conditions (config-file only) shown after the name
+        conditions = "".join(f" [{field}: {rule[field]}]" for field in MATCH_FIELDS if rule.get(field))
+        
+        return f"{rule['process']:25} → Monitor {monitor_num}{size_icon}{conditions}"
+    
+    def add_rule_callback(self, process_name, monitor_info, window_size, existing_rule=None):
+        """Called when user saves a rule from the dialog"""
+        monitor_num = monitor_info['number']
+        monitor_pos = monitor_info['info']
+        
+        rule = {
+            "process": process_name,
+            # Bounds plus device name and number, to find the monitor again
+            # if the display layout changes
+            "monitor": dict(monitor_pos, number=monitor_num),
+            "size": window_size      # Store window size preference
+        }
+        
+        # Check for duplicates and update
+        existing_idx = None
+        for i, rule_i in enumerate(self.rules):
+            if rule_i is existing_rule:
+                existing_idx = i
+                break
+        if existing_idx is None:
+            for i, rule_i in enumerate(self.rules):
+                if (rule_i['process'].lower() == process_name.lower() and
+                        not any(rule_i.get(field) for field in MATCH_FIELDS)):
+                    existing_idx = i
+                    break
+        
+        if existing_idx is not None:
+            # Keep match conditions and priority that the dialog doesn't edit
+            for key, value in self.rules[existing_idx].items():
+                rule.setdefault(key, value)
+        
+        display_text = self.rule_display_text(rule, monitor_num)
+        
+        if existing_idx is not None:
+            # Update existing rule
+            self.rules[existing_idx] = rule
+            self.rules_listbox.delete(existing_idx)
+            self.rules_listbox.insert(existing_idx, display_text)
+            self.log(f"Updated: {process_name} → Monitor {monitor_num} ({window_size})")
+        else:
+            # Add new rule
+            self.rules.append(rule)
+            self.rules_listbox.insert(tk.END, display_text)
+            self.log(f"Added: {process_name} → Monitor {monitor_num} ({window_size})")
+        
+        self.engine.update_profile(self.profile, self.rules)
+        self.save_config()
+    
+    def restart_monitoring(self):
+        """Restart monitoring (useful after changing rules)"""
+        if self.monitoring:
+            self.stop_monitoring()
+        self.start_monitoring()
+            
+    def apply_layout_now(self):
+        """Re-place every matched window in one batch (result goes to the log)"""
+        if not self.rules:
+            messagebox.showwarning("Error", "Add at least one rule first")
+            return
+        self.log("Applying layout...")
+        if self.monitoring:
+            self.engine.request_layout()
+            return
+        # No engine thread to hand it to: place the windows here, on the Tk
+        # thread, so Start can't begin a run halfway through the pass
+        self.root.config(cursor="watch")
+        self.root.update_idletasks()
+        try:
+            self.log(self.engine.apply_layout().format())
+        except Exception as e:
+            self.log(f"Apply layout error: {e}")
+        finally:
+            self.root.config(cursor="")
+            
+    def remove_rule(self):
+        sel = self.rules_listbox.curselection()
+        if not sel:
+            messagebox.showwarning("Error", "Select a rule to remove")
+            return
+        
+        idx = sel[0]
+        rule = self.rules[idx]
+        self.rules.pop(idx)
+        self.rules_listbox.delete(idx)
+        self.engine.update_profile(self.profile, self.rules)
+        self.save_config()
+        self.log(f"Removed: {rule['process']}")
+        
+    def save_config(self):
+        try:
+            save_config(self.config_file, self.rules, self.settings, self.profiles, self.profile)
+            self.config_watcher.mark_saved()
+        except Exception as e:
+            self.log(f"Save error: {e}")
+            
+    def load_config(self):
+        if os.path.exists(self.config_file):
+            try:
+                profiles, active, settings = load_profiles(self.config_file)
+                self.config_watcher.mark_saved()
+                if self.start_profile:
+                    if self.start_profile in profiles:
+                        active = self.start_profile
+                    else:
+                        self.log(f"No profile named {self.start_profile}, using {active}")
+                self.apply_config(settings, profiles, active)
+                self.log(f"Loaded {len(self.rules)} rules"
+                         + (f" (profile {active})" if len(profiles) > 1 else ""))
+            except Exception as e:
+                self.log(f"Load error: {e}")
+    
+    def check_config(self):
+        """Pick up edits to the config file made outside the app (Tk thread)"""
+        try:
+            change = self.config_watcher.check()
+            if change is not None:
+                profiles, active = self.config_watcher.profiles
+                # The profile in use stays active if the new config still has it
+                if self.profile in profiles:
+                    active = self.profile
+                self.apply_config(change[1], profiles, active)
+                self.log(f"Config changed on disk: reloaded {len(self.rules)} rules")
+        except Exception as e:
+            self.log(f"Config reload error: {e}")
+        self.root.after(CONFIG_CHECK_MS, self.check_config)
+    
+    def apply_config(self, settings, profiles, active):
+        """Use loaded settings and profiles ({name: rules}); the engine keeps running"""
+        merged = validate_settings(settings)
+        self.settings = settings
+        self.profiles = profiles
+        self.profile = active
+        self.rules = profiles[active]
+        
+        self.engine.scheduler.set_bounds(merged['poll_min_interval'],
+                                         merged['poll_max_interval'])
+        self.engine.retries.configure(merged['move_max_attempts'], merged['move_retry_delay'])
+        if merged['log_file']:
+            self.log_sink.jsonl = RotatingJsonlFile(merged['log_file'],
+                                                    merged['log_max_bytes'],
+                                                    merged['log_backups'])
+        stats_port = self.stats_port or merged['stats_port']
+        if stats_port:
+            self.start_stats_server(stats_port)
+        control_address = self.control_address or merged['control_address']
+        if control_address:
+            self.start_control_server(control_address)
+        
+        self.show_rules()
+        # Every profile is compiled now, so switching later is instant
+        self.engine.set_profiles(self.profiles, self.profile)
+    
+    def show_rules(self):
+        """Fill the rules list and profile selector from the active profile"""
+        self.rules_listbox.delete(0, tk.END)
+        for rule in self.rules:
+            # Determine monitor number from position
+            mon_num = self.get_monitor_number_from_bounds(rule['monitor'])
+            self.rules_listbox.insert(tk.END, self.rule_display_text(rule, mon_num))
+        self.profile_combo['values'] = list(self.profiles)
+        self.profile_var.set(self.profile)
+    
+    def switch_profile(self, name):
+        """Make another layout profile active; its windows are placed in one pass"""
+        if name == self.profile or name not in self.profiles:
+            return
+        self.engine.switch_profile(name)
+        self.profile = name
+        self.rules = self.profiles[name]
+        self.show_rules()
+        self.save_config()
+        self.log(f"Switched to profile {name} ({len(self.rules)} rules)")
+        if self.tray_icon:
+            self.tray_icon.update_menu()
+    
+    def new_profile(self):
+        """Add a profile, starting as a copy of the active one, and switch to it"""
+        name = simpledialog.askstring("New Profile",
+                                      "Name for the new profile\n(it starts as a copy of the current rules):",
+                                      parent=self.root)
+        name = (name or "").strip()
+        if not name:
+            return
+        if name in self.profiles:
+            messagebox.showwarning("Error", f"There is already a profile named {name}")
+            return
+        self.profiles[name] = copy.deepcopy(self.rules)
+        self.engine.update_profile(name, self.profiles[name])
+        self.switch_profile(name)
+    
+    def get_monitor_number_from_bounds(self, target_monitor):
+        """Current number of a rule's monitor, found by device name and resolution"""
+        found = self.topology.resolve(target_monitor)
+        return found['number'] if found else "?"
+    
+    def get_all_monitors(self):
+        """Get all monitors"""
+        return self.topology.monitors()
+            
+    def start_monitoring(self):
+        if not self.rules:
+            messagebox.showwarning("Error", "Add at least one rule first")
+            return
+        
+        self.monitoring = True
+        self.engine.start()
+        
+        self.start_btn.config(state=tk.DISABLED)
+        self.stop_btn.config(state=tk.NORMAL)
+        self.status_label.config(text="🟢 Monitoring Active", foreground="green")
+        
+        # Update both tray and taskbar icons to green
+        self.update_tray_icon(True)
+        self.update_taskbar_icon(True)
+        
+    def stop_monitoring(self):
+        self.monitoring = False
+        self.engine.stop()
+        # Let the engine thread wind down (it shuts the move pipeline down on
+        # its way out) before a new one can be started
+        self.engine.join(2.0)
+        self.start_btn.config(state=tk.NORMAL)
+        self.stop_btn.config(state=tk.DISABLED)
+        self.status_label.config(text="⚫ Not Monitoring", foreground="black")
+        
+        # Update both tray and taskbar icons to red
+        self.update_tray_icon(False)
+        self.update_taskbar_icon(False)
+    
+    def finish_startup(self):
+        """Deferred part of startup: runs once the main window is on screen"""
+        self.profiler.mark("first frame", self.init_finished)
+        
+        with self.profiler.phase("import tray libraries"):
+            self.tray_available = load_tray_modules()
+        if self.tray_available:
+            self.log("System tray support enabled")
+            with self.profiler.phase("tray + taskbar icons"):
+                self.create_tray_icon()
+                self.update_taskbar_icon(self.monitoring)
+        else:
+            self.log(f"Warning: system tray not available ({TRAY_IMPORT_ERROR})")
+            self.log("Install with: pip install pystray pillow")
+        
+        self.profiler.report()
+    
+    def icon_image(self, size, monitoring):
+        """Colored circle icon, built once per size and state"""
+        key = (size, monitoring)
+        if key not in self.icon_images:
+            # Green = monitoring active, Red = stopped
+            color, outline = ('#4CAF50', '#2E7D32') if monitoring else ('#f44336', '#C62828')
+            inset = size // 8
+            img = Image.new('RGB', (size, size), color='white')
+            draw = ImageDraw.Draw(img)
+            draw.ellipse([inset, inset, size - inset, size - inset], fill=color, outline=outline)
+            self.icon_images[key] = img
+        return self.icon_images[key]
+    
+    def create_tray_icon(self):
+        """Create system tray icon"""
+        if not self.tray_available:
+            return
+        
+        icon_image = self.icon_image(64, self.monitoring)
+        
+        # Create menu
+        menu = pystray.Menu(
+            pystray.MenuItem("Show Window", self.show_window, default=True),  # default=True makes it double-click action
+            pystray.MenuItem("Start Monitoring", self.start_monitoring_from_tray, 
+                           visible=lambda item: not self.monitoring),
+            pystray.MenuItem("Stop Monitoring", self.stop_monitoring_from_tray,
+                           visible=lambda item: self.monitoring),
+            pystray.MenuItem("Apply Layout Now", self.apply_layout_from_tray),
+            pystray.MenuItem("Profile", pystray.Menu(self.profile_menu_items),
+                           visible=lambda item: len(self.profiles) > 1),
+            pystray.Menu.SEPARATOR,
+            pystray.MenuItem("Exit", self.quit_app)
+        )
+        
+        self.tray_icon = pystray.Icon("WindowMover", icon_image, 
+                                      "Window Monitor Mover", menu)
+        
+        # Run tray icon in separate thread
+        threading.Thread(target=self.tray_icon.run, daemon=True).start()
+    
+    def update_tray_icon(self, monitoring):
+        """Update tray icon color based on monitoring state"""
+        if not self.tray_available or not self.tray_icon:
+            return
+        
+        self.tray_icon.icon = self.icon_image(64, monitoring)
+    
+    def update_taskbar_icon(self, monitoring):
+        """Update taskbar icon color based on monitoring state"""
+        if not self.tray_available:
+            return
+        
+        try:
+            icon_img = self.icon_image(32, monitoring)
+            
+            # Save to temp file and set as icon
+            temp_icon_path = "temp_icon.ico"
+            icon_img.save(temp_icon_path, format="ICO")
+            self.root.iconbitmap(temp_icon_path)
+            
+        except Exception as e:
+            # If setting icon fails, just continue without it
+            pass
+    
+    def on_closing(self):
+        """Handle window close - minimize to tray instead"""
+        if self.tray_available and self.tray_icon:
+            self.root.withdraw()  # Hide window
+            self.tray_icon.notify("Window Monitor Mover is running in the system tray", 
+                                 "Window Monitor Mover")
+        else:
+            # If no tray available, just minimize normally
+            self.root.iconify()
+    
+    def show_window(self):
+        """Show window from tray"""
+        self.root.deiconify()  # Show window
+        self.root.lift()  # Bring to front
+        self.root.focus_force()
+    
+    def start_monitoring_from_tray(self):
+        """Start monitoring from tray menu"""
+        self.root.after(0, self.start_monitoring)
+    
+    def stop_monitoring_from_tray(self):
+        """Stop monitoring from tray menu"""
+        self.root.after(0, self.stop_monitoring)
+    
+    def apply_layout_from_tray(self):
+        """Apply layout from tray menu"""
+        self.root.after(0, self.apply_layout_now)
+    
+    def profile_menu_items(self):
+        """Tray submenu: one radio item per profile"""
+        for name in list(self.profiles):
+            yield pystray.MenuItem(name, self.switch_profile_from_tray, radio=True,
+                                   checked=lambda item, name=name: self.profile == name)
+    
+    def switch_profile_from_tray(self, icon, item):
+        """Switch profile from tray menu"""
+        self.root.after(0, self.switch_profile, str(item))
+    
+    def quit_app(self):
+        """Completely quit the application"""
+        self.monitoring = False
+        self.engine.stop()
+        if self.recorder:
+            self.engine.join(2.0)
+            self.recorder.close()
+        if self.stats_server:
+            self.stats_server.stop()
+        if self.control_server:
+            self.control_server.stop()
+        if self.tray_icon:
+            self.tray_icon.stop()
+        self.root.quit()
+        self.root.destroy()
+
+
+def main(config_file="window_mover_config.json", profiler=None, stats_port=None,
+         trace_file=None, profile=None, control_address=None):
+    profiler = profiler or NULL_PROFILER
+    with profiler.phase("Tk root"):
+        root = tk.Tk()
+    app = WindowMoverApp(root, config_file, profiler, stats_port, trace_file, profile,
+                         control_address)
+    root.mainloop()
\ No newline at end of file
@@ -0,0 +1,219 @@
+"""Headless daemon: the placement engine without Tk, pystray or PIL
+
+    python -m window_mover --headless --config path.json [--log-file log.jsonl]
+    python -m window_mover --apply-layout --config path.json
+
+Logs go to stdout (and to the JSON-lines log file if configured). SIGINT,
+SIGTERM and, on Windows, SIGBREAK (Ctrl+Break) stop the engine cleanly.
+With --stats-port (or the stats_port setting) engine stats are served on
+localhost as JSON and Prometheus text. With --control (or the
+control_address setting) scripts can change rules and trigger placement
+through the local control API (see control.py). Edits to the config file
+are picked up while running, without restarting the engine. --record-trace
+writes a desktop trace for benchmarks/replay_trace.py (see trace.py).
+
+--apply-layout places every matched window once, in one batch, and exits;
+handy as a docking-station hook. --profile picks the layout profile to run
+or apply instead of the one the config marks active.
+"""
+
+import signal
+import sys
+import threading
+import time
+
+from . import backend as wb
+from .config import ConfigWatcher, load_profiles, validate_settings
+from .engine import PlacementEngine
+from .events import default_event_source
+from .logsink import LogSink, RotatingJsonlFile, format_record
+from .profiling import NULL_PROFILER
+from .stats_server import StatsServer
+from .trace import TraceRecorder
+
+# How often queued log records are written out
+LOG_FLUSH_INTERVAL = 0.2
+# How often the config file is checked for changes
+CONFIG_CHECK_INTERVAL = 1.0
+
+
+def flush_log(sink, stream):
+    records = sink.drain()
+    if records:
+        stream.write(''.join(format_record(r) for r in records))
+        stream.flush()
+
+
+def reload_config(engine, sink, watcher, config_file, store=None):
+    """Apply a changed config file to the running engine"""
+    try:
+        change = watcher.check()
+        if change is None:
+            return
+        settings = validate_settings(change[1])
+    except (OSError, ValueError) as e:
+        sink.log(f"Could not reload {config_file}: {e}", level='error')
+        return
+    if store is not None:
+        store.settings = change[1]
+    engine.scheduler.set_bounds(settings['poll_min_interval'], settings['poll_max_interval'])
+    engine.retries.configure(settings['move_max_attempts'], settings['move_retry_delay'])
+    profiles, active = watcher.profiles
+    # The profile in use stays active if the new config still has it
+    profile = engine.profile if engine.profile in profiles else active
+    engine.set_profiles(profiles, profile)
+    sink.log(f"Config changed on disk: reloaded {len(profiles[profile])} rules (profile {profile})")
+
+
+def choose_profile(profiles, active, profile, stream):
+    """Name of the profile to use, or None (after saying why) if it doesn't exist"""
+    profile = profile or active
+    if profile not in profiles:
+        stream.write(f"No profile named {profile!r}; the config has {', '.join(profiles)}\n")
+        return None
+    return profile
+
+
+def apply_once(config_file, backend=None, stream=None, profile=None):
+    """Apply the layout once and exit; returns 1 if any window failed"""
+    stream = stream or sys.stdout
+    try:
+        profiles, active, _settings = load_profiles(config_file)
+    except (OSError, ValueError) as e:
+        stream.write(f"Could not load {config_file}: {e}\n")
+        return 1
+    profile = choose_profile(profiles, active, profile, stream)
+    if profile is None:
+        return 1
+    rules = profiles[profile]
+
+    if backend is None:
+        try:
+            backend = wb.Win32Backend()
+        except ImportError as e:
+            stream.write(f"Windows desktop access unavailable ({e}); install pywin32 and psutil\n")
+            return 1
+
+    engine = PlacementEngine(backend, rules, log=lambda msg: stream.write(msg + "\n"))
+    report = engine.apply_layout()
+    stream.write(report.format() + "\n")
+    return 1 if report.failed else 0
+
+
+def run(config_file, log_file=None, backend=None, stream=None, profiler=None,
+        stats_port=None, trace_file=None, profile=None, control_address=None):
+    """Run the engine until a stop signal arrives; returns an exit code"""
+    stream = stream or sys.stdout
+    profiler = profiler or NULL_PROFILER
+    sink = LogSink()
+
+    watcher = ConfigWatcher(config_file)
+    try:
+        with profiler.phase("load config"):
+            profiles, active, file_settings = load_profiles(config_file)
+            settings = validate_settings(file_settings)
+    except (OSError, ValueError) as e:
+        stream.write(f"Could not load {config_file}: {e}\n")
+        return 1
+    profile = choose_profile(profiles, active, profile, stream)
+    if profile is None:
+        return 1
+    rules = profiles[profile]
+
+    log_file = log_file or settings['log_file']
+    if log_file:
+        sink.jsonl = RotatingJsonlFile(log_file, settings['log_max_bytes'], settings['log_backups'])
+
+    if not rules:
+        stream.write(f"No rules in {config_file}\n")
+        return 1
+
+    if backend is None:
+        try:
+            with profiler.phase("backend"):
+                backend = wb.Win32Backend()
+        except ImportError as e:
+            stream.write(f"Windows desktop access unavailable ({e}); install pywin32 and psutil\n")
+            return 1
+
+    with profiler.phase("engine"):
+        engine = PlacementEngine(backend, log=sink.log, event_source=default_event_source())
+        engine.set_profiles(profiles, profile)
+        engine.scheduler.set_bounds(settings['poll_min_interval'], settings['poll_max_interval'])
+        engine.retries.configure(settings['move_max_attempts'], settings['move_retry_delay'])
+
+    recorder = None
+    if trace_file:
+        try:
+            recorder = TraceRecorder(trace_file, backend)
+        except OSError as e:
+            stream.write(f"Could not record a trace to {trace_file}: {e}\n")
+            return 1
+        recorder.attach(engine)
+        sink.log(f"Recording a trace to {trace_file}")
+
+    stop = threading.Event()
+
+    def request_stop(signum, frame):
+        sink.log(f"Received signal {signum}, stopping")
+        stop.set()
+
+    for name in ('SIGINT', 'SIGTERM', 'SIGBREAK'):
+        if hasattr(signal, name):
+            signal.signal(getattr(signal, name), request_stop)
+
+    stats_server = control_server = store = None
+    try:
+        stats_port = stats_port or settings['stats_port']
+        if stats_port:
+            server = StatsServer(engine.stats, stats_port)
+            try:
+                server.start()
+            except OSError as e:
+                stream.write(f"Could not serve stats on port {stats_port}: {e}\n")
+                return 1
+            stats_server = server
+            sink.log(f"Stats endpoint: {stats_server.url}stats and {stats_server.url}metrics")
+
+        control_address = control_address or settings['control_address']
+        if control_address:
+            from .control import ConfigStore, ControlServer  # imports multiprocessing; only when used
+            store = ConfigStore(engine, config_file, file_settings, watcher)
+            address = None if control_address is True else control_address
+            server = ControlServer(engine, store, address, log=sink.log)
+            try:
+                server.start()
+            except OSError as e:
+                stream.write(f"Could not serve the control API on {server.address}: {e}\n")
+                return 1
+            control_server = server
+            sink.log(f"Control API: {control_server.address}")
+
+        sink.log(f"Loaded {len(rules)} rules from {config_file}"
+                 + (f" (profile {profile} of {len(profiles)})" if len(profiles) > 1 else ""))
+        with profiler.phase("engine start"):
+            engine.start()
+        profiler.report()
+        # Short waits keep the main thread responsive to signals on Windows
+        next_check = time.monotonic() + CONFIG_CHECK_INTERVAL
+        while not stop.wait(LOG_FLUSH_INTERVAL):
+            if time.monotonic() >= next_check:
+                reload_config(engine, sink, watcher, config_file, store)
+                next_check = time.monotonic() + CONFIG_CHECK_INTERVAL
+            flush_log(sink, stream)
+    finally:
+        # Also runs when a server failed to start: whatever did start is
+        # stopped and the trace file is closed
+        engine.stop()
+        engine.join(5.0)
+        if stats_server:
+            stats_server.stop()
+        if control_server:
+            control_server.stop()
+        if recorder:
+            recorder.close()
+            if recorder.error:
+                sink.log(f"Trace recording stopped early: {recorder.error}", level='error')
+            sink.log(f"Trace: {recorder.records} records written to {trace_file}")
+        flush_log(sink, stream)
+    return 0
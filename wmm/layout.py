@@ -0,0 +1,210 @@
+"""Apply layout now: place every matched window in one batch
+
+The engine places windows one at a time as they appear, each with its own
+SetWindowPos and settle sleeps. After docking a laptop that means dozens of
+windows repainting one after another. Applying the layout instead runs in
+two steps:
+
+  plan_layout     reads each window's state and computes its target rect,
+                  without touching anything (so it can be checked against
+                  a FakeBackend)
+  commit_layout   restores the maximized/minimized windows that must move,
+                  moves everything in one DeferWindowPos batch (falling back
+                  to one SetWindowPos per window if the batch fails), then
+                  re-applies maximize/minimize, with one settle sleep per
+                  step rather than per window
+"""
+
+import time
+
+from . import backend as wb
+from .arrange import default_position
+from .models import SizeMode
+
+MOVE_FLAGS = wb.SWP_NOZORDER | wb.SWP_SHOWWINDOW
+SHOW_AFTER = {SizeMode.MAXIMIZED: wb.SW_MAXIMIZE, SizeMode.MINIMIZED: wb.SW_MINIMIZE}
+
+
+class PlannedMove:
+    """Where one window goes and what has to happen around the move"""
+
+    __slots__ = ('hwnd', 'rule', 'window', 'restore', 'rect', 'show_after')
+
+    def __init__(self, hwnd, rule, window, restore, rect, show_after):
+        self.hwnd = hwnd
+        self.rule = rule
+        self.window = window
+        self.restore = restore        # SW_RESTORE first (maximized or minimized now)
+        self.rect = rect              # (x, y, w, h)
+        self.show_after = show_after  # SW_MAXIMIZE / SW_MINIMIZE after the move, or None
+
+    def __repr__(self):
+        return f"PlannedMove({self.hwnd:#x}, {self.rule.process!r}, rect={self.rect})"
+
+
+def plan_move(backend, rule, window, rect=None, origin=None):
+    """PlannedMove for one matched window, or None if it is already in place
+
+    Uses the same rules as PlacementEngine.move_window: a window is left
+    alone when it is on the target monitor and already in the wanted state,
+    otherwise it goes to the work area's top-left corner plus 50 px, keeping
+    its restored size. With a `rect` from the arrangement solver, the window
+    is left alone only if it already has that rect. `origin()` returns the
+    backend.workspace_origin(); by default it is read when needed.
+    """
+    hwnd = window.hwnd
+    monitor = rule.monitor
+    size = rule.size
+
+    placement = backend.get_window_placement(hwnd)
+    state = placement[1]
+    maximized = state == wb.SW_SHOWMAXIMIZED
+    minimized = state == wb.SW_SHOWMINIMIZED
+    if maximized or minimized:
+        # The restored rect, read without restoring (and repainting) the
+        # window, and moved from workspace to screen coordinates
+        dx, dy = origin() if origin is not None else wb.workspace_origin(backend.enum_monitors())
+        left, top, right, bottom = placement[4]
+        left, top, right, bottom = left + dx, top + dy, right + dx, bottom + dy
+    else:
+        left, top, right, bottom = backend.get_window_rect(hwnd)
+
+    if rect is not None:
+        x, y, w, h = rect
+        if w is None:
+            w, h = right - left, bottom - top
+        on_target = (left, top, right - left, bottom - top) == (x, y, w, h)
+    else:
+        x, y = default_position(monitor)
+        w, h = right - left, bottom - top
+        on_target = monitor.contains(left, top)
+    if on_target:
+        if size is SizeMode.MAXIMIZED and maximized:
+            return None
+        if size is SizeMode.MINIMIZED and minimized:
+            return None
+        if size is SizeMode.NORMAL and not maximized and not minimized:
+            return None
+
+    return PlannedMove(hwnd, rule, window, maximized or minimized, (x, y, w, h),
+                       SHOW_AFTER.get(size))
+
+
+def plan_layout(backend, matches, rects=None):
+    """(plan, skipped, failed) for an iterable of (rule, window) matches
+
+    `rects` maps hwnds to solver rects for arranged windows. `plan` is a
+    list of PlannedMove, `skipped` counts windows already in place and
+    `failed` lists hwnds that could not be inspected.
+    """
+    rects = rects or {}
+    plan = []
+    skipped = 0
+    failed = []
+    found = []
+
+    def origin():
+        # Only needed for maximized and minimized windows; read once
+        if not found:
+            found.append(wb.workspace_origin(backend.enum_monitors()))
+        return found[0]
+
+    for rule, window in matches:
+        try:
+            move = plan_move(backend, rule, window, rects.get(window.hwnd), origin)
+        except Exception:
+            failed.append(window.hwnd)
+            continue
+        if move is None:
+            skipped += 1
+        else:
+            plan.append(move)
+    return plan, skipped, failed
+
+
+class LayoutReport:
+    """Outcome of one Apply layout now"""
+
+    def __init__(self):
+        self.planned = 0
+        self.skipped = 0
+        self.moved = []
+        self.failed = []
+        self.batched = False
+        self.seconds = 0.0
+
+    def format(self):
+        if not self.planned and not self.failed:
+            return (f"Layout applied: all {self.skipped} matched windows already in place "
+                    f"({self.seconds * 1000:.0f}ms)")
+        how = "in one batch" if self.batched else "one by one"
+        text = (f"Layout applied: {len(self.moved)} windows moved {how}, "
+                f"{self.skipped} already in place")
+        if self.failed:
+            text += f", {len(self.failed)} failed"
+        return text + f" ({self.seconds * 1000:.0f}ms)"
+
+
+def commit_layout(backend, plan, sleep=time.sleep):
+    """Carry out a plan; returns (moved hwnds, failed hwnds, batched)"""
+    failed = set()
+
+    restores = [move for move in plan if move.restore]
+    for move in restores:
+        try:
+            backend.show_window(move.hwnd, wb.SW_RESTORE)
+        except Exception:
+            failed.add(move.hwnd)
+    if restores:
+        sleep(0.15)
+
+    moves = [move for move in plan if move.hwnd not in failed]
+    batched = False
+    if moves:
+        try:
+            backend.defer_window_pos([(move.hwnd, *move.rect, MOVE_FLAGS) for move in moves])
+            batched = True
+        except Exception:
+            # One bad window fails the whole batch; place them one by one
+            for move in moves:
+                try:
+                    backend.set_window_pos(move.hwnd, *move.rect, MOVE_FLAGS)
+                except Exception:
+                    failed.add(move.hwnd)
+        sleep(0.15)
+
+    resized = [move for move in moves if move.show_after is not None and move.hwnd not in failed]
+    for move in resized:
+        try:
+            backend.show_window(move.hwnd, move.show_after)
+        except Exception:
+            failed.add(move.hwnd)
+    if resized:
+        sleep(0.1)
+
+    # Verify normal windows, as move_window does
+    for move in moves:
+        if move.show_after is not None or move.hwnd in failed:
+            continue
+        try:
+            x, y = backend.get_window_rect(move.hwnd)[:2]
+        except Exception:
+            failed.add(move.hwnd)
+            continue
+        if not move.rule.monitor.contains(x, y):
+            failed.add(move.hwnd)
+
+    moved = [move.hwnd for move in plan if move.hwnd not in failed]
+    return moved, sorted(failed), batched
+
+
+def apply_layout(backend, matches, rects=None, sleep=time.sleep, clock=time.perf_counter):
+    """Plan and commit in one go; returns a LayoutReport"""
+    report = LayoutReport()
+    start = clock()
+    plan, report.skipped, inspect_failed = plan_layout(backend, matches, rects)
+    report.planned = len(plan)
+    report.moved, commit_failed, report.batched = commit_layout(backend, plan, sleep)
+    report.failed = inspect_failed + commit_failed
+    report.seconds = clock() - start
+    return report
@@ -0,0 +1,101 @@
+"""Non-blocking log sink
+
+The engine and move workers log from their own threads. Touching Tk from
+there is not thread-safe, and an update_idletasks() per message forced a
+layout pass on every line. Instead, log() only appends a record to a bounded
+deque (atomic in CPython, no lock, never blocks) and the UI thread drains it
+in batches. Records can also be written as JSON lines to a size-rotated file
+while draining.
+"""
+
+import json
+import os
+import time
+from collections import deque, namedtuple
+
+LogRecord = namedtuple('LogRecord', 'time level msg repeat')
+
+
+class RotatingJsonlFile:
+    """Appends records as JSON lines, rotating to path.1 .. path.N by size"""
+
+    def __init__(self, path, max_bytes=1024 * 1024, backups=3):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backups = backups
+
+    def write(self, records):
+        lines = ''.join(json.dumps({
+            'time': record.time,
+            'level': record.level,
+            'msg': record.msg,
+            'repeat': record.repeat,
+        }, ensure_ascii=False) + '\n' for record in records).encode('utf-8')
+
+        if os.path.exists(self.path) and os.path.getsize(self.path) + len(lines) > self.max_bytes:
+            self.rotate()
+        with open(self.path, 'ab') as f:
+            f.write(lines)
+
+    def rotate(self):
+        for i in range(self.backups - 1, 0, -1):
+            src = f"{self.path}.{i}"
+            if os.path.exists(src):
+                os.replace(src, f"{self.path}.{i + 1}")
+        if self.backups > 0:
+            os.replace(self.path, f"{self.path}.1")
+        else:
+            os.remove(self.path)
+
+
+class LogSink:
+    """Bounded, lock-free log queue drained in batches by one consumer
+
+    If the consumer stalls, the oldest records are dropped rather than
+    blocking the producer; `dropped` counts them.
+    """
+
+    def __init__(self, capacity=10000, jsonl=None, clock=time.time):
+        self.capacity = capacity
+        self.jsonl = jsonl
+        self.clock = clock
+        self._records = deque(maxlen=capacity)
+        self.emitted = 0
+        self.dropped = 0
+
+    def log(self, msg, level='info'):
+        if len(self._records) >= self.capacity:
+            self.dropped += 1
+        self._records.append(LogRecord(self.clock(), level, msg, 1))
+        self.emitted += 1
+
+    __call__ = log
+
+    def drain(self, limit=None):
+        """Pop pending records, folding consecutive duplicates together"""
+        batch = []
+        records = self._records
+        while records and (limit is None or len(batch) < limit):
+            record = records.popleft()
+            if batch and batch[-1].msg == record.msg and batch[-1].level == record.level:
+                batch[-1] = batch[-1]._replace(repeat=batch[-1].repeat + 1)
+            else:
+                batch.append(record)
+
+        if batch and self.jsonl is not None:
+            try:
+                self.jsonl.write(batch)
+            except OSError as e:
+                # Don't lose the on-screen log because the file is unwritable
+                batch.append(LogRecord(self.clock(), 'error', f"Log file error: {e}", 1))
+        return batch
+
+    def __len__(self):
+        return len(self._records)
+
+
+def format_record(record):
+    """One display line: [HH:MM:SS] message (xN)"""
+    timestamp = time.strftime("%H:%M:%S", time.localtime(record.time))
+    repeat = f" (x{record.repeat})" if record.repeat > 1 else ""
+    return f"[{timestamp}] {record.msg}{repeat}\n"
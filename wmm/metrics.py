@@ -0,0 +1,219 @@
+"""Lightweight engine measurements"""
+
+import threading
+
+
+class LatencyHistogram:
+    """Log-scale histogram of durations in seconds
+
+    Buckets double from 1 ms up to ~65 s, which is plenty of resolution to
+    tell a 20 ms event-driven placement from a 500 ms polling one while
+    staying constant size however many samples are recorded.
+    """
+
+    BOUNDS_MS = tuple(2 ** i for i in range(17))  # 1 ms .. 65536 ms
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counts = [0] * (len(self.BOUNDS_MS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = None
+
+    def record(self, seconds):
+        ms = seconds * 1000.0
+        index = 0
+        for bound in self.BOUNDS_MS:
+            if ms <= bound:
+                break
+            index += 1
+        with self._lock:
+            self.counts[index] += 1
+            self.count += 1
+            self.total += seconds
+            if self.min is None or seconds < self.min:
+                self.min = seconds
+            if self.max is None or seconds > self.max:
+                self.max = seconds
+
+    def percentile(self, p):
+        """Upper bucket bound (seconds) containing the p-th percentile"""
+        with self._lock:
+            if not self.count:
+                return None
+            target = self.count * p / 100.0
+            seen = 0
+            for index, n in enumerate(self.counts):
+                seen += n
+                if seen >= target and n:
+                    if index < len(self.BOUNDS_MS):
+                        return min(self.BOUNDS_MS[index] / 1000.0, self.max)
+                    return self.max
+            return self.max
+
+    def reset(self):
+        with self._lock:
+            self.counts = [0] * (len(self.BOUNDS_MS) + 1)
+            self.count = 0
+            self.total = 0.0
+            self.min = None
+            self.max = None
+
+    def summary(self):
+        return {
+            'count': self.count,
+            'mean': self.total / self.count if self.count else None,
+            'min': self.min,
+            'p50': self.percentile(50),
+            'p95': self.percentile(95),
+            'p99': self.percentile(99),
+            'max': self.max,
+        }
+
+    def export(self):
+        """summary() plus cumulative bucket counts, for the stats endpoint"""
+        with self._lock:
+            counts = list(self.counts)
+        buckets = []
+        seen = 0
+        for bound, n in zip(self.BOUNDS_MS + (None,), counts):
+            seen += n
+            buckets.append((bound / 1000.0 if bound is not None else None, seen))
+        data = self.summary()
+        data['sum'] = self.total
+        data['buckets'] = buckets
+        return data
+
+    def format(self):
+        """One-line human summary for the activity log"""
+        if not self.count:
+            return "no samples"
+        s = self.summary()
+        return (f"n={s['count']} p50={s['p50'] * 1000:.0f}ms "
+                f"p95={s['p95'] * 1000:.0f}ms max={s['max'] * 1000:.0f}ms")
+
+
+class EngineMetrics:
+    """Counters and timing histograms for one PlacementEngine
+
+    Counters are only incremented on the engine thread, so plain integers
+    are enough; readers on other threads (the stats panel, the HTTP endpoint)
+    at worst see a value one tick old. Counters are cumulative for the life
+    of the engine, as Prometheus expects, and survive stop/start.
+    """
+
+    # Descriptions are in METRIC_HELP
+    COUNTERS = (
+        'scans',
+        'events',
+        'windows_scanned',
+        'scan_calls',
+        'rule_matches',
+        'moves_attempted',
+        'moves_succeeded',
+        'moves_failed',
+        'moves_given_up',
+        'display_changes',
+        'rules_rehomed',
+        'profile_switches',
+    )
+
+    def __init__(self):
+        self.counters = dict.fromkeys(self.COUNTERS, 0)
+        self.enumeration = LatencyHistogram()      # snapshot capture time
+        self.move_duration = LatencyHistogram()    # move_window run time
+        self.placement_latency = LatencyHistogram()  # event -> window placed
+
+    def incr(self, name, n=1):
+        self.counters[name] += n
+
+    def histograms(self):
+        return {
+            'enumeration_seconds': self.enumeration,
+            'move_duration_seconds': self.move_duration,
+            'placement_latency_seconds': self.placement_latency,
+        }
+
+
+# HELP text for the exported metrics, by name without prefix or _total
+METRIC_HELP = {
+    'scans': "Full desktop enumerations",
+    'events': "Window events handled",
+    'windows_scanned': "Windows looked at by scans and events",
+    'scan_calls': "Window and process API calls made by scans",
+    'rule_matches': "Rule and window matches found",
+    'moves_attempted': "Window moves started",
+    'moves_succeeded': "Window moves that reached their target",
+    'moves_failed': "Window moves that failed",
+    'moves_given_up': "Windows that used up their move attempts",
+    'display_changes': "Monitor layout changes seen",
+    'rules_rehomed': "Rules whose target monitor moved on a display change",
+    'profile_switches': "Layout profiles made active",
+    'windows_evicted': "Tracked windows dropped to bound memory",
+    'hwnd_reuses': "Window handles seen reused by a new window",
+    'poll_interval_changes': "Changes of the rescan interval",
+    'running': "1 while the engine is monitoring",
+    'queue_depth': "Window events waiting to be handled",
+    'moves_in_flight': "Windows with a move queued or running",
+    'tracked_windows': "Windows the engine is tracking",
+    'scan_calls_last': "API calls made by the last scan",
+    'retries_pending': "Failed moves waiting to be retried",
+    'windows_given_up': "Tracked windows given up on",
+    'rules': "Rules in the active profile",
+    'monitors': "Monitors connected",
+    'poll_interval_seconds': "Current rescan interval",
+    'process_cache_hit_rate': "Share of process lookups served from the cache",
+    'enumeration_seconds': "Time to capture a desktop snapshot",
+    'move_duration_seconds': "Time to move one window",
+    'placement_latency_seconds': "Time from a window event to the window being placed",
+    'poll_interval_reason': "Why the rescan interval was last set",
+    'engine_info': "Detection mode and active profile",
+}
+
+
+def escape_help(text):
+    """HELP text escaped for the Prometheus text format"""
+    return text.replace('\\', '\\\\').replace('\n', '\\n')
+
+
+def escape_label(value):
+    """Label value escaped for the Prometheus text format"""
+    return escape_help(str(value)).replace('"', '\\"')
+
+
+def _labels(labels):
+    return "{" + ",".join(f'{name}="{escape_label(value)}"' for name, value in labels) + "}"
+
+
+def format_prometheus(stats, prefix="wmm"):
+    """Render PlacementEngine.stats() in the Prometheus text format"""
+    lines = []
+
+    def header(name, kind, key):
+        text = METRIC_HELP.get(key, key.replace('_', ' '))
+        lines.append(f"# HELP {prefix}_{name} {escape_help(text)}")
+        lines.append(f"# TYPE {prefix}_{name} {kind}")
+
+    def metric(name, kind, value, labels=(), key=None):
+        header(name, kind, key or name)
+        lines.append(f"{prefix}_{name}{_labels(labels) if labels else ''} {value}")
+
+    for name, value in stats['counters'].items():
+        metric(f"{name}_total", "counter", value, key=name)
+    for name, value in stats['gauges'].items():
+        metric(name, "gauge", value)
+    for name, hist in stats['histograms'].items():
+        header(name, "histogram", name)
+        for bound, count in hist['buckets']:
+            le = "+Inf" if bound is None else f"{bound:g}"
+            lines.append(f'{prefix}_{name}_bucket{{le="{le}"}} {count}')
+        lines.append(f"{prefix}_{name}_sum {hist['sum']}")
+        lines.append(f"{prefix}_{name}_count {hist['count']}")
+    if 'mode' in stats:
+        metric("engine_info", "gauge", 1,
+               [('mode', stats['mode']), ('profile', stats.get('profile') or "")])
+    scheduler = stats.get('poll_scheduler')
+    if scheduler is not None:
+        metric("poll_interval_reason", "gauge", 1, [('reason', scheduler['reason'])])
+    return "\n".join(lines) + "\n"
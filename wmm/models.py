@@ -0,0 +1,203 @@
+"""Typed records for windows, rules and monitors
+
+Windows, rules and monitors used to be dicts. A snapshot made a fresh dict
+per visible window on every tick, and the engine read rules through
+`.get('size', 'normal')` on read-only mappings for every move. These
+classes use __slots__: no per-instance dict, attribute access instead of
+hashing a key, and values that are checked and converted once, when a rule
+is loaded or a monitor enumerated, rather than wherever they are read.
+
+    SizeMode      the 'size' of a rule; a str, so it compares and
+                  serializes as "normal", "maximized" or "minimized"
+    MonitorRect   monitor bounds, work area and identity; read-only
+    Rule          a resolved rule; read-only, built by rules.resolve_rule()
+    WindowInfo    one visible top-level window of a snapshot; the scanner
+                  keeps it for as long as the hwnd lives
+
+Config files, backend monitor lists and the GUI keep using plain dicts;
+as_dict() converts back.
+"""
+
+import json
+from enum import Enum
+
+BOUNDS = ('left', 'top', 'right', 'bottom')
+
+
+class SizeMode(str, Enum):
+    NORMAL = 'normal'
+    MAXIMIZED = 'maximized'
+    MINIMIZED = 'minimized'
+
+    def __str__(self):
+        return self.value
+
+
+class _Frozen:
+    """Base for read-only slotted records: attributes are set once, in __init__"""
+
+    __slots__ = ()
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"{type(self).__name__} is read-only")
+
+    def __delattr__(self, name):
+        raise AttributeError(f"{type(self).__name__} is read-only")
+
+    def _fields(self):
+        return tuple(getattr(self, name) for name in self.__slots__)
+
+    def __eq__(self, other):
+        if type(other) is not type(self):
+            return NotImplemented
+        return self._fields() == other._fields()
+
+    def __hash__(self):
+        return hash(self._fields())
+
+
+def _bounds(data, what):
+    try:
+        left, top, right, bottom = (int(data[name]) for name in BOUNDS)
+    except (KeyError, TypeError, ValueError):
+        raise ValueError(f"{what} needs integer {', '.join(BOUNDS)}") from None
+    return left, top, right, bottom
+
+
+class MonitorRect(_Frozen):
+    """A monitor: bounds, work area (None if unknown) and what identifies it
+
+    `device` and `number` are only used to find the monitor again after
+    the displays change (see monitors.resolve_monitor).
+    """
+
+    __slots__ = ('left', 'top', 'right', 'bottom', 'is_primary', 'work', 'device', 'number')
+
+    def __init__(self, left, top, right, bottom, is_primary=False, work=None,
+                 device=None, number=None):
+        if right <= left or bottom <= top:
+            raise ValueError(f"monitor bounds are empty: {(left, top, right, bottom)}")
+        set_field = object.__setattr__
+        set_field(self, 'left', left)
+        set_field(self, 'top', top)
+        set_field(self, 'right', right)
+        set_field(self, 'bottom', bottom)
+        set_field(self, 'is_primary', is_primary)
+        set_field(self, 'work', work)  # (left, top, right, bottom)
+        set_field(self, 'device', device)
+        set_field(self, 'number', number)
+
+    @classmethod
+    def from_dict(cls, data):
+        """Monitor from a rule's saved "monitor" or a backend record; raises ValueError"""
+        left, top, right, bottom = _bounds(data, "monitor")
+        work = data.get('work')
+        if work is not None:
+            work = _bounds(work, "monitor work area")
+        number = data.get('number')
+        if number is not None:
+            try:
+                number = int(number)
+            except (TypeError, ValueError):
+                raise ValueError(f"monitor number must be an integer, got {number!r}") from None
+        return cls(left, top, right, bottom, bool(data.get('is_primary', False)), work,
+                   str(data['device']) if data.get('device') else None, number)
+
+    @property
+    def bounds(self):
+        return (self.left, self.top, self.right, self.bottom)
+
+    @property
+    def size(self):
+        return (self.right - self.left, self.bottom - self.top)
+
+    @property
+    def work_area(self):
+        """(left, top, right, bottom) of the work area, or the bounds if unknown"""
+        return self.work or self.bounds
+
+    def contains(self, x, y):
+        return self.left <= x < self.right and self.top <= y < self.bottom
+
+    def as_dict(self):
+        data = dict(zip(BOUNDS, self.bounds), is_primary=self.is_primary)
+        if self.work is not None:
+            data['work'] = dict(zip(BOUNDS, self.work))
+        if self.device:
+            data['device'] = self.device
+        if self.number is not None:
+            data['number'] = self.number
+        return data
+
+    def __repr__(self):
+        return f"MonitorRect{self.bounds}"
+
+
+class Rule(_Frozen):
+    """A rule, resolved: normalized, validated and ready to match and place with
+
+    `key` identifies the rule's content, so two spellings of the same rule
+    ("Chrome.exe" and "chrome") get the same key; with_monitor() keeps it.
+    """
+
+    __slots__ = ('process', 'monitor', 'size', 'priority', 'arrange',
+                 'title', 'class_name', 'path', 'key')
+
+    def __init__(self, process, monitor, size=SizeMode.NORMAL, priority=0, arrange=None,
+                 title=None, class_name=None, path=None, key=None):
+        set_field = object.__setattr__
+        set_field(self, 'process', process)
+        set_field(self, 'monitor', monitor)
+        set_field(self, 'size', size)
+        set_field(self, 'priority', priority)
+        set_field(self, 'arrange', arrange)
+        set_field(self, 'title', title)
+        set_field(self, 'class_name', class_name)
+        set_field(self, 'path', path)
+        set_field(self, 'key', key if key is not None
+                  else json.dumps(self.as_dict(), sort_keys=True))
+
+    def with_monitor(self, monitor):
+        """Copy aimed at another monitor, with the same key"""
+        return Rule(self.process, monitor, self.size, self.priority, self.arrange,
+                    self.title, self.class_name, self.path, self.key)
+
+    def as_dict(self):
+        """Config form of the rule"""
+        data = {'process': self.process, 'monitor': self.monitor.as_dict(),
+                'size': self.size.value, 'priority': self.priority}
+        if self.arrange is not None:
+            data['arrange'] = self.arrange
+        for field, value in (('title', self.title), ('class', self.class_name),
+                             ('path', self.path)):
+            if value:
+                data[field] = value
+        return data
+
+    def __repr__(self):
+        return f"Rule({self.process!r}, {self.monitor!r}, {self.size.value})"
+
+
+class WindowInfo:
+    """A visible top-level window as one scan saw it
+
+    `title` and `class_name` start out None; the rule matcher fills them in
+    when a rule needs them, and the scanner clears them again before the
+    next scan.
+    """
+
+    __slots__ = ('hwnd', 'pid', 'process', 'name', 'create_time', 'key', 'title', 'class_name')
+
+    def __init__(self, hwnd, pid, process, name, create_time=None):
+        self.hwnd = hwnd
+        self.pid = pid
+        self.process = process  # normalized, as rules match it
+        self.name = name
+        self.create_time = create_time
+        # Tracker key: a recycled hwnd has a different pid or create time
+        self.key = (hwnd, pid, create_time)
+        self.title = None
+        self.class_name = None
+
+    def __repr__(self):
+        return f"WindowInfo({self.hwnd:#x}, {self.process!r})"
@@ -0,0 +1,261 @@
+"""Shared, cached monitor topology
+
+Monitor enumeration used to happen on every lookup: once per rule while
+loading the config, and again whenever the rule dialog or monitor list was
+needed. MonitorTopology enumerates once, keeps the sorted list plus a small
+spatial index for point lookups, and only re-enumerates when the backend's
+display fingerprint (every monitor's bounds, work area, primary flag and
+device) differs.
+
+Rules save the bounds of their monitor, which stop meaning anything once a
+screen is unplugged or the arrangement changes. resolve_monitor() finds the
+saved monitor among the current ones by identity instead: device name and
+resolution first, then exact bounds (rules saved before device names were
+kept), then device alone, then resolution and position in monitor order
+(a guess, which the engine logs every time it makes it).
+MonitorMap applies that to a whole rule set once per display change, so the
+engine looks up each rule's current monitor with a dict get.
+"""
+
+import threading
+import time
+from bisect import bisect_right
+
+from .models import BOUNDS, MonitorRect
+
+
+def sort_monitors(monitors):
+    """Primary first, then by position; this order defines monitor numbers"""
+    return sorted(monitors, key=lambda m: (
+        0 if m['is_primary'] else 1,
+        m['left'],
+        m['top']
+    ))
+
+
+def monitor_size(monitor):
+    return (monitor['right'] - monitor['left'], monitor['bottom'] - monitor['top'])
+
+
+def resolve_monitor(saved, monitors):
+    """(number, monitor, how) for the current monitor a saved MonitorRect refers to
+
+    `monitors` is the sorted list (MonitorTopology.monitors()). `how` says
+    what matched: 'device', 'bounds', 'device-only' or 'order'. Returns None
+    if the monitor is not connected.
+    """
+    device = saved.device
+    size = saved.size
+    bounds = saved.bounds
+    numbered = list(enumerate(monitors, 1))
+
+    if device:
+        # The same screen, wherever it sits now
+        for number, m in numbered:
+            if m.get('device') == device and monitor_size(m) == size:
+                return number, m, 'device'
+    for number, m in numbered:
+        if tuple(m[name] for name in BOUNDS) == bounds:
+            return number, m, 'bounds'
+    if device:
+        # Same output, resolution changed
+        for number, m in numbered:
+            if m.get('device') == device:
+                return number, m, 'device-only'
+
+    # A guess from here on; MonitorMap lists these in `moved` and the engine
+    # logs each one
+    same_size = [(number, m) for number, m in numbered if monitor_size(m) == size]
+    saved_number = saved.number
+    for number, m in same_size:
+        if number == saved_number:
+            return number, m, 'order'
+    if len(same_size) == 1 and saved_number is not None:
+        number, m = same_size[0]
+        return number, m, 'order'
+    return None
+
+
+# How resolve_monitor matched, for logs
+MATCHED_BY = {
+    'device': "same device",
+    'bounds': "same position",
+    'device-only': "same device, new resolution",
+    'order': "guessed from its resolution",
+}
+
+
+def _same_work(current, saved):
+    """False if the work area moved (e.g. the taskbar did) or the rule has none saved"""
+    if current is None:
+        return True
+    return current == saved
+
+
+def describe_monitor(monitor):
+    """Short label for logs: device name (or position) and resolution of a MonitorRect"""
+    width, height = monitor.size
+    name = monitor.device or f"monitor at {monitor.left},{monitor.top}"
+    return f"{name} {width}x{height}"
+
+
+class MonitorMap:
+    """Rule key -> rule retargeted at the monitor it means on the current displays
+
+    Rules whose saved monitor is still where it was map to themselves. Rules
+    whose monitor moved map to a copy aimed at the current one, and are
+    listed in `moved` with how it was found (Rule.with_monitor keeps the key,
+    so placement tracking is unaffected). Rules whose monitor is not
+    connected go to the primary monitor and are listed in `missing`. Built
+    once per display change or rule change, never per window.
+    """
+
+    def __init__(self, rules, monitors, generation=0):
+        self.rules = rules
+        self.monitors = monitors
+        self.generation = generation
+        self.homes = {}
+        self.moved = []    # (rule, number, how) for rules retargeted to another position
+        self.missing = []  # rules whose monitor is not connected
+        self.by_key = {rule.key: rule for rule in rules}
+        if not monitors:
+            return
+
+        primary = next((m for m in monitors if m['is_primary']), monitors[0])
+        targets = {}  # id(backend record) -> MonitorRect, shared by the rules aimed at it
+        for rule in rules:
+            saved = rule.monitor
+            found = resolve_monitor(saved, monitors)
+            if found is None:
+                self.missing.append(rule)
+                current = primary
+            else:
+                number, current, how = found
+            target = targets.get(id(current))
+            if target is None:
+                target = targets[id(current)] = MonitorRect.from_dict(current)
+            if target.bounds == saved.bounds and _same_work(target.work, saved.work):
+                continue
+            if found is not None:
+                self.moved.append((rule, number, how))
+            self.homes[rule.key] = rule.with_monitor(target)
+        self.by_key = {rule.key: self.homes.get(rule.key, rule) for rule in rules}
+
+    def home(self, rule):
+        """The rule to place with: itself, or a copy aimed at the current monitor"""
+        return self.homes.get(rule.key, rule)
+
+    def target(self, rule):
+        return self.home(rule).monitor
+
+    def changed(self, previous):
+        """Keys of rules whose target bounds differ from those in `previous`"""
+        return {rule.key for rule in self.rules
+                if self.target(rule).bounds != previous.target(rule).bounds}
+
+
+class _SpatialIndex:
+    """Monitors bucketed into vertical slabs between distinct x edges
+
+    A point lookup is a bisect on x plus a check of the (usually one or two)
+    monitors overlapping that slab.
+    """
+
+    def __init__(self, monitors):
+        edges = sorted({m['left'] for m in monitors} | {m['right'] for m in monitors})
+        self.edges = edges
+        self.slabs = []
+        for left, right in zip(edges, edges[1:]):
+            self.slabs.append([(number, m) for number, m in enumerate(monitors, 1)
+                               if m['left'] < right and m['right'] > left])
+
+    def at(self, x, y):
+        slab = bisect_right(self.edges, x) - 1
+        if slab < 0 or slab >= len(self.slabs):
+            return None
+        for number, m in self.slabs[slab]:
+            if m['left'] <= x < m['right'] and m['top'] <= y < m['bottom']:
+                return number, m
+        return None
+
+
+class MonitorTopology:
+    """Cached, numbered monitor list for a backend
+
+    Safe to share between the Tk thread and the engine. The fingerprint is
+    checked at most every `check_interval` seconds.
+    """
+
+    def __init__(self, backend, check_interval=2.0, clock=time.monotonic):
+        self.backend = backend
+        self.check_interval = check_interval
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._monitors = None
+        self._index = None
+        self._fingerprint = None
+        self._checked_at = None
+        self.enumerations = 0
+        self.generation = 0
+
+    def _refresh(self):
+        monitors = sort_monitors(self.backend.enum_monitors())
+        self._monitors = monitors
+        self._index = _SpatialIndex(monitors)
+        self.enumerations += 1
+        self.generation += 1
+
+    def _current(self):
+        """Return (monitors, index, generation), refreshing if stale"""
+        with self._lock:
+            now = self.clock()
+            if self._monitors is not None and (self._checked_at is None or
+                                               now - self._checked_at >= self.check_interval):
+                fingerprint = self.backend.display_fingerprint()
+                self._checked_at = now
+                if fingerprint != self._fingerprint:
+                    self._fingerprint = fingerprint
+                    self._monitors = None
+
+            if self._monitors is None:
+                self._fingerprint = self.backend.display_fingerprint()
+                self._checked_at = now
+                self._refresh()
+            return self._monitors, self._index, self.generation
+
+    def monitors(self):
+        """Sorted monitor records; index + 1 is the monitor number"""
+        return self._current()[0]
+
+    def check(self):
+        """Re-check the fingerprint now; returns True if the layout changed"""
+        with self._lock:
+            self._checked_at = None
+        generation = self.generation
+        self._current()
+        return self.generation != generation
+
+    def monitor_at(self, x, y):
+        """{'number', 'info'} for the monitor containing a point, or None"""
+        found = self._current()[1].at(x, y)
+        if found is None:
+            return None
+        number, monitor = found
+        return {'number': number, 'info': monitor}
+
+    def resolve(self, saved):
+        """{'number', 'info', 'match'} for a monitor saved in a config rule, or None if not connected"""
+        try:
+            saved = MonitorRect.from_dict(saved)
+        except ValueError:
+            return None
+        found = resolve_monitor(saved, self.monitors())
+        if found is None:
+            return None
+        number, monitor, how = found
+        return {'number': number, 'info': monitor, 'match': how}
+
+    def monitor_map(self, rules):
+        """MonitorMap of `rules` against the current displays"""
+        monitors, _, generation = self._current()
+        return MonitorMap(rules, monitors, generation)
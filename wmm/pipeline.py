@@ -0,0 +1,102 @@
+"""Concurrent move pipeline
+
+move_window blocks for up to 0.4 s of settle sleeps per window, and a
+SetWindowPos on a hung window can block for much longer. Running moves on
+the engine thread meant one slow window held up every other rule and the
+scanning itself. The pipeline runs moves on a bounded pool of worker threads:
+different hwnds progress in parallel, while moves for the same hwnd run one
+after another in submission order.
+"""
+
+import threading
+import time
+from collections import deque, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+# `error` is the exception a move raised, None if it returned
+MoveResult = namedtuple('MoveResult', 'hwnd tag ok started finished error')
+
+
+class MovePipeline:
+    """Bounded worker pool with per-hwnd ordering
+
+    Results are queued rather than delivered by callback so the engine can
+    apply them on its own thread; `notify` is called after each result so
+    the engine can wake up and drain them.
+    """
+
+    def __init__(self, max_workers=4, notify=None, clock=time.monotonic):
+        self.max_workers = max_workers
+        self.notify = notify
+        self.clock = clock
+        self._executor = None
+        self._lock = threading.Lock()
+        self._chains = {}  # hwnd -> deque of jobs queued behind the running one
+        self._results = deque()
+        self._closed = False
+
+    def start(self):
+        self._closed = False
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers,
+                                            thread_name_prefix="wmm-move")
+
+    def shutdown(self):
+        """Drop queued moves; moves already running finish in the background"""
+        self._closed = True
+        with self._lock:
+            self._chains.clear()
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+    def submit(self, hwnd, fn, *args, tag=None):
+        """Queue fn(*args) for hwnd; returns False if the pipeline is closed"""
+        if self._closed or self._executor is None:
+            return False
+        job = (fn, args, tag)
+        with self._lock:
+            chain = self._chains.get(hwnd)
+            if chain is not None:
+                # A move for this hwnd is already running; keep them in order
+                chain.append(job)
+                return True
+            self._chains[hwnd] = deque()
+        self._executor.submit(self._run, hwnd, job)
+        return True
+
+    def _run(self, hwnd, job):
+        while job is not None:
+            fn, args, tag = job
+            started = self.clock()
+            error = None
+            try:
+                ok = bool(fn(*args))
+            except Exception as e:
+                ok, error = False, e
+            self._results.append(MoveResult(hwnd, tag, ok, started, self.clock(), error))
+            if self.notify:
+                self.notify()
+
+            with self._lock:
+                chain = self._chains.get(hwnd)
+                if chain:
+                    job = chain.popleft()
+                else:
+                    self._chains.pop(hwnd, None)
+                    job = None
+            if self._closed:
+                return
+
+    def busy(self, hwnd):
+        """True while a move for hwnd is queued or running"""
+        return hwnd in self._chains
+
+    def in_flight(self):
+        return len(self._chains)
+
+    def drain(self):
+        """Pop every finished MoveResult"""
+        results = []
+        while self._results:
+            results.append(self._results.popleft())
+        return results
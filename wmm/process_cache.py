@@ -0,0 +1,106 @@
+"""PID -> process name cache
+
+Looking up a process name costs several syscalls, and the same few dozen PIDs
+are looked up every tick. Entries are keyed by PID. A hit costs no syscall at
+all: the process create time is read again only when the entry's TTL has run
+out, or when the caller asks for it because the PID was just seen owning a
+new window. If it changed, the PID was recycled, and the entry is replaced,
+so a recycled PID does not keep the name of the process that used to own it.
+"""
+
+import sys
+import threading
+import time
+from collections import OrderedDict, namedtuple
+
+from .backend import normalize_process_name
+
+ProcessInfo = namedtuple('ProcessInfo', 'pid name key create_time')
+
+
+class ProcessCache:
+    """LRU + TTL cache of ProcessInfo keyed by PID
+
+    `backend` supplies get_process_create_time(pid) and get_process_name(pid),
+    so a FakeBackend process table can stand in for psutil. Safe to share
+    between the monitor thread and the Tk thread.
+    """
+
+    def __init__(self, backend, max_size=1024, ttl=300.0, clock=time.monotonic):
+        self.backend = backend
+        self.max_size = max_size
+        self.ttl = ttl
+        self.clock = clock
+        self._entries = OrderedDict()  # pid -> (ProcessInfo, expires_at)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def lookup(self, pid, validate=False):
+        """Return ProcessInfo for a PID; raises if the process is gone
+
+        With `validate`, a cached entry is checked against the process
+        create time even if its TTL has not run out.
+        """
+        now = self.clock()
+        with self._lock:
+            entry = self._entries.get(pid)
+            if entry is not None and not validate and now < entry[1]:
+                self._entries.move_to_end(pid)
+                self.hits += 1
+                return entry[0]
+
+        create_time = self.backend.get_process_create_time(pid)
+        with self._lock:
+            entry = self._entries.get(pid)
+            if entry is not None:
+                info = entry[0]
+                if info.create_time == create_time:
+                    # Still the same process: good for another TTL
+                    self._entries[pid] = (info, now + self.ttl)
+                    self._entries.move_to_end(pid)
+                    self.hits += 1
+                    return info
+                # PID was recycled by a different process
+                self.invalidations += 1
+                del self._entries[pid]
+            self.misses += 1
+
+        name = self.backend.get_process_name(pid)
+        # Interned: the many PIDs of one browser or shell share a single copy,
+        # and the rule matcher's dict lookups on it hit on identity
+        info = ProcessInfo(pid, sys.intern(name), sys.intern(normalize_process_name(name)),
+                           create_time)
+
+        with self._lock:
+            self._entries[pid] = (info, now + self.ttl)
+            self._entries.move_to_end(pid)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return info
+
+    def discard(self, pid):
+        with self._lock:
+            self._entries.pop(pid, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'invalidations': self.invalidations,
+                'hit_rate': self.hits / total if total else 0.0,
+            }
@@ -0,0 +1,164 @@
+"""Process list for the Add Rule dialog
+
+The dialog used to enumerate every window and look up every process in its
+constructor, on the Tk thread, so it froze before it appeared on a busy
+desktop. ProcessLister does the listing on a worker thread and streams the
+names in small batches, and keeps the last complete list for a few seconds
+so a dialog opened again right away fills instantly (and is then brought up
+to date by a new listing in the background). ProcessIndex answers
+the dialog's filter box: names starting with the typed text first, then
+names containing it, from an n-gram index rather than a scan of every name.
+"""
+
+import threading
+import time
+from bisect import bisect_left
+
+from .snapshot import DesktopSnapshot
+
+GRAM = 3  # longest n-gram indexed; longer queries intersect their trigrams
+
+
+class ProcessIndex:
+    """Case-insensitive prefix/substring index over process names
+
+    Names can be added in batches while the index is being searched (from
+    the same thread).
+    """
+
+    def __init__(self, names=()):
+        self._names = {}   # lowercased -> display name
+        self._sorted = []  # lowercased, sorted, for prefix search
+        self._grams = {}   # n-gram (n <= GRAM) -> set of lowercased names
+        self.add(names)
+
+    def __len__(self):
+        return len(self._names)
+
+    def add(self, names):
+        """Index new names; returns the ones that were not indexed yet"""
+        added = []
+        for name in names:
+            key = name.lower()
+            if key in self._names:
+                continue
+            self._names[key] = name
+            added.append(name)
+            for n in range(1, GRAM + 1):
+                for i in range(len(key) - n + 1):
+                    self._grams.setdefault(key[i:i + n], set()).add(key)
+        if added:
+            self._sorted = sorted(self._names)
+        return added
+
+    def retain(self, names):
+        """Drop the indexed names not in `names` (processes that exited); returns them"""
+        keep = {name.lower() for name in names}
+        stale = [key for key in self._names if key not in keep]
+        for key in stale:
+            for n in range(1, GRAM + 1):
+                for i in range(len(key) - n + 1):
+                    gram = key[i:i + n]
+                    postings = self._grams.get(gram)
+                    if postings is not None:
+                        postings.discard(key)
+                        if not postings:
+                            del self._grams[gram]
+        if stale:
+            self._sorted = [key for key in self._sorted if key in keep]
+        return [self._names.pop(key) for key in stale]
+
+    def _prefixed(self, query):
+        keys = self._sorted
+        i = bisect_left(keys, query)
+        found = []
+        while i < len(keys) and keys[i].startswith(query):
+            found.append(keys[i])
+            i += 1
+        return found
+
+    def search(self, query=""):
+        """Display names matching `query`: prefix matches first, then substring matches"""
+        query = query.strip().lower()
+        if not query:
+            return [self._names[key] for key in self._sorted]
+
+        prefixed = self._prefixed(query)
+        if len(query) <= GRAM:
+            candidates = self._grams.get(query, ())
+        else:
+            postings = [self._grams.get(query[i:i + GRAM], ()) for i in range(len(query) - GRAM + 1)]
+            postings.sort(key=len)
+            candidates = set(postings[0]).intersection(*postings[1:])
+            candidates = [key for key in candidates if query in key]
+        first = set(prefixed)
+        rest = sorted(key for key in candidates if key not in first)
+        return [self._names[key] for key in prefixed + rest]
+
+
+def list_window_processes(backend, process_cache, sink, batch_size=20):
+    """Call sink(names) with batches of process names that own a titled window"""
+    seen = set()
+    batch = []
+    for hwnd in backend.enum_windows():
+        snapshot = DesktopSnapshot.capture(backend, process_cache, hwnds=(hwnd,))
+        for window in snapshot.windows:
+            name = window.name.replace('.exe', '')
+            if name in seen:
+                continue
+            try:
+                title = backend.get_window_text(hwnd)
+            except Exception:
+                continue
+            if title:  # Top-level windows with titles
+                seen.add(name)
+                batch.append(name)
+        if len(batch) >= batch_size:
+            sink(batch)
+            batch = []
+    if batch:
+        sink(batch)
+    return seen
+
+
+class ProcessLister:
+    """Lists window-owning processes off the Tk thread, caching the last full list
+
+    Shared by every Add Rule dialog of an app.
+    """
+
+    def __init__(self, backend, process_cache=None, max_age=10.0, clock=time.monotonic):
+        self.backend = backend
+        self.process_cache = process_cache
+        self.max_age = max_age
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._names = None
+        self._listed_at = None
+
+    def fresh(self):
+        """The last complete list if it is recent enough, else None"""
+        with self._lock:
+            if self._names is None or self.clock() - self._listed_at > self.max_age:
+                return None
+            return list(self._names)
+
+    def start(self, sink):
+        """List on a worker thread: sink(batch) per batch of names, then sink(None)
+
+        `sink` is called on the worker thread; queue.Queue.put is a good sink.
+        """
+        def run():
+            try:
+                names = list_window_processes(self.backend, self.process_cache, sink)
+            except Exception:
+                names = None
+            if names is not None:
+                with self._lock:
+                    self._names = sorted(names, key=str.lower)
+                    self._listed_at = self.clock()
+            sink(None)
+
+        thread = threading.Thread(target=run, daemon=True, name="wmm-process-list")
+        thread.start()
+        return thread
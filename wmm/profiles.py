@@ -0,0 +1,114 @@
+"""Named layout profiles
+
+A config can hold several rule lists under names ("docked", "presenting",
+"remote") and mark one active:
+
+    {"profile": "docked",
+     "profiles": {"docked": [...], "presenting": [...], "remote": [...]},
+     "settings": {...}}
+
+A plain config (a rule list, or an object with "rules") is one profile
+named "default". Every profile is compiled when the config is loaded: its
+rules resolved and indexed into a RuleSet, and mapped onto the current
+monitors in a MonitorMap. Switching profiles then hands the engine a
+ready-made RuleSet, which costs the same however many rules there are, and
+the engine re-places only the windows of rules the new profile adds, in one
+batched layout pass.
+"""
+
+from .rules import RuleSet
+
+DEFAULT_PROFILE = 'default'
+
+
+class LayoutProfile:
+    """One named rule list, compiled"""
+
+    __slots__ = ('name', 'rules', 'ruleset', 'monitor_map')
+
+    def __init__(self, name, rules, topology=None):
+        self.name = name
+        self.rules = rules  # as configured, for saving
+        self.ruleset = RuleSet(rules)
+        # The engine thread replaces this after a display change
+        self.monitor_map = topology.monitor_map(self.ruleset.rules) if topology else None
+
+    def __repr__(self):
+        return f"LayoutProfile({self.name!r}, {len(self.ruleset)} rules)"
+
+
+class ProfileSet:
+    """Compiled profiles by name
+
+    Immutable apart from the monitor maps: with_profile() returns a new set,
+    so the engine can publish one by assignment, as it does with a RuleSet.
+    """
+
+    def __init__(self, profiles=None, topology=None, compiled=None):
+        if compiled is None:
+            compiled = {name: LayoutProfile(name, rules, topology)
+                        for name, rules in (profiles or {}).items()}
+        self._profiles = compiled
+        self._by_ruleset = {id(profile.ruleset): profile for profile in compiled.values()}
+
+    def __len__(self):
+        return len(self._profiles)
+
+    def __contains__(self, name):
+        return name in self._profiles
+
+    def __iter__(self):
+        return iter(self._profiles.values())
+
+    def names(self):
+        return list(self._profiles)
+
+    def get(self, name):
+        return self._profiles.get(name)
+
+    def for_ruleset(self, ruleset):
+        """The profile `ruleset` was compiled for, or None"""
+        profile = self._by_ruleset.get(id(ruleset))
+        return profile if profile is not None and profile.ruleset is ruleset else None
+
+    def with_profile(self, name, rules, topology=None):
+        """New set with profile `name` added or recompiled from `rules`"""
+        compiled = dict(self._profiles)
+        compiled[name] = LayoutProfile(name, rules, topology)
+        return ProfileSet(compiled=compiled)
+
+    def rehome(self, topology, generation):
+        """Re-map profiles whose monitor map predates display `generation`"""
+        for profile in self._profiles.values():
+            if profile.monitor_map is None or profile.monitor_map.generation != generation:
+                profile.monitor_map = topology.monitor_map(profile.ruleset.rules)
+
+
+def split_profiles(data):
+    """({name: rules}, active name) from decoded config JSON
+
+    Raises ValueError for a malformed "profiles" object or an active
+    profile that is not in it.
+    """
+    if isinstance(data, list):
+        return {DEFAULT_PROFILE: data}, DEFAULT_PROFILE
+    if not isinstance(data, dict):
+        raise ValueError("config must be a list of rules or an object")
+
+    profiles = data.get('profiles')
+    if profiles is None:
+        rules = data.get('rules', [])
+        if not isinstance(rules, list):
+            raise ValueError("rules must be a list")
+        return {DEFAULT_PROFILE: rules}, DEFAULT_PROFILE
+
+    if not isinstance(profiles, dict) or not profiles:
+        raise ValueError("profiles must be an object mapping names to rule lists")
+    for name, rules in profiles.items():
+        if not isinstance(rules, list):
+            raise ValueError(f"profile {name!r} must be a list of rules")
+    active = data.get('profile', next(iter(profiles)))
+    if active not in profiles:
+        raise ValueError(f"active profile {active!r} is not in profiles "
+                         f"({', '.join(profiles)})")
+    return profiles, active
@@ -0,0 +1,129 @@
+"""Startup profiling for --profile-startup
+
+Records wall time per named startup phase and, like `python -X importtime`,
+the self and cumulative time of every module imported while profiling. The
+import timing wraps builtins.__import__, so it only sees imports that happen
+after start(); run it as early as possible.
+"""
+
+import builtins
+import importlib.util
+import sys
+import time
+from contextlib import contextmanager
+
+
+class StartupProfiler:
+    def __init__(self, clock=time.perf_counter):
+        self.clock = clock
+        self.started = clock()
+        self.phases = []   # (name, seconds)
+        self.imports = []  # (name, self_seconds, cumulative_seconds), in completion order
+        self._original_import = None
+        self._stack = []   # per active import: [child_seconds]
+        self.reported = False
+
+    def start(self):
+        """Begin timing imports"""
+        if self._original_import is not None:
+            return
+        self._original_import = builtins.__import__
+        builtins.__import__ = self._timed_import
+
+    def stop(self):
+        if self._original_import is not None:
+            builtins.__import__ = self._original_import
+            self._original_import = None
+
+    def _new_module(self, name, globals, fromlist, level):
+        """Name of the module this import statement will load, or None"""
+        if level:
+            package = (globals or {}).get('__package__') or ''
+            try:
+                name = importlib.util.resolve_name('.' * level + name, package)
+            except (ImportError, ValueError):
+                return None
+        if name not in sys.modules:
+            return name
+        # `from package import submodule` loads the submodule, not the package
+        for item in fromlist or ():
+            if item != '*' and f"{name}.{item}" not in sys.modules:
+                return f"{name}.{item}"
+        return None
+
+    def _timed_import(self, name, globals=None, locals=None, fromlist=(), level=0):
+        original = self._original_import
+        module = self._new_module(name, globals, fromlist, level)
+        if module is None:
+            return original(name, globals, locals, fromlist, level)
+
+        self._stack.append([0.0])
+        start = self.clock()
+        try:
+            return original(name, globals, locals, fromlist, level)
+        finally:
+            cumulative = self.clock() - start
+            children = self._stack.pop()[0]
+            # `from module import name` also looks like a submodule until it
+            # has run; only record what actually became a module
+            if module in sys.modules:
+                self.imports.append((module, cumulative - children, cumulative))
+                counted = cumulative
+            else:
+                counted = children
+            if self._stack:
+                self._stack[-1][0] += counted
+
+    @contextmanager
+    def phase(self, name):
+        start = self.clock()
+        try:
+            yield
+        finally:
+            self.phases.append((name, self.clock() - start))
+
+    def mark(self, name, since):
+        """Record a phase that started at `since` (a value from clock())"""
+        self.phases.append((name, self.clock() - since))
+
+    def report(self, stream=None, top=25):
+        """Print the phase table and the slowest imports"""
+        stream = stream or sys.stderr
+        self.stop()
+        self.reported = True
+        total = self.clock() - self.started
+
+        stream.write("Startup phases:\n")
+        for name, seconds in self.phases:
+            stream.write(f"  {seconds * 1000:>9.1f} ms  {name}\n")
+        stream.write(f"  {total * 1000:>9.1f} ms  total since profiler start\n")
+
+        if self.imports:
+            stream.write(f"\nSlowest imports (-X importtime style, top {top} by cumulative):\n")
+            stream.write("  import time:  self [us] | cumulative | imported package\n")
+            slowest = sorted(self.imports, key=lambda item: item[2], reverse=True)[:top]
+            for name, self_s, cumulative in slowest:
+                stream.write(f"  import time: {self_s * 1e6:>10.0f} | {cumulative * 1e6:>10.0f} | {name}\n")
+        stream.flush()
+
+
+class NullProfiler:
+    """Stand-in used when startup profiling is off"""
+
+    @contextmanager
+    def phase(self, name):
+        yield
+
+    def mark(self, name, since):
+        pass
+
+    def report(self, stream=None, top=25):
+        pass
+
+    def stop(self):
+        pass
+
+    clock = staticmethod(time.perf_counter)
+
+
+NULL_PROFILER = NullProfiler()
@@ -0,0 +1,82 @@
+"""Retry queue for failed moves
+
+A window the engine can't move (an elevated or protected window, typically)
+used to be retried on every scan, forever, each time paying the move's
+settle sleeps and logging another failure. Failed placements now go into a
+priority queue keyed by the time they are due again; the delay doubles with
+every failed attempt, up to a cap, and after `max_attempts` the window is
+given up on. A given-up window costs a dict lookup per scan until a rule
+change, Apply Layout Now or a restart gives it another chance.
+"""
+
+import heapq
+import itertools
+
+
+class RetryQueue:
+    """Due times for failed placements, earliest first
+
+    Used from the engine thread only. Keys are tracker keys; rescheduling a
+    key replaces its earlier due time, and stale heap entries are skipped
+    when popped.
+    """
+
+    def __init__(self, max_attempts=5, base_delay=1.0, factor=2.0, max_delay=300.0):
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.factor = factor
+        self.max_delay = max_delay
+        self._heap = []   # (due, seq, key)
+        self._due = {}    # key -> due time of its live heap entry
+        self._seq = itertools.count()
+
+    def __len__(self):
+        return len(self._due)
+
+    def __contains__(self, key):
+        return key in self._due
+
+    def configure(self, max_attempts=None, base_delay=None):
+        if max_attempts is not None:
+            self.max_attempts = max_attempts
+        if base_delay is not None:
+            self.base_delay = base_delay
+
+    def delay(self, attempts):
+        """Backoff after `attempts` failed attempts"""
+        return min(self.base_delay * self.factor ** (attempts - 1), self.max_delay)
+
+    def schedule(self, key, attempts, now):
+        """Queue a retry after a failure; returns the due time, or None to give up"""
+        if attempts >= self.max_attempts:
+            self.discard(key)
+            return None
+        due = now + self.delay(attempts)
+        self._due[key] = due
+        heapq.heappush(self._heap, (due, next(self._seq), key))
+        return due
+
+    def discard(self, key):
+        self._due.pop(key, None)
+
+    def next_due(self):
+        """Earliest due time, or None if nothing is queued"""
+        heap = self._heap
+        while heap and self._due.get(heap[0][2]) != heap[0][0]:
+            heapq.heappop(heap)
+        return heap[0][0] if heap else None
+
+    def pop_due(self, now):
+        """Keys due at `now`, earliest first"""
+        keys = []
+        heap = self._heap
+        while heap and heap[0][0] <= now:
+            due, _, key = heapq.heappop(heap)
+            if self._due.get(key) == due:
+                del self._due[key]
+                keys.append(key)
+        return keys
+
+    def clear(self):
+        self._heap.clear()
+        self._due.clear()
@@ -0,0 +1,282 @@
+"""Rule compiler
+
+A rule matches on the process name and, optionally, the window title, the
+window class and the process executable path. Every field takes the same
+pattern syntax:
+
+    "chrome"           exact, case-insensitive (.exe is optional for processes)
+    "term*", "a?b"     glob, case-insensitive, must match the whole value
+    "re:.*Grafana.*"   regular expression, case-insensitive, searched
+
+    {"process": "chrome", "title": "re:Grafana", "monitor": {...}}
+    {"process": "*", "path": "C:\\\\Tools\\\\*", "priority": 10, "monitor": {...}}
+
+Rules are tried highest `priority` first (default 0), then in list order, and
+the first rule that matches a window wins.
+
+Evaluating every pattern of every rule against every window each tick would
+be expensive, so RuleMatcher compiles the rule list once: exact process names
+go in a hash table, process patterns are combined into one alternation used
+to reject names quickly (unless one has groups), and the resulting candidate
+list is memoized per distinct process name. Title, class and path are only
+fetched for windows whose process has a candidate rule that needs them.
+
+The engine works from a RuleSet: the rule list resolved and validated once
+into Rule records (defaults filled in, names lower-cased, monitor bounds
+checked, see models.py), compiled, and frozen. Editors build a new RuleSet
+and the engine swaps the reference in between batches, so rules can change
+while monitoring runs without the engine ever seeing a half-edited list.
+"""
+
+import fnmatch
+import re
+
+from .arrange import ARRANGE_MODES
+from .backend import normalize_process_name
+from .models import MonitorRect, Rule, SizeMode
+
+REGEX_PREFIX = 're:'
+GLOB_CHARS = frozenset('*?[')
+
+# Optional per-rule match fields, besides 'process'
+MATCH_FIELDS = ('title', 'class', 'path')
+
+SIZE_MODES = tuple(mode.value for mode in SizeMode)
+
+
+class Pattern:
+    """One compiled match field"""
+
+    __slots__ = ('spec', 'literal', 'regex', 'source')
+
+    def __init__(self, spec, normalize=str.lower):
+        self.spec = spec
+        self.literal = None
+        self.regex = None
+        if spec.startswith(REGEX_PREFIX):
+            # Searched, so match from the start for the combined alternation
+            self.source = f".*?(?:{spec[len(REGEX_PREFIX):]})"
+            self.regex = re.compile(self.source, re.IGNORECASE | re.DOTALL)
+        elif GLOB_CHARS.intersection(spec):
+            self.source = fnmatch.translate(normalize(spec))
+            self.regex = re.compile(self.source, re.IGNORECASE)
+        else:
+            self.literal = normalize(spec)
+            self.source = re.escape(self.literal) + r'\Z'
+
+    def matches(self, value):
+        if self.literal is not None:
+            return value.lower() == self.literal
+        return self.regex.match(value) is not None
+
+    def __repr__(self):
+        return f"Pattern({self.spec!r})"
+
+
+class CompiledRule:
+    """A Rule plus its compiled patterns and sort key"""
+
+    __slots__ = ('rule', 'order', 'priority', 'process', 'title', 'class_name', 'path')
+
+    def __init__(self, rule, order):
+        self.rule = rule
+        self.order = order
+        self.priority = rule.priority
+        self.process = Pattern(rule.process, normalize_process_name)
+        self.title = Pattern(rule.title) if rule.title else None
+        self.class_name = Pattern(rule.class_name) if rule.class_name else None
+        self.path = Pattern(rule.path) if rule.path else None
+
+    @property
+    def sort_key(self):
+        return (-self.priority, self.order)
+
+
+def compile_rule(rule, order=0):
+    """Compile one Rule; raises re.error if a pattern is invalid"""
+    return CompiledRule(rule, order)
+
+
+class RuleMatcher:
+    """Compiled, immutable view of a list of Rules (see resolve_rule)
+
+    Rules with invalid patterns are skipped and reported in `errors` as
+    (rule, message).
+    """
+
+    MEMO_LIMIT = 4096
+
+    def __init__(self, rules):
+        self.rules = list(rules)
+        self.entries = []
+        self.errors = []
+        for order, rule in enumerate(self.rules):
+            try:
+                self.entries.append(compile_rule(rule, order))
+            except re.error as e:
+                self.errors.append((rule, str(e)))
+
+        self._exact = {}
+        patterns = []
+        for entry in self.entries:
+            if entry.process.literal is not None:
+                self._exact.setdefault(entry.process.literal, []).append(entry)
+            else:
+                patterns.append(entry)
+        self._patterns = patterns
+
+        self._combined = None
+        # Combining renumbers groups, which would point a backreference like
+        # \1 at another pattern's group; patterns with groups are tested one
+        # by one
+        if patterns and not any(e.process.regex.groups for e in patterns):
+            try:
+                self._combined = re.compile('|'.join(f"(?:{e.process.source})" for e in patterns),
+                                            re.IGNORECASE | re.DOTALL)
+            except re.error:
+                # e.g. a user regex with inline global flags; test one by one
+                self._combined = None
+
+        self._candidates = {}
+        self._paths = {}
+
+    def __len__(self):
+        return len(self.entries)
+
+    def candidates(self, process):
+        """Rules that can match windows of a (normalized) process, best first"""
+        found = self._candidates.get(process)
+        if found is None:
+            found = list(self._exact.get(process, ()))
+            if self._patterns and (self._combined is None or self._combined.match(process)):
+                found.extend(e for e in self._patterns if e.process.matches(process))
+            found.sort(key=lambda e: e.sort_key)
+            found = tuple(found)
+            if len(self._candidates) >= self.MEMO_LIMIT:
+                self._candidates.clear()
+            self._candidates[process] = found
+        return found
+
+    def match_window(self, window, backend):
+        """First matching rule for a snapshot window, or None
+
+        Titles and classes are fetched only for windows a rule with a title
+        or class pattern could match, and stored on the WindowInfo so later
+        stages (logging, placement) don't fetch them again.
+        """
+        for entry in self.candidates(window.process):
+            if entry.title is not None:
+                title = window.title
+                if title is None:
+                    title = window.title = backend.get_window_text(window.hwnd)
+                if not entry.title.matches(title):
+                    continue
+            if entry.class_name is not None:
+                class_name = window.class_name
+                if class_name is None:
+                    class_name = window.class_name = backend.get_class_name(window.hwnd)
+                if not entry.class_name.matches(class_name):
+                    continue
+            if entry.path is not None:
+                if not entry.path.matches(self._process_path(window, backend)):
+                    continue
+            return entry.rule
+        return None
+
+    def _process_path(self, window, backend):
+        key = (window.pid, window.create_time)
+        path = self._paths.get(key)
+        if path is None:
+            try:
+                path = backend.get_process_path(window.pid)
+            except Exception:
+                path = ""
+            if len(self._paths) >= self.MEMO_LIMIT:
+                self._paths.clear()
+            self._paths[key] = path
+        return path
+
+    def match(self, snapshot, backend):
+        """Yield (rule, window) for every snapshot window some rule matches"""
+        candidates = self.candidates
+        for window in snapshot.windows:
+            if not candidates(window.process):
+                continue
+            try:
+                rule = self.match_window(window, backend)
+            except Exception:
+                # Window went away while fetching its title/class
+                continue
+            if rule is not None:
+                yield rule, window
+
+
+def resolve_rule(rule):
+    """Rule record for a config rule, validated, with defaults filled in
+
+    Raises ValueError for a rule the engine can't act on. Process names are
+    normalized, so two spellings of the same rule ("Chrome.exe" and
+    "chrome") get the same key.
+    """
+    if not isinstance(rule, dict):
+        raise ValueError("rule must be an object")
+
+    process = rule.get('process')
+    if not isinstance(process, str) or not process.strip():
+        raise ValueError("rule has no process pattern")
+    process = process.strip()
+    if not process.startswith(REGEX_PREFIX):
+        # Regexes keep their case: \D and \d differ
+        process = normalize_process_name(process)
+
+    monitor = rule.get('monitor')
+    if not isinstance(monitor, dict):
+        raise ValueError("rule has no target monitor")
+    monitor = MonitorRect.from_dict(monitor)
+
+    size = rule.get('size', 'normal')
+    if size not in SIZE_MODES:
+        raise ValueError(f"size must be one of {', '.join(SIZE_MODES)}, got {size!r}")
+
+    try:
+        priority = int(rule.get('priority', 0))
+    except (TypeError, ValueError):
+        raise ValueError(f"priority must be an integer, got {rule.get('priority')!r}") from None
+
+    arrange = rule.get('arrange')
+    if arrange is not None and arrange not in ARRANGE_MODES:
+        raise ValueError(f"arrange must be one of {', '.join(ARRANGE_MODES)}, got {arrange!r}")
+
+    title, class_name, path = (str(rule[field]) if rule.get(field) else None
+                               for field in MATCH_FIELDS)
+    return Rule(process, monitor, SizeMode(size), priority, arrange, title, class_name, path)
+
+
+class RuleSet:
+    """Immutable, resolved and compiled snapshot of a rule list
+
+    Build it on the thread that edits the rules; hand it to the engine as a
+    single reference. Invalid rules are left out and listed in `errors` as
+    (rule, message).
+    """
+
+    def __init__(self, rules=()):
+        resolved = []
+        errors = []
+        for rule in rules:
+            try:
+                rule_resolved = resolve_rule(rule)
+                # Catch bad patterns here rather than in the matcher
+                compile_rule(rule_resolved)
+            except (ValueError, re.error) as e:
+                errors.append((rule, str(e)))
+            else:
+                resolved.append(rule_resolved)
+
+        self.rules = tuple(resolved)
+        self.matcher = RuleMatcher(self.rules)
+        self.errors = tuple(errors)
+        self.keys = frozenset(rule.key for rule in self.rules)
+
+    def __len__(self):
+        return len(self.rules)
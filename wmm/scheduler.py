@@ -0,0 +1,90 @@
+"""Adaptive rescan interval
+
+An idle desktop doesn't need a full scan twice a second, and a login storm
+needs more than that. The scheduler doubles the interval for every rescan
+that finds the desktop unchanged, and drops straight to the minimum when new
+top-level windows or new PIDs of watched processes appear.
+"""
+
+import time
+from collections import deque
+
+REASON_START = "start"
+REASON_NEW_WINDOWS = "new windows"
+REASON_NEW_PIDS = "new watched pids"
+REASON_IDLE = "idle backoff"
+REASON_CHANGED = "desktop changed"
+
+
+class AdaptivePollScheduler:
+    """Computes the next rescan interval from consecutive snapshots
+
+    Pure bookkeeping: the caller passes each snapshot's hwnds and watched
+    PIDs to observe() and sleeps for `interval`. The clock is only used to
+    timestamp history entries, so a fake clock makes it fully deterministic.
+    """
+
+    def __init__(self, min_interval=0.1, max_interval=5.0, initial_interval=0.5,
+                 backoff=2.0, clock=time.monotonic, history_size=50):
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.backoff = backoff
+        self.clock = clock
+        self.interval = min(max(initial_interval, min_interval), max_interval)
+        self.reason = REASON_START
+        self.history = deque(maxlen=history_size)  # (timestamp, interval, reason)
+        self.changes = 0
+        self._hwnds = None
+        self._pids = None
+
+    def set_bounds(self, min_interval, max_interval):
+        if min_interval <= 0 or max_interval < min_interval:
+            raise ValueError(f"invalid poll bounds {min_interval}..{max_interval}")
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self._set(min(max(self.interval, min_interval), max_interval), self.reason)
+
+    def reset(self):
+        """Forget the previous snapshot (e.g. when monitoring restarts)"""
+        self._hwnds = None
+        self._pids = None
+
+    def observe(self, hwnds, watched_pids):
+        """Record one rescan and return the interval until the next one"""
+        hwnds = frozenset(hwnds)
+        watched_pids = frozenset(watched_pids)
+        previous_hwnds, previous_pids = self._hwnds, self._pids
+        self._hwnds, self._pids = hwnds, watched_pids
+
+        if previous_hwnds is None:
+            return self.interval
+
+        if not hwnds.issubset(previous_hwnds):
+            self._set(self.min_interval, REASON_NEW_WINDOWS)
+        elif not watched_pids.issubset(previous_pids):
+            self._set(self.min_interval, REASON_NEW_PIDS)
+        elif hwnds == previous_hwnds:
+            self._set(min(self.interval * self.backoff, self.max_interval), REASON_IDLE)
+        else:
+            # Only closures: nothing new to place, hold the current cadence
+            self._set(self.interval, REASON_CHANGED)
+        return self.interval
+
+    def _set(self, interval, reason):
+        if interval == self.interval and reason == self.reason:
+            return
+        if interval != self.interval:
+            self.changes += 1
+            self.history.append((self.clock(), interval, reason))
+        self.interval = interval
+        self.reason = reason
+
+    def stats(self):
+        return {
+            'interval': self.interval,
+            'reason': self.reason,
+            'min_interval': self.min_interval,
+            'max_interval': self.max_interval,
+            'changes': self.changes,
+            'history': list(self.history),
+        }
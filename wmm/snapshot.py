@@ -0,0 +1,216 @@
+"""One-pass desktop snapshot
+
+The monitor loop used to call EnumWindows once per rule to find windows and
+again per rule to prune the moved set. A snapshot enumerates the desktop once
+per tick and groups windows by process name; the compiled RuleMatcher then
+routes each window to its rule, so a tick costs O(windows + rules).
+
+Most windows in a tick were already there in the previous one, yet a full
+capture asks each of them again whether it is visible, top-level and which
+process owns it. DeltaScanner keeps what it learned: each scan enumerates
+the cheap hwnd list, diffs it against the last one and inspects only hwnds
+it has not seen. Hidden windows are re-checked every scan for a few seconds
+after they appear (apps usually create a window hidden and show it right
+away), and every known hwnd's visibility, owner and owning process are
+re-checked at a low frequency, which also catches a closed window's hwnd
+being reused by a new one. The engine also drops an hwnd from the scanner on its window
+events.
+
+Windows are WindowInfo records (models.py). The scanner keeps each one for
+as long as its hwnd is seen, so a steady-state scan allocates little more
+than the snapshot's list.
+"""
+
+import time
+
+from .backend import normalize_process_name
+from .models import WindowInfo
+from .process_cache import ProcessInfo
+
+
+def _uncached_lookup(backend):
+    def lookup(pid, validate=False):
+        name = backend.get_process_name(pid)
+        return ProcessInfo(pid, name, normalize_process_name(name), None)
+    return lookup
+
+
+def _inspect(backend, hwnd, lookup, processes):
+    """WindowInfo for a visible top-level hwnd, or None; raises if it went away"""
+    if not backend.is_window_visible(hwnd):
+        return None
+    if backend.get_parent(hwnd) != 0:
+        return None
+    pid = backend.get_window_pid(hwnd)
+    info = processes.get(pid)
+    if info is None:
+        # A window the caller hasn't seen: make sure the PID wasn't recycled
+        info = processes[pid] = lookup(pid, validate=True)
+    return WindowInfo(hwnd, pid, info.key, info.name, info.create_time)
+
+
+class DesktopSnapshot:
+    """Visible top-level windows at one point in time, grouped by process on demand"""
+
+    def __init__(self, windows):
+        self.windows = windows
+        self._by_process = None
+
+    @property
+    def by_process(self):
+        if self._by_process is None:
+            self._by_process = {}
+            for window in self.windows:
+                self._by_process.setdefault(window.process, []).append(window)
+        return self._by_process
+
+    @classmethod
+    def capture(cls, backend, process_cache=None, hwnds=None):
+        """Enumerate the desktop once, or just inspect `hwnds` if given
+
+        Each PID is resolved at most once per capture; with a ProcessCache
+        it is usually not resolved from scratch at all.
+        """
+        lookup = process_cache.lookup if process_cache is not None else _uncached_lookup(backend)
+        if hwnds is None:
+            hwnds = backend.enum_windows()
+        processes = {}
+        windows = []
+        for hwnd in hwnds:
+            try:
+                window = _inspect(backend, hwnd, lookup, processes)
+            except Exception:
+                # Window closed or process exited mid-enumeration
+                continue
+            if window is not None:
+                windows.append(window)
+        return cls(windows)
+
+    def windows_for(self, process):
+        """Windows owned by a process (name already normalized)"""
+        return self.by_process.get(process, ())
+
+
+class DeltaScanner:
+    """Incremental replacement for DesktopSnapshot.capture() on repeated scans
+
+    Used from one thread (the engine's). Each scan returns a fresh
+    DesktopSnapshot of the WindowInfo records it keeps; the title and class
+    the matcher filled in are cleared first, so they are fetched again
+    every scan, as with capture(). A snapshot is only valid until the next
+    scan.
+    `last_calls` is the number of window and process calls the last scan
+    made: in steady state one enumeration, plus a visibility and a PID
+    check per hwnd on a refresh.
+    """
+
+    def __init__(self, backend, process_cache=None, refresh_interval=2.0, young_period=5.0,
+                 clock=time.monotonic):
+        self.backend = backend
+        self.lookup = (process_cache.lookup if process_cache is not None
+                       else _uncached_lookup(backend))
+        self.refresh_interval = refresh_interval
+        self.young_period = young_period
+        self.clock = clock
+        self._windows = {}   # hwnd -> WindowInfo of a visible top-level window
+        self._hidden = {}    # hwnd -> when first seen hidden
+        self._owned = set()  # visible but owned by another window; checked again on refresh
+        self._refreshed_at = None
+        self.scans = 0
+        self.refreshes = 0
+        self.last_calls = 0
+        self.last_new = 0
+
+    def __len__(self):
+        return len(self._windows) + len(self._hidden) + len(self._owned)
+
+    def reset(self):
+        self._windows.clear()
+        self._hidden.clear()
+        self._owned.clear()
+        self._refreshed_at = None
+
+    def forget(self, hwnd):
+        """Inspect `hwnd` afresh next scan (it was created, shown or destroyed)"""
+        self._windows.pop(hwnd, None)
+        self._hidden.pop(hwnd, None)
+        self._owned.discard(hwnd)
+
+    def scan(self):
+        backend = self.backend
+        hwnds = backend.enum_windows()
+        calls = 1
+        now = self.clock()
+        refresh = self._refreshed_at is None or now - self._refreshed_at >= self.refresh_interval
+        if refresh:
+            self._refreshed_at = now
+            self.refreshes += 1
+
+        known = self._windows
+        hidden = self._hidden
+        owned = self._owned
+        young = now - self.young_period
+        windows = {}
+        still_hidden = {}
+        still_owned = set()
+        processes = {}
+        new = 0
+        for hwnd in hwnds:
+            window = known.get(hwnd)
+            was_owned = window is None and hwnd in owned
+            if was_owned and not refresh:
+                still_owned.add(hwnd)
+                continue
+            seen = hidden.get(hwnd)
+            if window is None and seen is not None and not refresh and seen <= young:
+                still_hidden[hwnd] = seen
+                continue
+
+            try:
+                if window is not None:
+                    # Fetched again if a rule needs them this scan
+                    window.title = window.class_name = None
+                    if not refresh:
+                        windows[hwnd] = window
+                        continue
+                # New hwnd, a refresh, or a recently created hidden window
+                calls += 1
+                if not backend.is_window_visible(hwnd):
+                    still_hidden[hwnd] = now if seen is None else seen
+                    continue
+                if window is not None:
+                    # Its hwnd may have been closed and reused by a window of
+                    # another process, which needs a record (and key) of its own
+                    calls += 1
+                    pid = backend.get_window_pid(hwnd)
+                    # Same PID: the cached process, re-read once its TTL is up
+                    if pid == window.pid and self.lookup(pid).create_time == window.create_time:
+                        windows[hwnd] = window
+                        continue
+
+                if not was_owned:
+                    new += 1
+                # Owned windows too, on a refresh: the owner may have let go, or
+                # the hwnd may now belong to a top-level window
+                calls += 1
+                if backend.get_parent(hwnd) != 0:
+                    still_owned.add(hwnd)
+                    continue
+                calls += 1
+                pid = backend.get_window_pid(hwnd)
+                info = processes.get(pid)
+                if info is None:
+                    calls += 1
+                    info = processes[pid] = self.lookup(pid, validate=True)
+            except Exception:
+                # Gone, or its process can't be read right now; try again next scan
+                continue
+            windows[hwnd] = WindowInfo(hwnd, pid, info.key, info.name, info.create_time)
+
+        self._windows = windows
+        self._hidden = still_hidden
+        self._owned = still_owned
+        self.scans += 1
+        self.last_calls = calls
+        self.last_new = new
+        return DesktopSnapshot(list(windows.values()))
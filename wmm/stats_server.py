@@ -0,0 +1,66 @@
+"""Opt-in local HTTP endpoint for engine stats
+
+    GET /stats     JSON (PlacementEngine.stats())
+    GET /metrics   Prometheus text format
+
+Binds to 127.0.0.1 only; it is meant for a local scraper or agent, not for
+remote access. Enabled with the stats_port setting or --stats-port.
+"""
+
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from .metrics import format_prometheus
+
+
+class StatsServer:
+    """Serves `stats()` over HTTP from a background thread"""
+
+    def __init__(self, stats, port, host="127.0.0.1"):
+        self.stats = stats
+        self.host = host
+        self.port = port
+        self._server = None
+
+    def start(self):
+        """Bind and serve; raises OSError if the port is taken"""
+        stats = self.stats
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                path = self.path.split('?', 1)[0]
+                if path == '/metrics':
+                    body = format_prometheus(stats()).encode()
+                    content_type = "text/plain; version=0.0.4; charset=utf-8"
+                elif path in ('/', '/stats'):
+                    body = json.dumps(stats(), indent=2).encode()
+                    content_type = "application/json"
+                else:
+                    self.send_error(404)
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((self.host, self.port), Handler)
+        self._server.daemon_threads = True
+        # Port 0 picks a free port; report the real one
+        self.port = self._server.server_address[1]
+        threading.Thread(target=self._server.serve_forever, daemon=True,
+                         name="wmm-stats").start()
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    @property
+    def url(self):
+        return f"http://{self.host}:{self.port}/"
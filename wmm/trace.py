@@ -0,0 +1,495 @@
+"""Desktop traces: record what the engine saw, replay it anywhere
+
+A placement bug that only happens on one desk ("Teams opens on the wrong
+screen after unlocking") can't be reproduced from a log line. With a
+TraceRecorder attached, the engine writes down what it observes:
+
+    trace   header: format version, platform, detection mode, retry settings
+    rules   the resolved rules in use, and again whenever they change
+    mon     the monitor layout, and again whenever it changes
+    proc    a process seen for the first time (pid, name, start time, path)
+    snap    windows that appeared (title, class, restored rect, show state)
+            and, after a full rescan, hwnds that went away
+    ev      each event the engine handled
+    move    the outcome of each move; `layout` for a batched layout pass
+
+One JSON object per line with short keys, each stamped with `t`, seconds
+since recording started. A trace can be read while it is being written and
+cut at any line; a path ending in .gz is gzipped. Window titles are
+recorded, so a trace is as private as a screenshot.
+
+replay() feeds a trace back through a PlacementEngine on a FakeBackend
+rebuilt from it, on a virtual clock with the move settle sleeps skipped, so
+an hour of desktop replays in seconds. Moves that failed when recorded
+fail again. The ReplayReport lists the decisions the engine made and what
+it spent making them; its JSON form is meant to be diffed between versions.
+"""
+
+import gzip
+import json
+import sys
+import threading
+import time
+from collections import Counter, deque
+
+from .backend import FakeBackend, FakeWindow, workspace_origin
+from .engine import PlacementEngine
+from .events import DESTROYED, PollingEventSource, ScriptedEventSource, WindowEvent
+
+TRACE_VERSION = 1
+FLUSH_INTERVAL = 1.0  # seconds between flushes, so a live trace is readable
+IDLE_POLL = 0.0002    # replay: how often to check for moves still running
+
+
+def open_trace(path, mode='r'):
+    """Text file for a trace, gzipped if the path ends in .gz"""
+    if str(path).endswith('.gz'):
+        return gzip.open(path, mode + 't', encoding='utf-8')
+    return open(path, mode, encoding='utf-8', newline='\n')
+
+
+def read_trace(path):
+    """Trace records as dicts; a cut-off last line is ignored"""
+    with open_trace(path) as f:
+        try:
+            for line in f:
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    return
+        except EOFError:
+            # gzipped trace still being written
+            return
+
+
+def _plain(value):
+    """Deep copy of a backend monitor record, so later changes to it don't leak into the trace"""
+    if hasattr(value, 'items'):
+        return {k: _plain(v) for k, v in value.items()}
+    return value
+
+
+def _decision(rule, hwnd, ok):
+    """[hwnd, process, monitor bounds, size, ok] for one placement"""
+    return [hwnd, rule.process, list(rule.monitor.bounds), rule.size.value, int(bool(ok))]
+
+
+def _layout_decisions(matches, report):
+    failed = set(report.failed)
+    moved = set(report.moved)
+    return [_decision(rule, window.hwnd, window.hwnd not in failed)
+            for rule, window in matches
+            if window.hwnd in moved or window.hwnd in failed]
+
+
+class TraceRecorder:
+    """Writes a trace of what one engine observes
+
+    Create it, attach() it to the engine before starting the engine, and
+    close() it after the engine has stopped. Hooks are called on the engine
+    thread. A write error stops the recording (see `error`), not the engine.
+    """
+
+    def __init__(self, path, backend, clock=time.monotonic):
+        self.path = path
+        self.backend = backend
+        self.clock = clock
+        self.records = 0
+        self.error = None
+        self._lock = threading.Lock()
+        self._file = open_trace(path, 'w')
+        self._start = clock()
+        self._flushed_at = self._start
+        self._windows = {}       # hwnd -> window key the trace describes it as
+        self._processes = set()  # (pid, create_time) already written
+        self._monitors = None
+
+    def attach(self, engine):
+        """Record `engine` from now on"""
+        self._write({'k': 'trace', 'v': TRACE_VERSION, 'platform': sys.platform,
+                     'mode': engine.mode, 'started': round(time.time(), 3),
+                     'retries': [engine.retries.max_attempts, engine.retries.base_delay]})
+        self.rules(engine._next_ruleset.rules)
+        engine.recorder = self
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def _write(self, record):
+        with self._lock:
+            if self._file is None:
+                return
+            now = self.clock()
+            line = json.dumps({'t': round(now - self._start, 4), **record}, separators=(',', ':'))
+            try:
+                self._file.write(line + '\n')
+                if now - self._flushed_at >= FLUSH_INTERVAL:
+                    self._file.flush()
+                    self._flushed_at = now
+            except OSError as e:
+                self.error = e
+                self._file = None
+                return
+            self.records += 1
+
+    def rules(self, rules):
+        self._write({'k': 'rules',
+                     'r': [rule.as_dict() for rule in rules]})
+
+    def monitors(self, monitors):
+        """Record the layout if it differs from the last one recorded"""
+        if monitors is self._monitors or monitors == self._monitors:
+            return
+        self._monitors = monitors
+        self._write({'k': 'mon', 'm': [_plain(m) for m in monitors]})
+
+    def event(self, event):
+        if event.kind == DESTROYED:
+            self._windows.pop(event.hwnd, None)
+        self._write({'k': 'ev', 'e': event.kind, 'h': event.hwnd})
+
+    def snapshot(self, snapshot, full=False):
+        """Record windows new to the trace; after a full scan also the ones gone"""
+        known = self._windows
+        added = [window for window in snapshot.windows if known.get(window.hwnd) != window.key]
+        removed = []
+        if full:
+            current = {window.hwnd for window in snapshot.windows}
+            removed = sorted(hwnd for hwnd in known if hwnd not in current)
+            for hwnd in removed:
+                del known[hwnd]
+        if not added and not removed:
+            return
+
+        described = []
+        for window in added:
+            known[window.hwnd] = window.key
+            description = self._describe(window)
+            if description is not None:
+                described.append(description)
+        record = {'k': 'snap'}
+        if described:
+            record['add'] = described
+        if removed:
+            record['del'] = removed
+        self._write(record)
+
+    def _describe(self, window):
+        """[hwnd, pid, title, class, restored rect, show state], or None if it went away"""
+        hwnd = window.hwnd
+        pid = window.pid
+        process = (pid, window.create_time)
+        if process not in self._processes:
+            self._processes.add(process)
+            try:
+                path = self.backend.get_process_path(pid)
+            except Exception:
+                path = None
+            self._write({'k': 'proc', 'pid': pid, 'n': window.name,
+                         'c': window.create_time, 'path': path})
+        backend = self.backend
+        try:
+            placement = backend.get_window_placement(hwnd)
+            title = backend.get_window_text(hwnd)
+            class_name = backend.get_class_name(hwnd)
+        except Exception:
+            return None
+        # Restored rect in screen coordinates, as the replay's FakeWindow holds it
+        dx, dy = workspace_origin(self._monitors or ())
+        left, top, right, bottom = placement[4]
+        return [hwnd, pid, title, class_name, [left + dx, top + dy, right + dx, bottom + dy],
+                placement[1]]
+
+    def move(self, result):
+        rule = result.tag[0]
+        self._write({'k': 'move', 'm': _decision(rule, result.hwnd, result.ok),
+                     'dt': round(result.finished - result.started, 4)})
+
+    def layout(self, matches, report):
+        self._write({'k': 'layout', 'm': _layout_decisions(matches, report),
+                     'dt': round(report.seconds, 4)})
+
+
+class ReplayBackend(FakeBackend):
+    """FakeBackend that fails the moves that failed when the trace was recorded
+
+    `outcomes` maps hwnds to a deque of recorded results, consumed one per
+    move of that window.
+    """
+
+    def __init__(self, outcomes=None):
+        super().__init__()
+        self.outcomes = outcomes if outcomes is not None else {}
+
+    def put_process(self, pid, name, create_time, path):
+        # Unlike add_process, keeps a path of None: it couldn't be read when
+        # recorded, so it can't be read now either
+        self.processes[pid] = (name, create_time, path)
+
+    def put_window(self, hwnd, pid, title, class_name, rect, show_cmd):
+        self.windows[hwnd] = FakeWindow(hwnd, pid, title, rect=tuple(rect),
+                                        show_cmd=show_cmd, class_name=class_name)
+
+    def get_process_path(self, pid):
+        path = super().get_process_path(pid)
+        if path is None:
+            raise PermissionError(f"path of process {pid} was not readable when recorded")
+        return path
+
+    def _fails(self, hwnd):
+        pending = self.outcomes.get(hwnd)
+        return bool(pending) and not pending[0]
+
+    def set_window_pos(self, hwnd, x, y, w, h, flags):
+        pending = self.outcomes.get(hwnd)
+        if pending and not pending.popleft():
+            self._enter('set_window_pos')
+            raise OSError(f"Move of {hwnd:#x} failed when recorded")
+        super().set_window_pos(hwnd, x, y, w, h, flags)
+
+    def defer_window_pos(self, moves):
+        if any(self._fails(hwnd) for hwnd, *_ in moves):
+            # All or nothing, like the real batch; the fallback fails the window
+            self._enter('defer_window_pos')
+            raise OSError("DeferWindowPos failed when recorded")
+        super().defer_window_pos(moves)
+        for hwnd, *_ in moves:
+            pending = self.outcomes.get(hwnd)
+            if pending:
+                pending.popleft()
+
+
+class VirtualClock:
+    """Clock that stands still until the replay moves it to trace time"""
+
+    def __init__(self, now=0.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+class ReplayReport:
+    """Decisions and cost of one replay
+
+    A decision is (t, via, [hwnd, process, monitor bounds, size, ok]) with
+    `via` 'move' or 'layout'; `recorded` holds the trace's own decisions.
+    `cost` maps an event kind ('idle' for steps without one) to
+    [steps, wall seconds, CPU seconds] spent in the engine.
+    """
+
+    def __init__(self, path):
+        self.path = str(path)
+        self.records = 0
+        self.trace_seconds = 0.0
+        self.wall_seconds = 0.0
+        self.cpu_seconds = 0.0
+        self.events = Counter()
+        self.cost = {}
+        self.decisions = []
+        self.recorded = []
+        self.api_calls = Counter()
+        self.counters = {}
+        self.log = []
+
+    def differences(self):
+        """[(hwnd, recorded, replayed)] for windows whose decisions differ"""
+        def by_hwnd(decisions):
+            grouped = {}
+            for _, _, decision in decisions:
+                grouped.setdefault(decision[0], []).append(decision[1:])
+            return grouped
+        recorded = by_hwnd(self.recorded)
+        replayed = by_hwnd(self.decisions)
+        return [(hwnd, recorded.get(hwnd, []), replayed.get(hwnd, []))
+                for hwnd in sorted(recorded.keys() | replayed.keys())
+                if recorded.get(hwnd) != replayed.get(hwnd)]
+
+    def as_dict(self):
+        return {
+            'trace': self.path,
+            'records': self.records,
+            'trace_seconds': round(self.trace_seconds, 3),
+            'wall_seconds': round(self.wall_seconds, 4),
+            'cpu_seconds': round(self.cpu_seconds, 4),
+            'events': dict(self.events),
+            'cost': {kind: [steps, round(wall, 6), round(cpu, 6)]
+                     for kind, (steps, wall, cpu) in sorted(self.cost.items())},
+            'api_calls': dict(sorted(self.api_calls.items())),
+            'counters': self.counters,
+            'decisions': [[t, via, decision] for t, via, decision in self.decisions],
+            'differences': [[hwnd, recorded, replayed]
+                            for hwnd, recorded, replayed in self.differences()],
+        }
+
+    def format(self):
+        def summary(decisions):
+            failed = sum(1 for _, _, decision in decisions if not decision[-1])
+            return f"{len(decisions)} placements, {failed} failed"
+
+        speed = self.trace_seconds / self.wall_seconds if self.wall_seconds else 0.0
+        lines = [
+            f"Trace: {self.path} ({self.records} records, {self.trace_seconds:.1f}s of desktop)",
+            f"Replayed in {self.wall_seconds * 1000:.0f}ms wall, {self.cpu_seconds * 1000:.0f}ms CPU "
+            f"({speed:.0f}x real time)",
+            "Events: " + (", ".join(f"{kind}={count}" for kind, count in sorted(self.events.items()))
+                          or "none"),
+            "Engine time: " + ", ".join(f"{kind} {wall * 1000:.1f}ms/{steps}"
+                                        for kind, (steps, wall, _) in sorted(self.cost.items())),
+            f"API calls: {sum(self.api_calls.values())} ("
+            + ", ".join(f"{name}={count}" for name, count in self.api_calls.most_common(5)) + ")",
+            f"Decisions: {summary(self.decisions)}; recorded {summary(self.recorded)}",
+        ]
+        differences = self.differences()
+        if not differences:
+            lines.append("Same decisions as when recorded")
+        else:
+            lines.append(f"{len(differences)} windows placed differently from the recording:")
+            for hwnd, recorded, replayed in differences[:20]:
+                lines.append(f"  {hwnd:#x}: recorded {recorded}, replayed {replayed}")
+        return "\n".join(lines)
+
+
+class _DecisionLog:
+    """Engine recorder hooks for a replay: keeps the decisions, ignores the rest"""
+
+    def __init__(self, report, clock):
+        self.report = report
+        self.clock = clock
+
+    def rules(self, rules):
+        pass
+
+    def monitors(self, monitors):
+        pass
+
+    def event(self, event):
+        pass
+
+    def snapshot(self, snapshot, full=False):
+        pass
+
+    def move(self, result):
+        self.report.decisions.append((self.clock(), 'move',
+                                      _decision(result.tag[0], result.hwnd, result.ok)))
+
+    def layout(self, matches, report):
+        for decision in _layout_decisions(matches, report):
+            self.report.decisions.append((self.clock(), 'layout', decision))
+
+
+def _recorded(path):
+    """(outcomes, decisions) of the moves in a trace, for ReplayBackend and the report"""
+    outcomes = {}
+    decisions = []
+    for record in read_trace(path):
+        kind = record.get('k')
+        if kind == 'move':
+            found = [(record['t'], 'move', record['m'])]
+        elif kind == 'layout':
+            found = [(record['t'], 'layout', decision) for decision in record['m']]
+        else:
+            continue
+        for decision in found:
+            decisions.append(decision)
+            outcomes.setdefault(decision[2][0], deque()).append(bool(decision[2][-1]))
+    return outcomes, decisions
+
+
+def replay(path, move_workers=1, log=None):
+    """Feed a trace through a fresh engine on a fake desktop; returns a ReplayReport
+
+    One move worker keeps the order of moves, and so the decisions,
+    deterministic. Engine log lines go to `log`, or to report.log.
+    """
+    report = ReplayReport(path)
+    outcomes, report.recorded = _recorded(path)
+    backend = ReplayBackend(outcomes)
+    clock = VirtualClock()
+    engine = PlacementEngine(backend, log=log or report.log.append, clock=clock,
+                             sleep=lambda seconds: None, move_workers=move_workers)
+    engine.recorder = _DecisionLog(report, clock)
+    # Neither source is started: the trace supplies the events
+    engine.poller = PollingEventSource(engine.scheduler.interval, clock)
+    # No queue either: rule changes are swapped in at once
+    engine.running = True
+
+    def step(events):
+        kind = events[0].kind if events else 'idle'
+        wall = time.perf_counter()
+        cpu = time.process_time()
+        engine.housekeeping()
+        engine.dispatch(events)
+        while engine.pipeline.in_flight():
+            time.sleep(IDLE_POLL)
+        engine.collect_results()
+        cost = report.cost.setdefault(kind, [0, 0.0, 0.0])
+        cost[0] += 1
+        cost[1] += time.perf_counter() - wall
+        cost[2] += time.process_time() - cpu
+
+    def advance(t):
+        # Retries fall due between records, at their own time
+        due = engine.retries.next_due()
+        while due is not None and due <= t:
+            clock.now = max(clock.now, due)
+            step([])
+            due = engine.retries.next_due()
+        clock.now = max(clock.now, t)
+
+    wall = time.perf_counter()
+    cpu = time.process_time()
+    engine.pipeline.start()
+    pending = []  # an event waits for the snapshot records written while it was handled
+    try:
+        for record in read_trace(path):
+            report.records += 1
+            kind = record.get('k')
+            t = record.get('t', 0.0)
+            report.trace_seconds = max(report.trace_seconds, t)
+
+            if kind == 'proc':
+                backend.put_process(record['pid'], record['n'], record['c'], record['path'])
+                continue
+            if kind == 'snap':
+                for hwnd in record.get('del', ()):
+                    backend.close_window(hwnd)
+                for description in record.get('add', ()):
+                    backend.put_window(*description)
+                continue
+
+            if pending:
+                step(pending)
+                pending = []
+            advance(t)
+            if kind == 'ev':
+                event = WindowEvent(record['e'], record.get('h'), t)
+                report.events[event.kind] += 1
+                if event.kind == DESTROYED:
+                    backend.close_window(event.hwnd)
+                pending = [event]
+            elif kind == 'rules':
+                engine.update_rules(record['r'])
+            elif kind == 'mon':
+                backend.set_monitors(record['m'])
+                engine.topology.check()
+                step([])
+            elif kind == 'trace':
+                if record.get('mode', 'polling') != 'polling':
+                    engine.event_source = ScriptedEventSource(clock=clock)
+                if record.get('retries'):
+                    engine.retries.configure(*record['retries'])
+        if pending:
+            step(pending)
+    finally:
+        engine.running = False
+        engine.pipeline.shutdown()
+
+    report.wall_seconds = time.perf_counter() - wall
+    report.cpu_seconds = time.process_time() - cpu
+    report.api_calls = Counter(backend.calls)
+    report.counters = engine.stats()['counters']
+    return report
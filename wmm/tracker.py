@@ -0,0 +1,155 @@
+"""Per-window placement state
+
+The engine used to remember moved windows as a set of hwnds. Windows reuse
+hwnds once closed, so a new window that happened to get a recycled handle
+was taken for one already placed and skipped. The tracker keys windows by
+(hwnd, pid, process create time), which a recycled handle does not share
+with its previous owner.
+
+Entries are stamped with the generation of the last full scan that saw
+them; each full scan then drops entries from older generations, so the
+tracker holds only windows that currently match a rule, however many
+short-lived windows come and go.
+"""
+
+import time
+
+
+class TrackedWindow:
+    """What the engine knows about one window"""
+
+    __slots__ = ('key', 'first_seen', 'last_seen', 'generation',
+                 'placed', 'placed_at', 'rule_key', 'attempts', 'last_result',
+                 'gave_up', 'group', 'slot', 'target')
+
+    def __init__(self, key, now, generation):
+        self.key = key
+        self.first_seen = now
+        self.last_seen = now
+        self.generation = generation
+        self.placed = False
+        self.placed_at = None
+        self.rule_key = None   # key of the rule that last placed it
+        self.attempts = 0      # moves tried since it was last placed
+        self.last_result = None  # True/False for the last move, None if never tried
+        self.gave_up = False   # failed too often; left alone until something changes
+        self.group = None   # arrangement (arrange.group_key) it holds a slot in
+        self.slot = None
+        self.target = None  # (x, y, w, h) of that slot
+
+    @property
+    def hwnd(self):
+        return self.key[0]
+
+
+class WindowTracker:
+    """TrackedWindow entries keyed by (hwnd, pid, create_time)
+
+    Used from the engine thread only.
+    """
+
+    def __init__(self, clock=time.monotonic):
+        self.clock = clock
+        self.generation = 0
+        self._windows = {}  # key -> TrackedWindow
+        self._by_hwnd = {}  # hwnd -> key of its current owner
+        self.evicted = 0
+        self.reused = 0
+
+    def __len__(self):
+        return len(self._windows)
+
+    def __iter__(self):
+        return iter(list(self._windows.values()))
+
+    def get(self, key):
+        return self._windows.get(key)
+
+    def observe(self, window):
+        """Entry for a snapshot WindowInfo, created on first sight"""
+        key = window.key
+        entry = self._windows.get(key)
+        now = self.clock()
+        if entry is None:
+            hwnd = key[0]
+            previous = self._by_hwnd.get(hwnd)
+            if previous is not None:
+                # Same handle, different process: the old window is gone
+                del self._windows[previous]
+                self.reused += 1
+            entry = self._windows[key] = TrackedWindow(key, now, self.generation)
+            self._by_hwnd[hwnd] = key
+        entry.last_seen = now
+        entry.generation = self.generation
+        return entry
+
+    def record(self, key, ok, rule_key):
+        """Store the outcome of a move; returns the entry, or None if evicted meanwhile"""
+        entry = self._windows.get(key)
+        if entry is None:
+            return None
+        entry.last_result = ok
+        if ok:
+            entry.placed = True
+            entry.placed_at = self.clock()
+            entry.rule_key = rule_key
+            entry.attempts = 0
+            entry.gave_up = False
+        else:
+            entry.attempts += 1
+        return entry
+
+    def begin_scan(self):
+        """Start a new generation; call before observing a full snapshot"""
+        self.generation += 1
+
+    def end_scan(self):
+        """Drop entries the scan just finished did not see; returns how many"""
+        generation = self.generation
+        stale = [key for key, entry in self._windows.items() if entry.generation != generation]
+        for key in stale:
+            self._remove(key)
+        self.evicted += len(stale)
+        return len(stale)
+
+    def discard_hwnd(self, hwnd):
+        """Forget a destroyed window; returns its key, or None if it wasn't tracked"""
+        key = self._by_hwnd.get(hwnd)
+        if key is not None:
+            self._remove(key)
+        return key
+
+    def unplace(self, rule_keys):
+        """Mark windows placed by any of `rule_keys` as not placed; returns how many"""
+        count = 0
+        for entry in self._windows.values():
+            if entry.placed and entry.rule_key in rule_keys:
+                entry.placed = False
+                entry.attempts = 0
+                count += 1
+        return count
+
+    def reset_failures(self):
+        """Give failed and given-up windows a fresh set of attempts; returns how many"""
+        count = 0
+        for entry in self._windows.values():
+            if entry.attempts or entry.gave_up:
+                entry.attempts = 0
+                entry.gave_up = False
+                count += 1
+        return count
+
+    def placed_count(self):
+        return sum(1 for entry in self._windows.values() if entry.placed)
+
+    def gave_up_count(self):
+        return sum(1 for entry in self._windows.values() if entry.gave_up)
+
+    def clear(self):
+        self._windows.clear()
+        self._by_hwnd.clear()
+
+    def _remove(self, key):
+        del self._windows[key]
+        if self._by_hwnd.get(key[0]) == key:
+            del self._by_hwnd[key[0]]
@@ -0,0 +1,19 @@
+"""Command-line client for a running Window Monitor Mover's control API
+
+    python wmmctl.py ping
+    python wmmctl.py profiles.switch name=presenting
+    python wmmctl.py rules.add rule='{"process": "teams", "monitor": {...}}'
+    python wmmctl.py layout.apply
+    python wmmctl.py windows.list placed_only=true
+    python wmmctl.py --batch changes.json
+
+The app must be running with --control (or the control_address setting).
+See wmm/control.py for the methods.
+"""
+
+import sys
+
+from wmm.control import main
+
+if __name__ == "__main__":
+    sys.exit(main())